@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""
+Script para crear position_lots / position_fills y agregar position_lot_id a trading_orders
+"""
+
+from sqlalchemy import create_engine, text
+from app.db.database import DATABASE_URL
+from app.db.models import Base, PositionLot, PositionFill
+
+def add_position_lots():
+    """Crea las tablas de lotes y enlaza trading_orders con su lote"""
+
+    engine = create_engine(DATABASE_URL)
+
+    # Tablas nuevas (no toca las existentes)
+    Base.metadata.create_all(bind=engine, tables=[PositionLot.__table__, PositionFill.__table__])
+    print("✅ Tablas 'position_lots' y 'position_fills' listas")
+
+    with engine.connect() as connection:
+        result = connection.execute(text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = 'trading_orders' AND table_schema = 'public'
+        """))
+        existing_columns = [row[0] for row in result]
+
+        if "position_lot_id" not in existing_columns:
+            try:
+                sql = "ALTER TABLE trading_orders ADD COLUMN position_lot_id INTEGER REFERENCES position_lots(id)"
+                print(f"Ejecutando: {sql}")
+                connection.execute(text(sql))
+                connection.commit()
+                print("✅ Columna 'position_lot_id' agregada exitosamente")
+            except Exception as e:
+                print(f"❌ Error agregando columna 'position_lot_id': {e}")
+        else:
+            print("⏭️ Columna 'position_lot_id' ya existe")
+
+        try:
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_trading_orders_position_lot_id ON trading_orders (position_lot_id)"
+            ))
+            connection.commit()
+            print("✅ Índice 'ix_trading_orders_position_lot_id' listo")
+        except Exception as e:
+            print(f"❌ Error creando índice: {e}")
+
+    print("\n🎉 Migración completada! Las BUY abiertas se agrupan en lotes al arrancar la API/worker")
+    print("   (y en cada ciclo de los scanners, sin importar su estado).")
+
+if __name__ == "__main__":
+    print("🔄 Creando lotes de posición...")
+    add_position_lots()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+
+"""
+Script para agregar la columna desired_running a la tabla scanner_checkpoints
+"""
+
+from sqlalchemy import create_engine, text
+from app.db.database import DATABASE_URL
+
+def add_scanner_desired_state():
+    """Agrega desired_running (start/stop pedido por la API al worker) a scanner_checkpoints"""
+    
+    engine = create_engine(DATABASE_URL)
+    
+    with engine.connect() as connection:
+        result = connection.execute(text("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = 'scanner_checkpoints' AND table_schema = 'public'
+        """))
+        existing_columns = [row[0] for row in result]
+        
+        if not existing_columns:
+            print("⏭️ Tabla 'scanner_checkpoints' no existe aún (la crea la API/worker con la columna)")
+        elif "desired_running" not in existing_columns:
+            try:
+                sql = "ALTER TABLE scanner_checkpoints ADD COLUMN desired_running BOOLEAN"
+                print(f"Ejecutando: {sql}")
+                connection.execute(text(sql))
+                connection.commit()
+                print("✅ Columna 'desired_running' agregada exitosamente")
+            except Exception as e:
+                print(f"❌ Error agregando columna 'desired_running': {e}")
+        else:
+            print("⏭️ Columna 'desired_running' ya existe")
+    
+    print("\n🎉 Migración completada!")
+
+if __name__ == "__main__":
+    print("🔄 Agregando columna desired_running a la tabla scanner_checkpoints...")
+    add_scanner_desired_state()
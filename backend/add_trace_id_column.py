@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+"""
+Script para agregar la columna trace_id a la tabla trading_orders
+"""
+
+from sqlalchemy import create_engine, text
+from app.db.database import DATABASE_URL
+
+def add_trace_id_column():
+    """Agrega trace_id (y su índice) a trading_orders"""
+    
+    engine = create_engine(DATABASE_URL)
+    
+    with engine.connect() as connection:
+        result = connection.execute(text("""
+            SELECT column_name 
+            FROM information_schema.columns 
+            WHERE table_name = 'trading_orders' AND table_schema = 'public'
+        """))
+        existing_columns = [row[0] for row in result]
+        
+        if "trace_id" not in existing_columns:
+            try:
+                sql = "ALTER TABLE trading_orders ADD COLUMN trace_id VARCHAR"
+                print(f"Ejecutando: {sql}")
+                connection.execute(text(sql))
+                connection.commit()
+                print("✅ Columna 'trace_id' agregada exitosamente")
+            except Exception as e:
+                print(f"❌ Error agregando columna 'trace_id': {e}")
+        else:
+            print("⏭️ Columna 'trace_id' ya existe")
+        
+        try:
+            connection.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_trading_orders_trace_id ON trading_orders (trace_id)"
+            ))
+            connection.commit()
+            print("✅ Índice 'ix_trading_orders_trace_id' listo")
+        except Exception as e:
+            print(f"❌ Error creando índice: {e}")
+    
+    print("\n🎉 Migración completada!")
+
+if __name__ == "__main__":
+    print("🔄 Agregando columna trace_id a la tabla trading_orders...")
+    add_trace_id_column()
@@ -1,6 +1,7 @@
 # app/api/v1/auth_routes.py
 
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.db.database import get_db
 from app.db import user_crud
@@ -40,3 +41,20 @@ def login(user_in: UserLoginRequest, request: Request, db: Session = Depends(get
         "token_type": "bearer",
         "user": user_out
     }
+
+@router.post("/logout")
+def logout(credentials: HTTPAuthorizationCredentials = Depends(auth.security), db: Session = Depends(get_db)):
+    payload = auth.decode_access_token(credentials.credentials)
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    # Revocar el token y descartar el usuario cacheado para este token. La fila en revoked_tokens
+    # lo revoca también en los demás workers de la API (shared_state, versión "revoked_tokens")
+    jti = payload.get("jti")
+    if jti:
+        user_crud.revoke_token(db, jti, payload.get("exp"))
+        auth.principal_cache.revoke_token(jti, payload.get("exp"))
+    else:
+        auth.principal_cache.invalidate_key(f"sub:{payload.get('sub')}")
+
+    return {"message": "Logout exitoso"}
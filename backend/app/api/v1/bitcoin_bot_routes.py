@@ -16,6 +16,8 @@ from app.db.database import get_db
 from app.core.auth import get_current_user
 from app.db.models import User
 from app.services.bitcoin_scanner_service import bitcoin_scanner
+from app.core.binance_governor import PRIORITY_DASHBOARD
+from app.services.price_oracle import price_oracle
 
 router = APIRouter()
 
@@ -220,15 +222,8 @@ async def get_current_analysis(current_user: User = Depends(get_current_user)):
     try:
         from app.services.bitcoin_scanner_service import bitcoin_scanner
         
-        # Obtener precio actual de Bitcoin directamente de Binance si el scanner falla
-        current_price = 0
-        try:
-            import requests
-            response = requests.get("https://api.binance.com/api/v3/ticker/price?symbol=BTCUSDT", timeout=5)
-            if response.status_code == 200:
-                current_price = float(response.json()['price'])
-        except:
-            current_price = 0
+        # Precio actual de Bitcoin desde el price oracle (0 si no está disponible)
+        current_price = await price_oracle.get_price("BTCUSDT", priority=PRIORITY_DASHBOARD) or 0
         
         # Intentar obtener análisis del scanner (sin modificar el scanner)
         analysis_data = {}
@@ -1,17 +1,27 @@
 # backend/app/api/v1/bnb_4h_mainnet_routes.py
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
 import logging
 
 from app.db.database import get_db
+from app.db.async_database import get_async_db
+from app.db import crud_async
 from app.db.models import User
 from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.services.scanner_checkpoints import scanner_checkpoints
 from app.services.bnb_scanner_service import bnb_scanner
-from app.services.auto_trading_bnb4h_executor import AutoTradingBnb4hExecutor
+from app.services.strategy_engine import get_strategy_engine
+from app.services.strategy_subscriptions import subscription_registry
 from app.db.models import TradingOrder
+from app.core.binance_governor import PRIORITY_DASHBOARD, PRIORITY_ORDER
+from app.services.price_oracle import price_oracle
 from datetime import datetime, timedelta
 
 # Configurar logging
@@ -21,8 +31,8 @@ logger = logging.getLogger(__name__)
 # Crear router
 router = APIRouter(prefix="/trading/scanner/bnb-4h-mainnet", tags=["bnb-4h-mainnet-scanner"])
 
-# Instanciar ejecutor específico
-bnb_4h_executor = AutoTradingBnb4hExecutor()
+# Motor de ejecución compartido con el scanner
+bnb_4h_executor = get_strategy_engine('bnb_4h')
 
 # --------------------------
 # Control del Scanner BNB 4h Mainnet
@@ -44,6 +54,16 @@ async def start_bnb_4h_scanner(
                 detail="Solo administradores pueden controlar el scanner"
             )
         
+        # Con worker dedicado (SCANNERS_IN_API=false) la API no inicia scanners (operarían dos veces):
+        # el pedido queda en scanner_checkpoints y lo aplica el worker
+        if not settings.SCANNERS_IN_API:
+            await asyncio.to_thread(scanner_checkpoints.request_running, 'bnb_4h', True)
+            return {
+                "success": True,
+                "message": "Inicio del scanner BNB 4h Mainnet solicitado al worker",
+                "status": bnb_scanner.get_status()
+            }
+        
         if bnb_scanner.is_running:
             return {
                 "success": False,
@@ -52,7 +72,6 @@ async def start_bnb_4h_scanner(
             }
         
         # Iniciar scanner
-        import asyncio
         asyncio.create_task(bnb_scanner.start_scanner())
         
         logger.info("✅ Scanner BNB 4h Mainnet iniciado exitosamente")
@@ -62,6 +81,8 @@ async def start_bnb_4h_scanner(
             "status": bnb_scanner.get_status()
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error iniciando scanner BNB 4h Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error iniciando scanner: {str(e)}")
@@ -82,6 +103,15 @@ async def stop_bnb_4h_scanner(
                 detail="Solo administradores pueden controlar el scanner"
             )
         
+        # Con worker dedicado el scanner no corre en este proceso: lo detiene el worker
+        if not settings.SCANNERS_IN_API:
+            await asyncio.to_thread(scanner_checkpoints.request_running, 'bnb_4h', False)
+            return {
+                "success": True,
+                "message": "Detención del scanner BNB 4h Mainnet solicitada al worker",
+                "status": bnb_scanner.get_status()
+            }
+        
         await bnb_scanner.stop_scanner()
         
         logger.info("⏹️ Scanner BNB 4h Mainnet detenido exitosamente")
@@ -97,16 +127,20 @@ async def stop_bnb_4h_scanner(
 
 @router.get("/status")
 async def get_bnb_4h_scanner_status(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Obtiene el estado actual del scanner BNB 4h Mainnet"""
     try:
-        status_data = bnb_scanner.get_status()
+        def _build():
+            status_data = bnb_scanner.get_status()
         
-        return {
-            "success": True,
-            "data": status_data
-        }
+            return {
+                "success": True,
+                "data": status_data
+            }
+        
+        return await response_cache.respond(request, bnb_scanner.cache_namespace, current_user.id, _build)
         
     except Exception as e:
         logger.error(f"❌ Error obteniendo estado del scanner BNB 4h Mainnet: {e}")
@@ -166,22 +200,18 @@ async def force_buy_bnb_4h_mainnet(
                 TradingApiKey.is_active == True
             ).first()
             if candidate:
-                candidate.bnb_4h_mainnet_enabled = True
-                db.commit()
+                # Alta en strategy_subscriptions (espeja la columna legacy y recarga el mapa)
+                subscription_registry.set_subscription(db, candidate, 'bnb_4h', True)
                 auto_enabled = True
                 logger.info(f"🟢 Habilitada BNB 4h Mainnet en API key {candidate.id} para usuario {current_user.id}")
                 enabled_keys = [candidate]
             else:
                 raise HTTPException(status_code=400, detail="No hay API keys mainnet activas para habilitar")
 
-        # Precio del último escaneo o endpoint directo
-        price = bnb_scanner.last_scan_price
+        # Precio fresco del price oracle; el del último escaneo solo como respaldo
+        price = await price_oracle.get_price("BNBUSDT", priority=PRIORITY_ORDER) or bnb_scanner.last_scan_price
         if not price:
-            # Fallback rápido al endpoint público de Binance
-            import requests
-            resp = requests.get("https://api.binance.com/api/v3/ticker/price", params={"symbol": "BNBUSDT"}, timeout=8)
-            resp.raise_for_status()
-            price = float(resp.json()["price"])
+            raise HTTPException(status_code=503, detail="No se pudo obtener el precio actual")
 
         # Señal simulada coherente con el ejecutor
         fake_signal = {
@@ -251,21 +281,25 @@ async def test_bnb_4h_mainnet_scan(
 
 @router.get("/config")
 async def get_bnb_4h_scanner_config(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Obtiene la configuración del scanner BNB 4h Mainnet"""
     try:
-        config = bnb_scanner.config.copy()
-        detection_params = bnb_scanner.detection_params.copy()
+        def _build():
+            config = bnb_scanner.config.copy()
+            detection_params = bnb_scanner.detection_params.copy()
         
-        return {
-            "success": True,
-            "data": {
-                "config": config,
-                "detection_params": detection_params,
-                "environment": "mainnet"
+            return {
+                "success": True,
+                "data": {
+                    "config": config,
+                    "detection_params": detection_params,
+                    "environment": "mainnet"
+                }
             }
-        }
+        
+        return await response_cache.respond(request, bnb_scanner.cache_namespace, current_user.id, _build)
         
     except Exception as e:
         logger.error(f"❌ Error obteniendo configuración del scanner BNB 4h Mainnet: {e}")
@@ -287,12 +321,21 @@ async def update_bnb_4h_scanner_config(
                 detail="Solo administradores pueden actualizar configuración"
             )
         
+        # La configuración vive en el proceso que corre el scanner: con worker dedicado no se aplicaría
+        if not settings.SCANNERS_IN_API:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Los scanners corren en el worker (python -m app.worker)"
+            )
+        
         # Actualizar configuración
         if 'config' in config_updates:
             bnb_scanner.config.update(config_updates['config'])
+            response_cache.bump(bnb_scanner.cache_namespace)
         
         if 'detection_params' in config_updates:
             bnb_scanner.detection_params.update(config_updates['detection_params'])
+            response_cache.bump(bnb_scanner.cache_namespace)
         
         logger.info("✅ Configuración del scanner BNB 4h Mainnet actualizada")
         return {
@@ -302,6 +345,8 @@ async def update_bnb_4h_scanner_config(
             "detection_params": bnb_scanner.detection_params
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error actualizando configuración del scanner BNB 4h Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error actualizando configuración: {str(e)}")
@@ -340,104 +385,51 @@ async def get_bnb_4h_current_price_mainnet(
 ):
     """Obtiene el precio actual de BNB para Mainnet"""
     try:
-        import requests
-        
-        # Obtener precio desde Binance
-        url = "https://api.binance.com/api/v3/ticker/price"
-        params = {'symbol': 'BNBUSDT'}
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        price = float(data['price'])
+        # Precio desde el price oracle (stream en memoria, REST si está vencido)
+        price = await price_oracle.get_price('BNBUSDT', priority=PRIORITY_DASHBOARD)
+        if price is None:
+            raise HTTPException(status_code=503, detail="No se pudo obtener el precio actual")
         
         return {
             "success": True,
             "price": price,
+            "quote": price_oracle.get_quote('BNBUSDT'),
             "environment": "mainnet",
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error obteniendo precio actual de BNB 4h Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error obteniendo precio: {str(e)}")
 
 @router.get("/positions")
 async def get_bnb_4h_mainnet_positions(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene las posiciones abiertas de BNB 4h Mainnet"""
     try:
-        from app.db.models import TradingOrder, TradingApiKey
-        from sqlalchemy import and_
+        async def _build():
+            logger.info(f"📊 Obteniendo posiciones BNB 4h Mainnet para usuario {current_user.id}")
         
-        logger.info(f"📊 Obteniendo posiciones BNB 4h Mainnet para usuario {current_user.id}")
+            # Una sola consulta asíncrona (no bloquea el event loop de los scanners)
+            positions = await crud_async.get_user_open_positions(db, current_user.id, 'BNBUSDT')
         
-        # Obtener API keys del usuario para mainnet
-        api_keys = db.query(TradingApiKey).filter(
-            TradingApiKey.user_id == current_user.id,
-            TradingApiKey.is_testnet == False,
-            TradingApiKey.is_active == True
-        ).all()
-        
-        logger.info(f"📊 Encontradas {len(api_keys)} API keys mainnet activas")
-        
-        positions = []
-        for api_key in api_keys:
-            # Buscar órdenes de compra ejecutadas para BNBUSDT (solo las que NO están completadas)
-            buy_orders = db.query(TradingOrder).filter(
-                TradingOrder.api_key_id == api_key.id,
-                TradingOrder.symbol == 'BNBUSDT',
-                TradingOrder.side == 'BUY',
-                TradingOrder.status == 'FILLED'  # Solo órdenes ejecutadas que no están completadas
-            ).order_by(TradingOrder.created_at.desc()).all()
-            
-            logger.info(f"📊 API Key {api_key.id}: {len(buy_orders)} órdenes BUY ejecutadas")
-            
-            for buy_order in buy_orders:
-                # Verificar si ya tiene orden de venta posterior
-                sell_order = db.query(TradingOrder).filter(
-                    TradingOrder.api_key_id == api_key.id,
-                    TradingOrder.symbol == 'BNBUSDT',
-                    TradingOrder.side == 'SELL',
-                    TradingOrder.status == 'FILLED',
-                    TradingOrder.created_at > buy_order.created_at
-                ).order_by(TradingOrder.created_at.asc()).first()
-                
-                # Si no hay venta, es una posición abierta
-                if not sell_order:
-                    entry_price = buy_order.executed_price or buy_order.price or 0
-                    quantity = buy_order.executed_quantity or buy_order.quantity or 0
-                    
-                    position = {
-                        'order_id': buy_order.id,
-                        'api_key_id': api_key.id,
-                        'quantity': float(quantity),
-                        'entry_price': float(entry_price),
-                        'entry_time': buy_order.created_at.isoformat(),
-                        'total_usdt': float(quantity * entry_price),
-                        'status': 'open',
-                        'symbol': buy_order.symbol,
-                        'binance_order_id': buy_order.binance_order_id,
-                        'order_type': buy_order.order_type,
-                        'reason': buy_order.reason
-                    }
-                    
-                    positions.append(position)
-                    logger.info(f"📊 Posición abierta encontrada: {position['quantity']:.6f} BNB @ ${position['entry_price']:.2f}")
-        
-        logger.info(f"📊 Total posiciones abiertas: {len(positions)}")
+            logger.info(f"📊 Total posiciones abiertas: {len(positions)}")
         
-        return {
-            "success": True,
-            "data": {
-                "positions": positions,
-                "total_positions": len(positions),
-                "environment": "mainnet"
+            return {
+                "success": True,
+                "data": {
+                    "positions": positions,
+                    "total_positions": len(positions),
+                    "environment": "mainnet"
+                }
             }
-        }
+        
+        return await response_cache.respond(request, bnb_scanner.cache_namespace, current_user.id, _build)
         
     except Exception as e:
         logger.error(f"❌ Error obteniendo posiciones BNB 4h Mainnet: {e}")
@@ -452,6 +444,7 @@ async def get_bnb_4h_scanner_performance(
 ):
     """Obtiene métricas de rendimiento del scanner BNB 4h Mainnet"""
     try:
+        # Sin cache de respuestas: uptime_seconds cambia en cada request (y todo sale de memoria)
         status_data = bnb_scanner.get_status()
         
         # Calcular métricas básicas
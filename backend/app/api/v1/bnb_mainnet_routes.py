@@ -1,17 +1,26 @@
 # backend/app/api/v1/bnb_mainnet_routes.py
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
 import logging
 
 from app.db.database import get_db
+from app.db.async_database import get_async_db
+from app.db import crud_async
 from app.db.models import User
 from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.response_cache import response_cache
 from app.services.bnb_scanner_service import bnb_scanner
+from app.services.scanner_checkpoints import scanner_checkpoints
 from app.services.auto_trading_executor import auto_trading_executor
 from app.db.models import TradingOrder
+from app.core.binance_governor import PRIORITY_DASHBOARD, PRIORITY_ORDER
+from app.services.price_oracle import price_oracle
 from datetime import datetime, timedelta
 
 # Configurar logging
@@ -41,6 +50,16 @@ async def start_bnb_scanner(
                 detail="Solo administradores pueden controlar el scanner"
             )
         
+        # Con worker dedicado (SCANNERS_IN_API=false) la API no inicia scanners (operarían dos veces):
+        # el pedido queda en scanner_checkpoints y lo aplica el worker
+        if not settings.SCANNERS_IN_API:
+            await asyncio.to_thread(scanner_checkpoints.request_running, 'bnb_4h', True)
+            return {
+                "success": True,
+                "message": "Inicio del scanner BNB Mainnet solicitado al worker",
+                "status": bnb_scanner.get_status()
+            }
+        
         if bnb_scanner.is_running:
             return {
                 "success": False,
@@ -49,7 +68,6 @@ async def start_bnb_scanner(
             }
         
         # Iniciar scanner
-        import asyncio
         asyncio.create_task(bnb_scanner.start_scanning())
         
         logger.info("✅ Scanner BNB Mainnet iniciado exitosamente")
@@ -59,6 +77,8 @@ async def start_bnb_scanner(
             "status": bnb_scanner.get_status()
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error iniciando scanner BNB Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error iniciando scanner: {str(e)}")
@@ -79,6 +99,15 @@ async def stop_bnb_scanner(
                 detail="Solo administradores pueden controlar el scanner"
             )
         
+        # Con worker dedicado el scanner no corre en este proceso: lo detiene el worker
+        if not settings.SCANNERS_IN_API:
+            await asyncio.to_thread(scanner_checkpoints.request_running, 'bnb_4h', False)
+            return {
+                "success": True,
+                "message": "Detención del scanner BNB Mainnet solicitada al worker",
+                "status": bnb_scanner.get_status()
+            }
+        
         await bnb_scanner.stop_scanning()
         
         logger.info("⏹️ Scanner BNB Mainnet detenido exitosamente")
@@ -88,22 +117,28 @@ async def stop_bnb_scanner(
             "status": bnb_scanner.get_status()
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error deteniendo scanner BNB Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error deteniendo scanner: {str(e)}")
 
 @router.get("/status")
 async def get_bnb_scanner_status(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Obtiene el estado actual del scanner BNB Mainnet"""
     try:
-        status_data = bnb_scanner.get_status()
+        def _build():
+            status_data = bnb_scanner.get_status()
         
-        return {
-            "success": True,
-            "data": status_data
-        }
+            return {
+                "success": True,
+                "data": status_data
+            }
+        
+        return await response_cache.respond(request, bnb_scanner.cache_namespace, current_user.id, _build)
         
     except Exception as e:
         logger.error(f"❌ Error obteniendo estado del scanner BNB Mainnet: {e}")
@@ -172,14 +207,10 @@ async def force_buy_bnb_mainnet(
             else:
                 raise HTTPException(status_code=400, detail="No hay API keys mainnet activas para habilitar")
 
-        # Precio del último escaneo o endpoint directo
-        price = bnb_scanner.last_scan_price
+        # Precio fresco del price oracle; el del último escaneo solo como respaldo
+        price = await price_oracle.get_price("BNBUSDT", priority=PRIORITY_ORDER) or bnb_scanner.last_scan_price
         if not price:
-            # Fallback rápido al endpoint público de Binance
-            import requests
-            resp = requests.get("https://api.binance.com/api/v3/ticker/price", params={"symbol": "BNBUSDT"}, timeout=8)
-            resp.raise_for_status()
-            price = float(resp.json()["price"])
+            raise HTTPException(status_code=503, detail="No se pudo obtener el precio actual")
 
         # Señal simulada coherente con el ejecutor
         fake_signal = {
@@ -249,21 +280,25 @@ async def test_bnb_mainnet_scan(
 
 @router.get("/config")
 async def get_bnb_scanner_config(
+    request: Request,
     current_user: User = Depends(get_current_user)
 ):
     """Obtiene la configuración del scanner BNB Mainnet"""
     try:
-        config = bnb_scanner.config.copy()
-        detection_params = bnb_scanner.detection_params.copy()
+        def _build():
+            config = bnb_scanner.config.copy()
+            detection_params = bnb_scanner.detection_params.copy()
         
-        return {
-            "success": True,
-            "data": {
-                "config": config,
-                "detection_params": detection_params,
-                "environment": "mainnet"
+            return {
+                "success": True,
+                "data": {
+                    "config": config,
+                    "detection_params": detection_params,
+                    "environment": "mainnet"
+                }
             }
-        }
+        
+        return await response_cache.respond(request, bnb_scanner.cache_namespace, current_user.id, _build)
         
     except Exception as e:
         logger.error(f"❌ Error obteniendo configuración del scanner BNB Mainnet: {e}")
@@ -285,12 +320,21 @@ async def update_bnb_scanner_config(
                 detail="Solo administradores pueden actualizar configuración"
             )
         
+        # La configuración vive en el proceso que corre el scanner: con worker dedicado no se aplicaría
+        if not settings.SCANNERS_IN_API:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Los scanners corren en el worker (python -m app.worker)"
+            )
+        
         # Actualizar configuración
         if 'config' in config_updates:
             bnb_scanner.config.update(config_updates['config'])
+            response_cache.bump(bnb_scanner.cache_namespace)
         
         if 'detection_params' in config_updates:
             bnb_scanner.detection_params.update(config_updates['detection_params'])
+            response_cache.bump(bnb_scanner.cache_namespace)
         
         logger.info("✅ Configuración del scanner BNB Mainnet actualizada")
         return {
@@ -300,6 +344,8 @@ async def update_bnb_scanner_config(
             "detection_params": bnb_scanner.detection_params
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error actualizando configuración del scanner BNB Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error actualizando configuración: {str(e)}")
@@ -338,104 +384,51 @@ async def get_bitcoin_current_price_mainnet(
 ):
     """Obtiene el precio actual de BNB para Mainnet"""
     try:
-        import requests
-        
-        # Obtener precio desde Binance
-        url = "https://api.binance.com/api/v3/ticker/price"
-        params = {'symbol': 'BNBUSDT'}
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        price = float(data['price'])
+        # Precio desde el price oracle (stream en memoria, REST si está vencido)
+        price = await price_oracle.get_price('BNBUSDT', priority=PRIORITY_DASHBOARD)
+        if price is None:
+            raise HTTPException(status_code=503, detail="No se pudo obtener el precio actual")
         
         return {
             "success": True,
             "price": price,
+            "quote": price_oracle.get_quote('BNBUSDT'),
             "environment": "mainnet",
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error obteniendo precio actual de BNB Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error obteniendo precio: {str(e)}")
 
 @router.get("/positions")
 async def get_bnb_mainnet_positions(
+    request: Request,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene las posiciones abiertas de BNB Mainnet"""
     try:
-        from app.db.models import TradingOrder, TradingApiKey
-        from sqlalchemy import and_
+        async def _build():
+            logger.info(f"📊 Obteniendo posiciones BNB Mainnet para usuario {current_user.id}")
         
-        logger.info(f"📊 Obteniendo posiciones BNB Mainnet para usuario {current_user.id}")
+            # Una sola consulta asíncrona (no bloquea el event loop de los scanners)
+            positions = await crud_async.get_user_open_positions(db, current_user.id, 'BNBUSDT')
         
-        # Obtener API keys del usuario para mainnet
-        api_keys = db.query(TradingApiKey).filter(
-            TradingApiKey.user_id == current_user.id,
-            TradingApiKey.is_testnet == False,
-            TradingApiKey.is_active == True
-        ).all()
-        
-        logger.info(f"📊 Encontradas {len(api_keys)} API keys mainnet activas")
-        
-        positions = []
-        for api_key in api_keys:
-            # Buscar órdenes de compra ejecutadas para BNBUSDT
-            buy_orders = db.query(TradingOrder).filter(
-                TradingOrder.api_key_id == api_key.id,
-                TradingOrder.symbol == 'BNBUSDT',
-                TradingOrder.side == 'BUY',
-                TradingOrder.status == 'FILLED'
-            ).order_by(TradingOrder.created_at.desc()).all()
-            
-            logger.info(f"📊 API Key {api_key.id}: {len(buy_orders)} órdenes BUY ejecutadas")
-            
-            for buy_order in buy_orders:
-                # Verificar si ya tiene orden de venta posterior
-                sell_order = db.query(TradingOrder).filter(
-                    TradingOrder.api_key_id == api_key.id,
-                    TradingOrder.symbol == 'BNBUSDT',
-                    TradingOrder.side == 'SELL',
-                    TradingOrder.status == 'FILLED',
-                    TradingOrder.created_at > buy_order.created_at
-                ).order_by(TradingOrder.created_at.asc()).first()
-                
-                # Si no hay venta, es una posición abierta
-                if not sell_order:
-                    entry_price = buy_order.executed_price or buy_order.price or 0
-                    quantity = buy_order.executed_quantity or buy_order.quantity or 0
-                    
-                    position = {
-                        'order_id': buy_order.id,
-                        'api_key_id': api_key.id,
-                        'quantity': float(quantity),
-                        'entry_price': float(entry_price),
-                        'entry_time': buy_order.created_at.isoformat(),
-                        'total_usdt': float(quantity * entry_price),
-                        'status': 'open',
-                        'symbol': buy_order.symbol,
-                        'binance_order_id': buy_order.binance_order_id,
-                        'order_type': buy_order.order_type,
-                        'reason': buy_order.reason
-                    }
-                    
-                    positions.append(position)
-                    logger.info(f"📊 Posición abierta encontrada: {position['quantity']:.6f} BTC @ ${position['entry_price']:.2f}")
-        
-        logger.info(f"📊 Total posiciones abiertas: {len(positions)}")
+            logger.info(f"📊 Total posiciones abiertas: {len(positions)}")
         
-        return {
-            "success": True,
-            "data": {
-                "positions": positions,
-                "total_positions": len(positions),
-                "environment": "mainnet"
+            return {
+                "success": True,
+                "data": {
+                    "positions": positions,
+                    "total_positions": len(positions),
+                    "environment": "mainnet"
+                }
             }
-        }
+        
+        return await response_cache.respond(request, bnb_scanner.cache_namespace, current_user.id, _build)
         
     except Exception as e:
         logger.error(f"❌ Error obteniendo posiciones BNB Mainnet: {e}")
@@ -450,6 +443,7 @@ async def get_bnb_scanner_performance(
 ):
     """Obtiene métricas de rendimiento del scanner BNB Mainnet"""
     try:
+        # Sin cache de respuestas: uptime_seconds cambia en cada request (y todo sale de memoria)
         status_data = bnb_scanner.get_status()
         
         # Calcular métricas básicas
@@ -0,0 +1,139 @@
+# backend/app/api/v1/dashboard_routes.py
+
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Any, List, Optional
+import logging
+
+from app.db.async_database import get_async_db
+from app.db import crud_async
+from app.db.models import User
+from app.core.auth import get_current_user
+from app.core.response_cache import response_cache
+from app.services.event_stream import stream_events
+from app.services.scanner_registry import get_mainnet_scanners
+
+logger = logging.getLogger(__name__)
+
+# Crear router
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+# --------------------------
+# Snapshot consolidado de scanners
+# --------------------------
+
+def _scanner_snapshot(key: str, entry: Dict[str, Any], since: Optional[str], logs_limit: int) -> Dict[str, Any]:
+    """Estado, último escaneo, readiness y logs (completos o solo nuevos) de un scanner"""
+    scanner = entry["scanner"]
+    status_data = dict(scanner.get_status())
+    status_data.pop("logs", None)
+
+    logs = list(scanner.scanner_logs)
+    if since:
+        logs = [log for log in logs if (log.get("timestamp") or "") > since]
+    logs = logs[-logs_limit:]
+
+    return {
+        "key": key,
+        "label": entry["label"],
+        "symbol": entry["symbol"],
+        "timeframe": entry["timeframe"],
+        "version": response_cache.get_version(scanner.cache_namespace),
+        "is_running": status_data.get("is_running", scanner.is_running),
+        "current_state": getattr(scanner, "current_state", None),
+        "last_scan_time": status_data.get("last_scan_time"),
+        "last_scan_price": getattr(scanner, "last_scan_price", None),
+        "readiness": dict(getattr(scanner, "readiness_cache", {}) or {}),
+        "status": status_data,
+        "logs": logs,
+        "total_logs": len(scanner.scanner_logs),
+    }
+
+async def _open_positions_by_symbol(db: AsyncSession, user_id: int, symbols: List[str]) -> Dict[str, List[Dict]]:
+    """Posiciones abiertas de todos los símbolos con una sola consulta"""
+    api_key_ids = await crud_async.get_active_mainnet_api_key_ids(db, user_id)
+    buy_orders = await crud_async.get_open_buy_orders(db, api_key_ids, symbols)
+
+    positions: Dict[str, List[Dict]] = {symbol: [] for symbol in symbols}
+    for buy_order in buy_orders:
+        entry_price = buy_order.executed_price or buy_order.price or 0
+        quantity = buy_order.executed_quantity or buy_order.quantity or 0
+        positions[buy_order.symbol].append({
+            'order_id': buy_order.id,
+            'api_key_id': buy_order.api_key_id,
+            'quantity': float(quantity),
+            'entry_price': float(entry_price),
+            'entry_time': buy_order.created_at.isoformat() if buy_order.created_at else None,
+            'total_usdt': float(quantity * entry_price),
+            'binance_order_id': buy_order.binance_order_id,
+            'reason': buy_order.reason
+        })
+    return positions
+
+@router.get("/snapshot")
+async def get_dashboard_snapshot(
+    since: Optional[str] = None,
+    logs_limit: int = 100,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Estado de todos los scanners mainnet en una sola llamada.
+    Con `since` (el `cursor` de la respuesta anterior) solo se devuelven los logs nuevos.
+    """
+    try:
+        scanners = get_mainnet_scanners()
+        symbols = sorted({entry["symbol"] for entry in scanners.values()})
+
+        # Lectura en memoria (sin await): todos los scanners salen del mismo instante
+        snapshots = [_scanner_snapshot(key, entry, since, logs_limit) for key, entry in scanners.items()]
+        # El cursor es el log más nuevo efectivamente devuelto: uno agregado después de leer
+        # llega en el próximo delta, y ninguno se repite
+        cursor = max(
+            (log.get("timestamp") or "" for snapshot in snapshots for log in snapshot["logs"]),
+            default=""
+        ) or since
+        positions_by_symbol = await _open_positions_by_symbol(db, current_user.id, symbols)
+
+        data = {}
+        for snapshot in snapshots:
+            positions = positions_by_symbol.get(snapshot["symbol"], [])
+            snapshot["open_positions"] = positions
+            snapshot["total_positions"] = len(positions)
+            data[snapshot["key"]] = snapshot
+
+        return {
+            "success": True,
+            "data": {
+                "scanners": data,
+                "cursor": cursor,
+                "delta": bool(since),
+                "environment": "mainnet"
+            }
+        }
+
+    except Exception as e:
+        logger.error(f"❌ Error obteniendo snapshot del dashboard: {e}")
+        raise HTTPException(status_code=500, detail=f"Error obteniendo snapshot: {str(e)}")
+
+# --------------------------
+# Eventos en vivo (SSE)
+# --------------------------
+
+@router.get("/stream")
+async def get_dashboard_stream(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Server-Sent Events del event bus: velas cerradas, señales, logs y las órdenes/cierres de las
+    API keys del usuario. El frontend refresca con /snapshot al recibir eventos en vez de esperar al polling.
+    """
+    api_key_ids = await crud_async.get_active_mainnet_api_key_ids(db, current_user.id)
+    return StreamingResponse(
+        stream_events(request, api_key_ids),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
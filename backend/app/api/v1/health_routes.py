@@ -5,10 +5,19 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Dict, Any
 
-from app.db.database import get_db
+from app.db.database import get_db, get_pool_status
 from app.core.auth import get_current_user
 from app.db.models import User
 from app.services.health_monitor_service import health_monitor
+from app.core.loop_watchdog import loop_watchdog
+from app.core.event_bus import event_bus
+from app.core.shared_state import shared_state
+from app.core.binance_governor import binance_http
+from app.services.price_oracle import price_oracle
+from app.services.binance_account import binance_account
+from app.services.scanner_state import scanner_state
+from app.services.scanner_checkpoints import scanner_checkpoints
+from app.services.strategy_subscriptions import subscription_registry
 
 router = APIRouter()
 
@@ -33,7 +42,9 @@ async def get_health_status(current_user: User = Depends(get_current_user)):
             "last_report": monitor_status['last_report_sent'],
             "recent_alerts": monitor_status['recent_alerts'],
             "next_reports": monitor_status['next_report_times'],
-            "config": monitor_status['config']
+            "config": monitor_status['config'],
+            "loop_blocking": loop_watchdog.get_report(limit=3),
+            "price_oracle": price_oracle.get_status()
         }
         
         return {
@@ -141,13 +152,8 @@ async def get_health_report(current_user: User = Depends(get_current_user)):
                 detail="Solo administradores pueden ver reportes de salud"
             )
         
-        # Generar reporte de salud en tiempo real
-        health_data = {
-            "server": await health_monitor._check_server_health(),
-            "database": await health_monitor._check_database_health(),
-            "scanners": await health_monitor._check_scanners_health(),
-            "binance_api": await health_monitor._check_binance_api_health()
-        }
+        # Generar reporte de salud en tiempo real (probes en paralelo)
+        health_data = await health_monitor.collect_health()
         
         # Estadísticas de alertas recientes
         recent_alerts_24h = len([a for a in health_monitor.system_alerts 
@@ -223,4 +229,178 @@ Esta es una prueba del sistema de notificaciones de salud."""
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error enviando alerta de prueba: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+@router.get("/health/db-pool")
+async def get_db_pool_status(current_user: User = Depends(get_current_user)):
+    """Uso del pool de conexiones a la base de datos"""
+    try:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo administradores pueden ver el estado del pool de DB"
+            )
+        
+        return {
+            "success": True,
+            "data": get_pool_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo estado del pool de DB: {str(e)}"
+        )
+
+@router.get("/health/loop-blocking")
+async def get_loop_blocking_report(limit: int = 10, current_user: User = Depends(get_current_user)):
+    """Peores bloqueos del event loop detectados por el watchdog (con stack capturado)"""
+    try:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo administradores pueden ver los bloqueos del event loop"
+            )
+        
+        return {
+            "success": True,
+            "data": loop_watchdog.get_report(limit),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo bloqueos del event loop: {str(e)}"
+        )
+
+@router.post("/health/loop-blocking/reset")
+async def reset_loop_blocking_report(current_user: User = Depends(get_current_user)):
+    """Reinicia el ranking de bloqueos del event loop"""
+    try:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo administradores pueden reiniciar el watchdog"
+            )
+        
+        loop_watchdog.reset()
+        return {
+            "success": True,
+            "message": "Ranking de bloqueos reiniciado",
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reiniciando watchdog: {str(e)}"
+        )
+
+@router.get("/health/binance-weight")
+async def get_binance_weight_status(current_user: User = Depends(get_current_user)):
+    """Peso de Binance usado en el minuto actual, backoff activo, cola por prioridad y cache de credenciales"""
+    try:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo administradores pueden ver el uso de peso de Binance"
+            )
+        
+        return {
+            "success": True,
+            "data": {**binance_http.get_status(), "account_client": binance_account.get_status()},
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo uso de peso de Binance: {str(e)}"
+        )
+
+@router.get("/health/price-oracle")
+async def get_price_oracle_status(current_user: User = Depends(get_current_user)):
+    """Estado del stream de precios y antigüedad del último precio por símbolo"""
+    try:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo administradores pueden ver el estado del price oracle"
+            )
+        
+        return {
+            "success": True,
+            "data": price_oracle.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo estado del price oracle: {str(e)}"
+        )
+
+@router.get("/health/scanner-state")
+async def get_scanner_state_status(current_user: User = Depends(get_current_user)):
+    """Estado en memoria de los scanners: lotes abiertos por estrategia y suscripciones cargadas"""
+    try:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo administradores pueden ver el estado de los scanners"
+            )
+        
+        return {
+            "success": True,
+            "data": {
+                **scanner_state.get_status(),
+                "subscriptions": subscription_registry.get_status(),
+                "checkpoints": scanner_checkpoints.get_status(),
+                "shared_state": shared_state.get_status(),
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo estado de los scanners: {str(e)}"
+        )
+
+@router.get("/health/event-bus")
+async def get_event_bus_status(current_user: User = Depends(get_current_user)):
+    """Event bus en proceso: eventos publicados y cola, entregas, descartes y lag por suscriptor"""
+    try:
+        if not current_user.is_admin:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Solo administradores pueden ver el estado del event bus"
+            )
+        
+        return {
+            "success": True,
+            "data": event_bus.get_status(),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error obteniendo estado del event bus: {str(e)}"
+        )
@@ -1,17 +1,23 @@
 # backend/app/api/v1/paxg_mainnet_routes.py
 
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Request, status
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
 import logging
 
 from app.db.database import get_db
 from app.db.models import User
 from app.core.auth import get_current_user
+from app.core.config import settings
+from app.core.response_cache import response_cache
 from app.services.paxg_scanner_service import paxg_scanner
+from app.services.scanner_checkpoints import scanner_checkpoints
 from app.services.auto_trading_executor import auto_trading_executor
 from app.db.models import TradingOrder
+from app.core.binance_governor import PRIORITY_DASHBOARD
+from app.services.price_oracle import price_oracle
 from datetime import datetime, timedelta
 
 # Configurar logging
@@ -41,6 +47,16 @@ async def start_paxg_scanner(
                 detail="Solo administradores pueden controlar el scanner"
             )
         
+        # Con worker dedicado (SCANNERS_IN_API=false) la API no inicia scanners (operarían dos veces):
+        # el pedido queda en scanner_checkpoints y lo aplica el worker
+        if not settings.SCANNERS_IN_API:
+            await asyncio.to_thread(scanner_checkpoints.request_running, 'paxg_4h', True)
+            return {
+                "success": True,
+                "message": "Inicio del scanner PAXG Mainnet solicitado al worker",
+                "status": paxg_scanner.get_status()
+            }
+        
         if paxg_scanner.is_running:
             return {
                 "success": False,
@@ -49,7 +65,6 @@ async def start_paxg_scanner(
             }
         
         # Iniciar scanner
-        import asyncio
         asyncio.create_task(paxg_scanner.start_scanning())
         
         logger.info("✅ Scanner PAXG Mainnet iniciado exitosamente")
@@ -59,6 +74,8 @@ async def start_paxg_scanner(
             "status": paxg_scanner.get_status()
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error iniciando scanner PAXG Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error iniciando scanner: {str(e)}")
@@ -79,6 +96,15 @@ async def stop_paxg_scanner(
                 detail="Solo administradores pueden controlar el scanner"
             )
         
+        # Con worker dedicado el scanner no corre en este proceso: lo detiene el worker
+        if not settings.SCANNERS_IN_API:
+            await asyncio.to_thread(scanner_checkpoints.request_running, 'paxg_4h', False)
+            return {
+                "success": True,
+                "message": "Detención del scanner PAXG Mainnet solicitada al worker",
+                "status": paxg_scanner.get_status()
+            }
+        
         if not paxg_scanner.is_running:
             return {
                 "success": False,
@@ -96,23 +122,28 @@ async def stop_paxg_scanner(
             "status": paxg_scanner.get_status()
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error deteniendo scanner PAXG Mainnet: {e}")
         raise HTTPException(status_code=500, detail=f"Error deteniendo scanner: {str(e)}")
 
 @router.get("/status")
 async def get_paxg_scanner_status(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: User = Depends(get_current_user)
 ):
     """Obtiene el estado actual del scanner PAXG Mainnet"""
     try:
-        status_data = paxg_scanner.get_status()
+        def _build():
+            status_data = paxg_scanner.get_status()
         
-        return {
-            "success": True,
-            "data": status_data
-        }
+            return {
+                "success": True,
+                "data": status_data
+            }
+        
+        return await response_cache.respond(request, paxg_scanner.cache_namespace, current_user.id, _build)
             
     except Exception as e:
         logger.error(f"❌ Error obteniendo estado del scanner PAXG: {e}")
@@ -155,37 +186,21 @@ async def get_current_paxg_price(
 ):
     """Obtiene el precio actual de PAXG"""
     try:
-        # Usar el precio del último escaneo si está disponible
-        status_data = paxg_scanner.get_status()
-        current_price = status_data.get('paxg_price')
-        
-        if current_price:
-            return {
-                "success": True,
-                "price": current_price,
-                "source": "scanner"
-            }
-        
-        # Si no hay precio del scanner, obtener de Binance directamente
-        import requests
-        
-        # Obtener precio desde Binance
-        url = "https://api.binance.com/api/v3/ticker/price"
-        params = {'symbol': 'PAXGUSDT'}
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        price = float(data['price'])
+        # Precio desde el price oracle (stream en memoria, REST si está vencido)
+        price = await price_oracle.get_price('PAXGUSDT', priority=PRIORITY_DASHBOARD)
+        if price is None:
+            raise HTTPException(status_code=503, detail="No se pudo obtener el precio actual")
         
         return {
             "success": True,
             "price": price,
+            "quote": price_oracle.get_quote('PAXGUSDT'),
             "environment": "mainnet",
             "timestamp": datetime.now().isoformat()
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error obteniendo precio de PAXG: {e}")
         raise HTTPException(status_code=500, detail=f"Error obteniendo precio: {str(e)}")
@@ -295,6 +310,13 @@ async def update_paxg_scanner_config(
                 detail="Solo administradores pueden actualizar configuración"
             )
         
+        # La configuración vive en el proceso que corre el scanner: con worker dedicado no se aplicaría
+        if not settings.SCANNERS_IN_API:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Los scanners corren en el worker (python -m app.worker)"
+            )
+        
         # Actualizar configuración
         paxg_scanner.update_config(config_data)
         
@@ -305,21 +327,26 @@ async def update_paxg_scanner_config(
             "config": paxg_scanner.config
         }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error actualizando configuración PAXG: {e}")
         raise HTTPException(status_code=500, detail=f"Error actualizando configuración: {str(e)}")
 
 @router.get("/config")
 async def get_paxg_scanner_config(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    current_user: User = Depends(get_current_user)
 ):
     """Obtiene la configuración actual del scanner PAXG"""
     try:
-        return {
-            "success": True,
-            "data": paxg_scanner.config
-        }
+        def _build():
+            return {
+                "success": True,
+                "data": paxg_scanner.config
+            }
+        
+        return await response_cache.respond(request, paxg_scanner.cache_namespace, current_user.id, _build)
             
     except Exception as e:
         logger.error(f"❌ Error obteniendo configuración PAXG: {e}")
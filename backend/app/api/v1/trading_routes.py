@@ -2,12 +2,15 @@
 
 from fastapi import APIRouter, HTTPException, Depends, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, List, Optional
 from datetime import datetime
+import asyncio
 import logging
 
 from app.db.database import get_db
-from app.db import crud_trading
+from app.db.async_database import get_async_db
+from app.db import crud_async, crud_trading
 from app.db.models import User, TradingApiKey
 from app.schemas.trading_schema import (
     TradingApiKeyCreate, 
@@ -20,6 +23,9 @@ from app.schemas.trading_schema import (
     UpdateCryptoAllocationRequest
 )
 from app.core.auth import get_current_user
+from app.services.portfolio_cache_service import portfolio_cache
+from app.services.binance_account import binance_account
+from app.services.strategy_subscriptions import subscription_registry
 
 # Importar binance_client desde src
 import os
@@ -48,6 +54,7 @@ async def create_api_key(
         
         # Crear API key
         db_api_key = crud_trading.create_trading_api_key(db, api_key_data, current_user.id)
+        subscription_registry.sync_from_api_key(db, db_api_key)
         
         # Preparar respuesta (enmascarar la API key)
         response_data = TradingApiKeyResponse.from_orm(db_api_key)
@@ -100,6 +107,11 @@ async def update_api_key(
         if not db_api_key:
             raise HTTPException(status_code=404, detail="API key no encontrada")
         
+        # Descartar balances cacheados de esta key (pudo cambiar red o credenciales)
+        portfolio_cache.invalidate_api_key(api_key_id)
+        binance_account.invalidate_api_key(api_key_id)
+        subscription_registry.sync_from_api_key(db, db_api_key)
+        
         # Preparar respuesta
         response = TradingApiKeyResponse.from_orm(db_api_key)
         credentials = crud_trading.get_decrypted_api_credentials(db, api_key_id)
@@ -127,6 +139,11 @@ async def delete_api_key(
         if not success:
             raise HTTPException(status_code=404, detail="API key no encontrada")
         
+        portfolio_cache.invalidate_api_key(api_key_id)
+        binance_account.invalidate_api_key(api_key_id)
+        # Las suscripciones se borran en cascada con la key
+        subscription_registry.invalidate()
+        
         logger.info(f"✅ API key {api_key_id} eliminada por usuario {current_user.id}")
         return {"message": "API key eliminada exitosamente"}
         
@@ -225,6 +242,11 @@ async def enable_disable_crypto(
         if not db_api_key:
             raise HTTPException(status_code=404, detail="API key no encontrada")
         
+        # Descartar balances cacheados de esta key (pudo cambiar red o credenciales)
+        portfolio_cache.invalidate_api_key(api_key_id)
+        # Reflejar la habilitación/asignación en strategy_subscriptions (lo que leen scanners y executors)
+        subscription_registry.sync_from_api_key(db, db_api_key)
+        
         action = "habilitada" if request.enabled else "deshabilitada"
         logger.info(f"✅ {request.crypto.upper()} {action} para usuario {current_user.id}")
         
@@ -322,6 +344,11 @@ async def update_crypto_allocation(
         if not db_api_key:
             raise HTTPException(status_code=404, detail="API key no encontrada")
         
+        # Descartar balances cacheados de esta key (pudo cambiar red o credenciales)
+        portfolio_cache.invalidate_api_key(api_key_id)
+        # Reflejar la habilitación/asignación en strategy_subscriptions (lo que leen scanners y executors)
+        subscription_registry.sync_from_api_key(db, db_api_key)
+        
         action = "habilitada" if request.enabled else "deshabilitada"
         logger.info(f"✅ {request.crypto.upper()} {action} para usuario {current_user.id} con ${request.allocated_usdt} USDT")
         
@@ -345,12 +372,12 @@ async def update_crypto_allocation(
 @router.get("/status", response_model=TradingStatusResponse)
 async def get_trading_status(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene el estado actual del trading automático del usuario"""
     try:
         # Obtener todas las API keys del usuario y usar la primera activa
-        api_keys = crud_trading.get_user_trading_api_keys(db, current_user.id)
+        api_keys = await crud_async.get_user_trading_api_keys(db, current_user.id)
         active_api_key = None
         
         # Buscar API key activa, si no hay ninguna, usar la primera disponible
@@ -369,24 +396,23 @@ async def get_trading_status(
         if active_api_key:
             auto_enabled = bool(active_api_key.auto_trading_enabled and active_api_key.is_active)
 
-            # Obtener credenciales desencriptadas y consultar balance USDT
+            # Desencriptar credenciales y consultar balance USDT (HTTP bloqueante -> hilo aparte)
             try:
-                credentials = crud_trading.get_decrypted_api_credentials(db, active_api_key.id)
-                if credentials:
-                    api_key, secret_key = credentials
-                    client = BinanceClient(api_key, secret_key, testnet=active_api_key.is_testnet)
-                    success, account_info = client.test_connection()
-                    if success and isinstance(account_info, dict):
-                        for balance in account_info.get('balances', []):
-                            if balance.get('asset') == 'USDT':
-                                available_balance = float(balance.get('free', 0.0))
-                                break
-                        logger.info(f"✅ Balance USDT obtenido para usuario {current_user.id}: ${available_balance:.2f}")
+                api_key = crud_trading.decrypt_api_key(active_api_key.api_key)
+                secret_key = crud_trading.decrypt_api_key(active_api_key.secret_key)
+                client = BinanceClient(api_key, secret_key, testnet=active_api_key.is_testnet)
+                success, account_info = await asyncio.to_thread(client.test_connection)
+                if success and isinstance(account_info, dict):
+                    for balance in account_info.get('balances', []):
+                        if balance.get('asset') == 'USDT':
+                            available_balance = float(balance.get('free', 0.0))
+                            break
+                    logger.info(f"✅ Balance USDT obtenido para usuario {current_user.id}: ${available_balance:.2f}")
             except Exception as e:
                 logger.warning(f"⚠️ No se pudo obtener balance USDT para usuario {current_user.id}: {e}")
 
         # Obtener estadísticas
-        stats = crud_trading.get_trading_statistics(db, current_user.id, days=1)
+        stats = await crud_async.get_trading_statistics(db, current_user.id, days=1)
 
         logger.info(f"📊 Status trading para usuario {current_user.id}: Auto={auto_enabled}, Balance=${available_balance:.2f}")
 
@@ -410,11 +436,11 @@ async def get_trading_orders(
     status: Optional[str] = None,
     side: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene las órdenes de trading del usuario con información de testnet/mainnet"""
     try:
-        orders = crud_trading.get_user_trading_orders_with_api_info(db, current_user.id, limit, symbol, status, side)
+        orders = await crud_async.get_user_trading_orders_with_api_info(db, current_user.id, limit, symbol, status, side)
         return orders
         
     except Exception as e:
@@ -4,12 +4,19 @@ from passlib.context import CryptContext
 from jose import JWTError, jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.db.database import get_db
+from app.core.shared_state import shared_state
+from app.db.database import get_db, session_scope
 from app.db import models
 import hashlib
 import base64
+import calendar
+import os
+import threading
+import time
+import uuid
 
 # Password hashing - usando SHA256 temporalmente
 SALT = "botu_salt_2024"
@@ -42,6 +49,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
+    # jti: identificador único del token (clave del cache de principal / revocación en logout)
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -52,6 +61,106 @@ def decode_access_token(token: str):
     except JWTError:
         return None
 
+# Cache de principal (usuario resuelto a partir del token)
+
+class PrincipalCache:
+    """
+    Cache en memoria de usuarios autenticados, indexado por jti (o sub en tokens antiguos).
+    Guarda copias desacopladas de la sesión; se invalida al actualizar/borrar el usuario
+    y al hacer logout, también desde otros procesos (tabla revoked_tokens y versiones de
+    shared_state). El TTL corto limita la ventana ante cambios hechos fuera del ORM.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 5000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = {}          # key -> (user, expires_at)
+        self._revoked = {}          # jti -> exp (timestamp) de tokens cerrados con logout
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if time.time() > expires_at:
+                self._entries.pop(key, None)
+                return None
+            return user
+
+    def set(self, key: str, user):
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                now = time.time()
+                for k in [k for k, (_, exp) in self._entries.items() if exp < now]:
+                    self._entries.pop(k, None)
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (user, time.time() + self.ttl_seconds)
+
+    def invalidate_key(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_user(self, user_id: int):
+        """Elimina todas las entradas de un usuario (update, desactivación, borrado)"""
+        with self._lock:
+            for key in [k for k, (u, _) in self._entries.items() if u.id == user_id]:
+                self._entries.pop(key, None)
+
+    def revoke_token(self, jti: str, exp: Optional[float]):
+        """Invalida un token concreto (logout) hasta su expiración"""
+        with self._lock:
+            self._entries.pop(jti, None)
+            now = time.time()
+            for k in [k for k, e in self._revoked.items() if e < now]:
+                self._revoked.pop(k, None)
+            self._revoked[jti] = exp or (now + ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+    def load_revoked(self, revoked: dict):
+        """Agrega los tokens revocados leídos de la DB (logout hecho en otro proceso)"""
+        with self._lock:
+            now = time.time()
+            for k in [k for k, e in self._revoked.items() if e < now]:
+                self._revoked.pop(k, None)
+            for jti, exp in revoked.items():
+                self._revoked[jti] = exp
+                self._entries.pop(jti, None)
+
+    def clear(self):
+        """Descarta todos los usuarios cacheados (cambios de usuarios hechos en otro proceso)"""
+        with self._lock:
+            self._entries.clear()
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        with self._lock:
+            return jti in self._revoked
+
+    def get_status(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "revoked_tokens": len(self._revoked), "ttl_seconds": self.ttl_seconds}
+
+principal_cache = PrincipalCache(ttl_seconds=float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "60")))
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def _invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate_user(target.id)
+
+def _load_revoked_tokens():
+    with session_scope() as db:
+        rows = db.query(models.RevokedToken.jti, models.RevokedToken.expires_at).filter(
+            models.RevokedToken.expires_at > datetime.utcnow()
+        ).all()
+    principal_cache.load_revoked({jti: calendar.timegm(expires_at.utctimetuple()) for jti, expires_at in rows})
+
+# Logout y cambios de usuarios hechos en otro worker de la API (o en app.worker)
+shared_state.watch("revoked_tokens", _load_revoked_tokens)
+shared_state.watch("users", principal_cache.clear)
+
 # Security scheme
 security = HTTPBearer()
 
@@ -78,8 +187,21 @@ def get_current_user(
     except JWTError:
         raise credentials_exception
     
+    jti = payload.get("jti")
+    if principal_cache.is_revoked(jti):
+        raise credentials_exception
+    
+    cache_key = jti or f"sub:{username}"
+    cached_user = principal_cache.get(cache_key)
+    if cached_user is not None:
+        # Adjuntar a la sesión del request sin SELECT (las rutas pueden modificar y hacer commit)
+        return db.merge(cached_user, load=False)
+    
     user = db.query(models.User).filter(models.User.username == username).first()
     if user is None:
         raise credentials_exception
     
-    return user
+    # Guardar una copia desacoplada y devolver la instancia ligada a la sesión
+    db.expunge(user)
+    principal_cache.set(cache_key, user)
+    return db.merge(user, load=False)
@@ -0,0 +1,233 @@
+# backend/app/core/binance_governor.py
+# Gobernador de peso de requests a Binance compartido por todo el proceso.
+# Lleva el peso usado por minuto (header X-MBX-USED-WEIGHT-1M), admite requests por prioridad
+# (órdenes > reconciliación > market data > dashboards) y respeta 429/418 con backoff.
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.core.metrics import registry, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+# --------------------------
+# Prioridades
+# --------------------------
+
+PRIORITY_ORDER = 0          # Crear/cancelar órdenes y balance previo a una orden
+PRIORITY_RECONCILE = 1      # Reconciliación de órdenes con Binance
+PRIORITY_MARKET_DATA = 2    # Velas y precios para scanners/executors
+PRIORITY_DASHBOARD = 3      # Rutas de UI, portfolio, health
+
+PRIORITY_NAMES = {
+    PRIORITY_ORDER: "order",
+    PRIORITY_RECONCILE: "reconcile",
+    PRIORITY_MARKET_DATA: "market_data",
+    PRIORITY_DASHBOARD: "dashboard",
+}
+
+# Fracción del presupuesto que cada prioridad puede consumir: lo que queda por encima
+# siempre está reservado para las prioridades más altas.
+PRIORITY_SHARE = {
+    PRIORITY_ORDER: 1.0,
+    PRIORITY_RECONCILE: 0.9,
+    PRIORITY_MARKET_DATA: 0.75,
+    PRIORITY_DASHBOARD: 0.5,
+}
+
+# Máximo tiempo en cola antes de rendirse (un dashboard prefiere fallar rápido)
+PRIORITY_MAX_WAIT = {
+    PRIORITY_ORDER: 30.0,
+    PRIORITY_RECONCILE: 60.0,
+    PRIORITY_MARKET_DATA: 30.0,
+    PRIORITY_DASHBOARD: 5.0,
+}
+
+# Límite real de Binance: 6000/min por IP. Dejamos margen para otros procesos del mismo host.
+BINANCE_WEIGHT_BUDGET = int(os.getenv("BINANCE_WEIGHT_BUDGET", "4800"))
+# Conexiones keep-alive por host del pool compartido (scanners + executors + rutas)
+BINANCE_HTTP_POOL_SIZE = int(os.getenv("BINANCE_HTTP_POOL_SIZE", "20"))
+
+# Peso por endpoint (spot /api/v3). Lo no listado cuenta como 2.
+ENDPOINT_WEIGHTS = {
+    "/api/v3/ping": 1,
+    "/api/v3/time": 1,
+    "/api/v3/order": 1,
+    "/api/v3/klines": 2,
+    "/api/v3/ticker/price": 2,
+    "/api/v3/ticker/bookTicker": 2,
+    "/api/v3/openOrders": 6,
+    "/api/v3/account": 20,
+    "/api/v3/myTrades": 20,
+    "/api/v3/allOrders": 20,
+    "/api/v3/exchangeInfo": 20,
+}
+DEFAULT_WEIGHT = 2
+
+binance_requests_total = registry.register(Counter(
+    "botu_binance_requests_total", "Requests a Binance por prioridad y resultado", ["priority", "outcome"]))
+binance_used_weight = registry.register(Gauge(
+    "botu_binance_used_weight", "Peso usado en el minuto actual según Binance", ["host"]))
+
+class BinanceRateLimitError(requests.RequestException):
+    """No se pudo admitir la request dentro del tiempo máximo de su prioridad"""
+
+def estimate_weight(url: str, params: Optional[Dict] = None) -> int:
+    path = urlparse(url).path
+    if path == "/api/v3/ticker/price" and not (params or {}).get("symbol") and "symbol=" not in url:
+        return 4  # Todos los símbolos
+    return ENDPOINT_WEIGHTS.get(path, DEFAULT_WEIGHT)
+
+class _HostState:
+    def __init__(self):
+        self.minute = int(time.time() // 60)
+        self.used_weight = 0
+        self.backoff_until = 0.0
+        self.waiting: Dict[int, int] = {p: 0 for p in PRIORITY_NAMES}
+
+    def roll(self, now: float):
+        minute = int(now // 60)
+        if minute != self.minute:
+            self.minute = minute
+            self.used_weight = 0
+
+class BinanceWeightGovernor:
+    """
+    Thread-safe: las requests salen tanto desde el event loop como desde asyncio.to_thread.
+    Usar get/post/request desde código síncrono y aget/apost/arequest desde corutinas
+    (la espera en cola no bloquea el event loop).
+    """
+
+    def __init__(self, budget: int = BINANCE_WEIGHT_BUDGET):
+        self.budget = budget
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+        self.rejected = 0
+        # Un solo pool HTTP para todo el proceso: reutiliza conexiones TLS en vez de abrir una por request
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=BINANCE_HTTP_POOL_SIZE)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def _state(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = _HostState()
+            self._hosts[host] = state
+        return state
+
+    # --------------------------
+    # Admisión
+    # --------------------------
+
+    def _can_admit(self, state: _HostState, priority: int, weight: int, now: float) -> bool:
+        if now < state.backoff_until:
+            return False
+        # Una request no pasa por delante de otra de mayor prioridad que está esperando
+        if any(state.waiting[p] for p in PRIORITY_NAMES if p < priority):
+            return False
+        return state.used_weight + weight <= self.budget * PRIORITY_SHARE[priority]
+
+    def acquire(self, host: str, priority: int, weight: int):
+        deadline = time.time() + PRIORITY_MAX_WAIT[priority]
+        with self._cond:
+            state = self._state(host)
+            state.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.time()
+                    state.roll(now)
+                    if self._can_admit(state, priority, weight, now):
+                        state.used_weight += weight
+                        return
+                    if now >= deadline:
+                        self.rejected += 1
+                        binance_requests_total.inc(priority=PRIORITY_NAMES[priority], outcome="rejected")
+                        raise BinanceRateLimitError(
+                            f"Presupuesto de peso Binance agotado para {PRIORITY_NAMES[priority]} "
+                            f"(usado {state.used_weight}/{self.budget})"
+                        )
+                    # Despertar al cambiar de minuto, al terminar el backoff o cuando otra request libere la cola
+                    wake_at = state.backoff_until if now < state.backoff_until else (state.minute + 1) * 60
+                    self._cond.wait(timeout=max(0.05, min(deadline, wake_at) - now))
+            finally:
+                state.waiting[priority] -= 1
+                self._cond.notify_all()
+
+    def observe(self, host: str, response: requests.Response):
+        """Sincroniza el peso con lo que reporta Binance y aplica backoff en 429/418"""
+        used = response.headers.get("X-MBX-USED-WEIGHT-1M") or response.headers.get("x-mbx-used-weight-1m")
+        with self._cond:
+            state = self._state(host)
+            state.roll(time.time())
+            if used is not None:
+                try:
+                    # El header incluye a otros procesos con la misma IP: nunca bajar la estimación local
+                    state.used_weight = max(state.used_weight, int(used))
+                    binance_used_weight.set(state.used_weight, host=host)
+                except ValueError:
+                    pass
+
+            if response.status_code in (429, 418):
+                retry_after = response.headers.get("Retry-After")
+                seconds = float(retry_after) if retry_after else (120.0 if response.status_code == 418 else 60.0)
+                state.backoff_until = max(state.backoff_until, time.time() + seconds)
+                logger.warning(f"⚠️ Binance {response.status_code} en {host}: pausando requests {seconds:.0f}s")
+            self._cond.notify_all()
+
+    # --------------------------
+    # Requests
+    # --------------------------
+
+    def request(self, method: str, url: str, priority: int = PRIORITY_MARKET_DATA, weight: Optional[int] = None, **kwargs) -> requests.Response:
+        host = urlparse(url).netloc
+        weight = weight if weight is not None else estimate_weight(url, kwargs.get("params"))
+        self.acquire(host, priority, weight)
+        try:
+            response = self._session.request(method, url, **kwargs)
+        except requests.RequestException:
+            binance_requests_total.inc(priority=PRIORITY_NAMES[priority], outcome="error")
+            raise
+        self.observe(host, response)
+        outcome = "rate_limited" if response.status_code in (429, 418) else ("ok" if response.ok else "http_error")
+        binance_requests_total.inc(priority=PRIORITY_NAMES[priority], outcome=outcome)
+        return response
+
+    def get(self, url: str, priority: int = PRIORITY_MARKET_DATA, **kwargs) -> requests.Response:
+        return self.request("GET", url, priority=priority, **kwargs)
+
+    def post(self, url: str, priority: int = PRIORITY_ORDER, **kwargs) -> requests.Response:
+        return self.request("POST", url, priority=priority, **kwargs)
+
+    async def arequest(self, method: str, url: str, priority: int = PRIORITY_MARKET_DATA, **kwargs) -> requests.Response:
+        return await asyncio.to_thread(self.request, method, url, priority, **kwargs)
+
+    async def aget(self, url: str, priority: int = PRIORITY_MARKET_DATA, **kwargs) -> requests.Response:
+        return await self.arequest("GET", url, priority=priority, **kwargs)
+
+    async def apost(self, url: str, priority: int = PRIORITY_ORDER, **kwargs) -> requests.Response:
+        return await self.arequest("POST", url, priority=priority, **kwargs)
+
+    def get_status(self) -> Dict:
+        with self._cond:
+            now = time.time()
+            hosts = {}
+            for host, state in self._hosts.items():
+                state.roll(now)
+                hosts[host] = {
+                    "used_weight": state.used_weight,
+                    "backoff_seconds": round(max(0.0, state.backoff_until - now), 1),
+                    "waiting": {PRIORITY_NAMES[p]: n for p, n in state.waiting.items()},
+                }
+            return {"budget": self.budget, "rejected": self.rejected, "pool_size": BINANCE_HTTP_POOL_SIZE, "hosts": hosts}
+
+# Instancia global
+binance_http = BinanceWeightGovernor()
@@ -11,4 +11,8 @@ class Settings:
     ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 1 día, puedes ajustar
     ALGORITHM = "HS256"
 
+    # false: scanners, executors, Health Monitor y Alert Sender corren en el worker (python -m app.worker)
+    # y la API puede levantarse con varios workers de uvicorn sin duplicar operaciones
+    SCANNERS_IN_API = os.getenv("SCANNERS_IN_API", "true").lower() == "true"
+
 settings = Settings()
@@ -0,0 +1,450 @@
+# backend/app/core/event_bus.py
+# Bus de eventos en proceso (asyncio) entre scanners, executors, notificadores y la UI.
+# Cada suscriptor tiene su propia cola acotada y su propia tarea consumidora: un consumidor lento
+# (Telegram) solo llena su cola y pierde sus eventos más viejos, sin frenar al que publica
+# (colocación de órdenes) ni a los demás suscriptores.
+#
+#   publish(event)             nunca espera: si una cola está llena se descarta su evento más viejo
+#   await publish_wait(event)  backpressure: espera hueco en cada cola (hasta un timeout) antes de descartar
+#
+# Los scanners publican CandleClosed y SignalDetected; las señales las ejecuta el suscriptor
+# executor_<estrategia> (strategy_engine) y la UI recibe todo por /dashboard/stream (event_stream,
+# que con SCANNERS_IN_API=false trae los eventos del worker con NOTIFY/LISTEN y relay()).
+# Los eventos de trading siguen guardándose en trading_events (entrega durable); el bus solo
+# avisa al instante a quien esté escuchando en este proceso.
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type
+
+from app.core.metrics import registry, Counter, Gauge, Histogram
+from app.core.tracing import current_trace_id
+
+logger = logging.getLogger(__name__)
+
+EVENT_BUS_QUEUE_SIZE = int(os.getenv("EVENT_BUS_QUEUE_SIZE", "1000"))
+EVENT_BUS_PUBLISH_WAIT_SECONDS = float(os.getenv("EVENT_BUS_PUBLISH_WAIT_SECONDS", "2"))
+# Cuánto espera un scanner el resultado de su señal (la orden sigue su curso si se agota)
+SIGNAL_OUTCOME_TIMEOUT_SECONDS = float(os.getenv("SIGNAL_OUTCOME_TIMEOUT_SECONDS", "120"))
+
+events_published_total = registry.register(Counter(
+    "botu_event_bus_published_total", "Eventos publicados en el bus", ["event"]))
+events_dropped_total = registry.register(Counter(
+    "botu_event_bus_dropped_total", "Eventos descartados por cola llena", ["subscriber", "event"]))
+event_handler_seconds = registry.register(Histogram(
+    "botu_event_bus_handler_seconds", "Duración del handler de cada suscriptor", ["subscriber"]))
+event_delivery_lag_seconds = registry.register(Histogram(
+    "botu_event_bus_delivery_lag_seconds", "Tiempo entre la publicación y la entrega al suscriptor", ["subscriber"]))
+event_queue_depth = registry.register(Gauge(
+    "botu_event_bus_queue_depth", "Eventos en cola por suscriptor", ["subscriber"]))
+
+# --------------------------
+# Eventos
+# --------------------------
+
+class Event:
+    """Base de los eventos del bus: nombre, momento de publicación y trace_id del publicador"""
+    name = "event"
+
+    def __init__(self, strategy_id: Optional[str] = None):
+        self.strategy_id = strategy_id
+        self.created_at = time.time()
+        self.trace_id = current_trace_id()
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = {k: v for k, v in vars(self).items() if k != "created_at" and not k.startswith("_")}
+        return {"event": self.name, "created_at": datetime.fromtimestamp(self.created_at).isoformat(), **data}
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> Optional["Event"]:
+        """Reconstruye un evento de to_dict() (relay entre procesos); None si el tipo no existe"""
+        data = dict(data)
+        cls = EVENT_TYPES.get(data.pop("event", None))
+        if cls is None:
+            return None
+        event = cls.__new__(cls)
+        created_at = data.pop("created_at", None)
+        event.created_at = datetime.fromisoformat(created_at).timestamp() if created_at else time.time()
+        vars(event).update(data)
+        return event
+
+    def discarded(self):
+        """Ningún handler de su estrategia va a procesar el evento (sin suscriptor o descartado de una cola llena)"""
+
+class CandleClosed(Event):
+    name = "candle_closed"
+
+    def __init__(self, strategy_id: str, symbol: str, timeframe: str, open_time: str, close: float):
+        super().__init__(strategy_id)
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.open_time = open_time
+        self.close = close
+
+    @classmethod
+    def from_frame(cls, strategy_id: str, symbol: str, timeframe: str, df) -> Optional["CandleClosed"]:
+        """Última vela cerrada de un DataFrame de klines indexado por timestamp (la última fila está en curso)"""
+        if df is None or len(df) < 2:
+            return None
+        return cls(strategy_id, symbol, timeframe, df.index[-2].isoformat(), float(df['close'].iloc[-2]))
+
+class SignalDetected(Event):
+    """
+    Señal de compra de un scanner. La ejecuta el suscriptor executor_<strategy_id>; el scanner
+    sigue con sus alertas (DB, Telegram) y recoge el resultado de la orden con outcome().
+    """
+    name = "signal_detected"
+
+    def __init__(self, strategy_id: str, symbol: str, price: Optional[float], signal: Dict[str, Any], source: Optional[str] = None):
+        super().__init__(strategy_id)
+        self.symbol = symbol
+        self.price = price
+        self.signal = signal
+        self.source = source  # scanner que la detectó (etiqueta de botu_signal_to_order_seconds)
+        self._outcome: Optional[asyncio.Future] = None
+        try:
+            self._outcome = asyncio.get_running_loop().create_future()
+        except RuntimeError:
+            # Publicada fuera del loop (o reconstruida desde otro proceso): nadie espera el resultado
+            pass
+
+    def set_outcome(self, result: Any):
+        outcome = getattr(self, "_outcome", None)
+        if outcome is not None and not outcome.done():
+            outcome.get_loop().call_soon_threadsafe(lambda: outcome.done() or outcome.set_result(result))
+
+    async def outcome(self, timeout: float = SIGNAL_OUTCOME_TIMEOUT_SECONDS) -> Any:
+        """Resultado de execute_buy_order; None si no llegó a tiempo (o nadie ejecutó la señal)"""
+        outcome = getattr(self, "_outcome", None)
+        if outcome is None:
+            return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(outcome), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"⚠️ [EventBus] Señal {self.strategy_id} sin resultado del executor tras {timeout:.0f}s")
+            return None
+
+    def discarded(self):
+        if getattr(self, "_outcome", None) is None:
+            return
+        logger.warning(f"⚠️ [EventBus] Señal {self.strategy_id} sin executor que la procese")
+        self.set_outcome(None)
+
+class OrderFilled(Event):
+    name = "order_filled"
+
+    def __init__(
+        self,
+        strategy_id: str,
+        symbol: str,
+        side: str,
+        order_id: Optional[int],
+        api_key_id: Optional[int],
+        quantity: float,
+        price: float,
+        total_usdt: Optional[float] = None,
+        source: str = "executor",
+    ):
+        super().__init__(strategy_id)
+        self.symbol = symbol
+        self.side = side
+        self.order_id = order_id
+        self.api_key_id = api_key_id
+        self.quantity = quantity
+        self.price = price
+        self.total_usdt = total_usdt
+        self.source = source
+
+class PositionClosed(Event):
+    name = "position_closed"
+
+    def __init__(
+        self,
+        strategy_id: str,
+        symbol: str,
+        api_key_id: int,
+        lot_id: Optional[int],
+        reason: str,
+        quantity: float,
+        price: float,
+        pnl_usdt: Optional[float] = None,
+        pnl_percentage: Optional[float] = None,
+    ):
+        super().__init__(strategy_id)
+        self.symbol = symbol
+        self.api_key_id = api_key_id
+        self.lot_id = lot_id
+        self.reason = reason
+        self.quantity = quantity
+        self.price = price
+        self.pnl_usdt = pnl_usdt
+        self.pnl_percentage = pnl_percentage
+
+class LogEntry(Event):
+    name = "log_entry"
+
+    def __init__(self, strategy_id: str, message: str, level: str = "INFO", current_price: Optional[float] = None):
+        super().__init__(strategy_id)
+        self.message = message
+        self.level = level
+        self.current_price = current_price
+
+EVENT_TYPES: Dict[str, Type[Event]] = {
+    cls.name: cls for cls in (CandleClosed, SignalDetected, OrderFilled, PositionClosed, LogEntry)
+}
+
+# --------------------------
+# Suscriptores
+# --------------------------
+
+class Subscription:
+    """
+    Cola acotada + tarea consumidora de un suscriptor; el handler puede ser sync o async.
+    Sin handler (streams) no hay tarea: quien abrió la suscripción lee con next().
+    """
+
+    def __init__(
+        self,
+        name: str,
+        event_types: Tuple[Type[Event], ...],
+        handler: Optional[Callable],
+        maxsize: int,
+        strategy_id: Optional[str] = None,
+    ):
+        self.name = name
+        self.event_types = event_types
+        self.handler = handler
+        self.strategy_id = strategy_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self.max_lag = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def accepts(self, event: Event) -> bool:
+        if self.strategy_id is not None and event.strategy_id != self.strategy_id:
+            return False
+        return isinstance(event, self.event_types)
+
+    def offer(self, event: Event):
+        """Encola sin esperar; con la cola llena descarta el evento más viejo"""
+        while True:
+            try:
+                self.queue.put_nowait(event)
+                return
+            except asyncio.QueueFull:
+                try:
+                    oldest = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    continue
+                self.dropped += 1
+                events_dropped_total.inc(subscriber=self.name, event=oldest.name)
+                if self.handler is not None and self.strategy_id is not None:
+                    oldest.discarded()
+
+    def _received(self, event: Event):
+        lag = time.time() - event.created_at
+        self.max_lag = max(self.max_lag, lag)
+        event_delivery_lag_seconds.observe(lag, subscriber=self.name)
+
+    async def next(self) -> Event:
+        """Siguiente evento de un stream (suscripción sin handler)"""
+        event = await self.queue.get()
+        self._received(event)
+        self.delivered += 1
+        return event
+
+    async def consume(self):
+        while True:
+            event = await self.queue.get()
+            self._received(event)
+            try:
+                with event_handler_seconds.time(subscriber=self.name):
+                    result = self.handler(event)
+                    if asyncio.iscoroutine(result):
+                        await result
+                self.delivered += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                self.last_error = f"{event.name}: {e}"
+                logger.error(f"❌ [EventBus] Error en suscriptor {self.name} con {event.name}: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "events": [t.name for t in self.event_types],
+            "strategy_id": self.strategy_id,
+            "stream": self.handler is None,
+            "queue_size": self.queue.qsize(),
+            "queue_max": self.queue.maxsize,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "max_lag_seconds": round(self.max_lag, 3),
+            "running": self.task is not None and not self.task.done(),
+        }
+
+# --------------------------
+# Bus
+# --------------------------
+
+class EventBus:
+    """
+    Se puede publicar desde el event loop o desde hilos (asyncio.to_thread): desde otro hilo la
+    entrega se agenda en el loop del bus. Los eventos publicados antes de start() quedan en las
+    colas y se entregan al arrancar.
+    """
+
+    def __init__(self):
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._published: Dict[str, int] = {}
+
+    def subscribe(
+        self,
+        name: str,
+        event_types: Iterable[Type[Event]],
+        handler: Callable[[Event], Any],
+        maxsize: int = EVENT_BUS_QUEUE_SIZE,
+        strategy_id: Optional[str] = None,
+    ) -> Subscription:
+        """Registra (o reemplaza) el suscriptor `name`; con strategy_id solo recibe eventos de esa estrategia"""
+        self.unsubscribe(name)
+        subscription = Subscription(name, tuple(event_types), handler, maxsize, strategy_id)
+        self._subscriptions[name] = subscription
+        if self._in_loop():
+            subscription.task = asyncio.create_task(subscription.consume())
+        logger.info(f"📬 [EventBus] Suscriptor {name}: {', '.join(t.name for t in subscription.event_types)}")
+        return subscription
+
+    def open_stream(self, name: str, event_types: Iterable[Type[Event]], maxsize: int = 100) -> Subscription:
+        """
+        Suscriptor sin tarea propia (un cliente de /dashboard/stream): lee con next() y cierra con
+        unsubscribe(name). Si el cliente no lee, solo pierde sus eventos más viejos.
+        """
+        self.unsubscribe(name)
+        subscription = Subscription(name, tuple(event_types), None, maxsize)
+        self._subscriptions[name] = subscription
+        return subscription
+
+    def unsubscribe(self, name: str):
+        subscription = self._subscriptions.pop(name, None)
+        if subscription and subscription.task:
+            subscription.task.cancel()
+
+    def _in_loop(self) -> bool:
+        if self._loop is None:
+            return False
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    # --------------------------
+    # Publicación
+    # --------------------------
+
+    def _matching(self, event: Event) -> List[Subscription]:
+        return [s for s in list(self._subscriptions.values()) if s.accepts(event)]
+
+    @staticmethod
+    def _owned(event: Event, subscriptions: List[Subscription]) -> bool:
+        """Hay un handler de la propia estrategia (ej. executor_<estrategia> para SignalDetected)"""
+        return any(s.handler is not None and s.strategy_id is not None and s.strategy_id == event.strategy_id for s in subscriptions)
+
+    def _count(self, event: Event):
+        events_published_total.inc(event=event.name)
+        self._published[event.name] = self._published.get(event.name, 0) + 1
+
+    def _dispatch(self, event: Event):
+        subscriptions = self._matching(event)
+        for subscription in subscriptions:
+            subscription.offer(event)
+        if not self._owned(event, subscriptions):
+            event.discarded()
+
+    def publish(self, event: Event):
+        """No bloquea nunca (apto para el camino de órdenes)"""
+        self._count(event)
+        loop = self._loop
+        if loop is not None and loop.is_running() and not self._in_loop():
+            loop.call_soon_threadsafe(self._dispatch, event)
+            return
+        self._dispatch(event)
+
+    async def publish_wait(self, event: Event, timeout: float = EVENT_BUS_PUBLISH_WAIT_SECONDS):
+        """
+        Con backpressure: espera hueco en cada cola hasta `timeout`; después descarta el más viejo.
+        Los streams de la UI no frenan al que publica (siempre descartan el más viejo).
+        """
+        if not self._in_loop():
+            self.publish(event)
+            return
+        self._count(event)
+        subscriptions = self._matching(event)
+        if not self._owned(event, subscriptions):
+            event.discarded()
+        for subscription in subscriptions:
+            if subscription.handler is None:
+                subscription.offer(event)
+                continue
+            try:
+                await asyncio.wait_for(subscription.queue.put(event), timeout=timeout)
+            except asyncio.TimeoutError:
+                subscription.offer(event)
+
+    def relay(self, event: Event):
+        """
+        Entrega a los streams de la UI un evento publicado en otro proceso (event_stream): no pasa
+        por los handlers locales, que ya lo procesaron donde se publicó.
+        """
+        loop = self._loop
+        if loop is not None and loop.is_running() and not self._in_loop():
+            loop.call_soon_threadsafe(self.relay, event)
+            return
+        for subscription in self._matching(event):
+            if subscription.handler is None:
+                subscription.offer(event)
+
+    # --------------------------
+    # Ciclo de vida
+    # --------------------------
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        for subscription in self._subscriptions.values():
+            if subscription.handler is not None and (subscription.task is None or subscription.task.done()):
+                subscription.task = asyncio.create_task(subscription.consume())
+        logger.info(f"✅ Event bus iniciado ({len(self._subscriptions)} suscriptores)")
+
+    async def stop(self):
+        tasks = [s.task for s in self._subscriptions.values() if s.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for subscription in self._subscriptions.values():
+            subscription.task = None
+        self._loop = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "running": self._loop is not None,
+            "published": dict(self._published),
+            "subscribers": {name: s.get_status() for name, s in self._subscriptions.items()},
+        }
+
+# Instancia global
+event_bus = EventBus()
+
+def _collect_queue_depth():
+    for name, subscription in list(event_bus._subscriptions.items()):
+        event_queue_depth.set(subscription.queue.qsize(), subscriber=name)
+
+registry.add_collector(_collect_queue_depth)
@@ -0,0 +1,138 @@
+# backend/app/core/leader_election.py
+# Elección de líder con advisory lock de Postgres: solo la instancia que tiene el lock escanea y
+# opera. El lock es de sesión y vive en una conexión dedicada; si el proceso muere o la conexión
+# se cae, Postgres lo libera y otra instancia lo toma en el siguiente intento.
+
+import asyncio
+import logging
+import os
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.db.database import engine, _is_postgres
+
+logger = logging.getLogger(__name__)
+
+# Mismo id en todas las instancias del worker (pg_advisory_lock es global a la base)
+SCANNER_LEADER_LOCK_ID = int(os.getenv("SCANNER_LEADER_LOCK_ID", "724310001"))
+LEADER_CHECK_SECONDS = float(os.getenv("LEADER_CHECK_SECONDS", "5"))
+
+class AdvisoryLockLeader:
+    """
+    `campaign()` intenta tomar el lock cada `check_interval` segundos; siendo líder, verifica la
+    conexión con la misma frecuencia. Llama a `on_elected` / `on_demoted` en cada transición.
+    """
+
+    def __init__(self, name: str, lock_id: int = SCANNER_LEADER_LOCK_ID, check_interval: float = LEADER_CHECK_SECONDS):
+        self.name = name
+        self.lock_id = lock_id
+        self.check_interval = check_interval
+        self.is_leader = False
+        self.elected_at: Optional[datetime] = None
+        self.transitions = 0
+        self._conn = None
+
+    # --------------------------
+    # Lock (bloqueante: se llama en hilo aparte)
+    # --------------------------
+
+    def _try_acquire(self) -> bool:
+        if not _is_postgres:
+            # SQLite/desarrollo: una sola instancia, siempre líder
+            return True
+        if self._conn is None:
+            # AUTOCOMMIT: la conexión no queda "idle in transaction" mientras retiene el lock
+            self._conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        acquired = bool(self._conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": self.lock_id}).scalar())
+        if not acquired:
+            self._close()
+        return acquired
+
+    def _still_held(self) -> bool:
+        if not _is_postgres:
+            return True
+        try:
+            self._conn.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] Conexión del lock de liderazgo perdida: {e}")
+            self._close()
+            return False
+
+    def _release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": self.lock_id})
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] No se pudo liberar el lock (se libera al cerrar la conexión): {e}")
+        self._close()
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    # --------------------------
+    # Campaña
+    # --------------------------
+
+    async def campaign(
+        self,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]],
+        stop_event: asyncio.Event,
+    ):
+        """Bucle de elección hasta `stop_event`; al salir libera el lock y degrada si era líder"""
+        logger.info(f"🗳️ [{self.name}] Compitiendo por el liderazgo (lock {self.lock_id})")
+        try:
+            while not stop_event.is_set():
+                try:
+                    if not self.is_leader:
+                        if await asyncio.to_thread(self._try_acquire):
+                            self.is_leader = True
+                            self.elected_at = datetime.now()
+                            self.transitions += 1
+                            logger.info(f"👑 [{self.name}] Instancia elegida líder")
+                            await on_elected()
+                    elif not await asyncio.to_thread(self._still_held):
+                        await self._demote(on_demoted)
+                except Exception as e:
+                    logger.error(f"❌ [{self.name}] Error en elección de líder: {e}")
+                    if self.is_leader:
+                        await self._demote(on_demoted)
+
+                try:
+                    await asyncio.wait_for(stop_event.wait(), timeout=self.check_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if self.is_leader:
+                await self._demote(on_demoted)
+            await asyncio.to_thread(self._release)
+
+    async def _demote(self, on_demoted: Callable[[], Awaitable[None]]):
+        self.is_leader = False
+        self.elected_at = None
+        self.transitions += 1
+        logger.warning(f"🔻 [{self.name}] Instancia deja de ser líder")
+        try:
+            await on_demoted()
+        except Exception as e:
+            logger.error(f"❌ [{self.name}] Error deteniendo servicios al perder el liderazgo: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "lock_id": self.lock_id,
+            "is_leader": self.is_leader,
+            "elected_at": self.elected_at.isoformat() if self.elected_at else None,
+            "transitions": self.transitions,
+            "check_interval_seconds": self.check_interval,
+            "backend": "postgres" if _is_postgres else "local",
+        }
@@ -0,0 +1,165 @@
+# backend/app/core/loop_watchdog.py
+# Watchdog del event loop: detecta bloqueos (requests, psutil, ORM síncrono...) y captura
+# desde un hilo aparte el stack de lo que tenía el loop ocupado.
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+LOOP_WATCHDOG_THRESHOLD_MS = float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "250"))
+
+# Raíz del paquete app: el primer frame de aquí dentro es "nuestro" punto de llamada
+_APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+event_loop_blocked_total = registry.register(Counter(
+    "botu_event_loop_blocked_total", "Bloqueos del event loop por encima del umbral del watchdog"))
+
+class LoopWatchdog:
+    """
+    Una corutina actualiza un latido cada `interval` segundos. Un hilo daemon revisa el latido:
+    si lleva más de `threshold` sin avanzar, toma el frame actual del hilo del loop
+    (sys._current_frames) y lo agrupa por punto de llamada para el ranking de peores bloqueos.
+    """
+
+    def __init__(self, threshold: float = LOOP_WATCHDOG_THRESHOLD_MS / 1000, interval: float = 0.05, max_recent: int = 50):
+        self.threshold = threshold
+        self.interval = interval
+        self._last_beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._lock = threading.Lock()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._offenders: Dict[str, Dict[str, Any]] = {}
+        self._recent: deque = deque(maxlen=max_recent)
+        self.total_stalls = 0
+        self.max_lag = 0.0
+
+    # --------------------------
+    # Ciclo de vida
+    # --------------------------
+
+    def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"✅ Loop watchdog activo (umbral {self.threshold * 1000:.0f} ms)")
+
+    async def stop(self):
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    # --------------------------
+    # Latido (en el loop) y vigilancia (en el hilo)
+    # --------------------------
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - self._last_beat - self.interval)
+            with self._lock:
+                self._last_beat = now
+                self.max_lag = max(self.max_lag, lag)
+                if self._pending is not None:
+                    self._finish_stall(self._pending, lag)
+                    self._pending = None
+
+    def _watch(self):
+        while not self._stop_event.wait(self.interval / 2):
+            with self._lock:
+                stalled_for = time.monotonic() - self._last_beat - self.interval
+                if stalled_for < self.threshold or self._pending is not None:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            with self._lock:
+                self._pending = {
+                    "detected_at": datetime.now().isoformat(),
+                    "call_site": self._call_site(stack),
+                    "stack": [f"{f.filename}:{f.lineno} in {f.name}" for f in stack[-15:]],
+                }
+
+    @staticmethod
+    def _call_site(stack: traceback.StackSummary) -> str:
+        """Último frame propio (app/...) + función en la que estaba realmente bloqueado"""
+        leaf = stack[-1]
+        own = next((f for f in reversed(stack) if f.filename.startswith(_APP_ROOT)), None)
+        leaf_desc = f"{os.path.basename(leaf.filename)}:{leaf.name}"
+        if own is None or own is leaf:
+            return f"{os.path.relpath(leaf.filename, os.path.dirname(_APP_ROOT))}:{leaf.lineno} in {leaf.name}"
+        own_desc = f"{os.path.relpath(own.filename, os.path.dirname(_APP_ROOT))}:{own.lineno} in {own.name}"
+        return f"{own_desc} -> {leaf_desc}"
+
+    def _finish_stall(self, stall: Dict[str, Any], lag: float):
+        """Se llama con el lock tomado cuando el loop vuelve a latir"""
+        stall["blocked_ms"] = round(lag * 1000, 1)
+        self.total_stalls += 1
+        event_loop_blocked_total.inc()
+        self._recent.append(stall)
+
+        entry = self._offenders.setdefault(stall["call_site"], {
+            "call_site": stall["call_site"], "count": 0, "total_ms": 0.0, "max_ms": 0.0, "stack": stall["stack"]
+        })
+        entry["count"] += 1
+        entry["total_ms"] = round(entry["total_ms"] + stall["blocked_ms"], 1)
+        if stall["blocked_ms"] >= entry["max_ms"]:
+            entry["max_ms"] = stall["blocked_ms"]
+            entry["stack"] = stall["stack"]
+        entry["last_seen"] = stall["detected_at"]
+        logger.warning(f"⚠️ Event loop bloqueado {stall['blocked_ms']} ms en {stall['call_site']}")
+
+    # --------------------------
+    # Consulta
+    # --------------------------
+
+    def get_report(self, limit: int = 10) -> Dict[str, Any]:
+        """Peores puntos de bloqueo ordenados por tiempo total bloqueado"""
+        with self._lock:
+            offenders = sorted(self._offenders.values(), key=lambda o: o["total_ms"], reverse=True)[:limit]
+            return {
+                "running": self._task is not None and not self._task.done(),
+                "threshold_ms": self.threshold * 1000,
+                "total_stalls": self.total_stalls,
+                "max_lag_ms": round(self.max_lag * 1000, 1),
+                "worst_offenders": [dict(o) for o in offenders],
+                "recent": list(self._recent)[-limit:],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._offenders.clear()
+            self._recent.clear()
+            self.total_stalls = 0
+            self.max_lag = 0.0
+
+# Instancia global
+loop_watchdog = LoopWatchdog()
@@ -0,0 +1,217 @@
+# backend/app/core/metrics.py
+# Registro de métricas en memoria con exposición en formato texto de Prometheus (sin dependencias externas)
+
+import asyncio
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labels: Tuple[Tuple[str, str], ...], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+        return tuple((name, str(labels.get(name, ""))) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+class Gauge(_Metric):
+    metric_type = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self.header() + [f"{self.name}{_format_labels(k)} {_format_value(v)}" for k, v in items]
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._series: Dict[Tuple, Dict] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+                self._series[key] = series
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series["counts"][i] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Mide la duración del bloque en segundos (también si lanza excepción)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(k, {"counts": list(s["counts"]), "sum": s["sum"], "count": s["count"]}) for k, s in self._series.items()]
+        lines = self.header()
+        for key, series in items:
+            for bound, count in zip(self.buckets, series["counts"]):
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {series['count']}")
+        return lines
+
+class MetricsRegistry:
+    """Colección de métricas + callbacks que actualizan gauges justo antes de exponerlas"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], None]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self._collectors:
+            try:
+                collector()
+            except Exception as e:
+                logger.warning(f"⚠️ Error en collector de métricas: {e}")
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+# Instancia global
+registry = MetricsRegistry()
+
+# --------------------------
+# Métricas de la aplicación
+# --------------------------
+
+scan_cycle_seconds = registry.register(Histogram(
+    "botu_scan_cycle_seconds", "Duración de un ciclo de escaneo", ["scanner"]))
+kline_fetch_seconds = registry.register(Histogram(
+    "botu_kline_fetch_seconds", "Latencia de descarga de velas de Binance", ["symbol", "interval"]))
+signal_to_order_seconds = registry.register(Histogram(
+    "botu_signal_to_order_seconds", "Tiempo desde la detección de la señal hasta la orden ejecutada", ["scanner"]))
+order_rtt_seconds = registry.register(Histogram(
+    "botu_order_rtt_seconds", "Round-trip de órdenes enviadas a Binance", ["symbol", "side", "outcome"]))
+reconcile_seconds = registry.register(Histogram(
+    "botu_reconcile_seconds", "Duración de la reconciliación con Binance", ["strategy"]))
+telegram_send_seconds = registry.register(Histogram(
+    "botu_telegram_send_seconds", "Latencia de envío de mensajes a Telegram", ["outcome"]))
+telegram_rate_limited_total = registry.register(Counter(
+    "botu_telegram_rate_limited_total", "Respuestas 429 de la API de Telegram"))
+event_loop_lag_seconds = registry.register(Histogram(
+    "botu_event_loop_lag_seconds", "Retraso del event loop respecto a un sleep programado",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)))
+db_pool_connections = registry.register(Gauge(
+    "botu_db_pool_connections", "Conexiones del pool de DB por estado", ["state"]))
+db_pool_utilization = registry.register(Gauge(
+    "botu_db_pool_utilization", "Fracción de la capacidad del pool de DB en uso"))
+
+def _collect_db_pool():
+    from app.db.database import get_pool_status
+    pool = get_pool_status()
+    for state in ("checkedout", "checkedin", "overflow"):
+        if state in pool:
+            db_pool_connections.set(pool[state], state=state)
+    if pool.get("utilization") is not None:
+        db_pool_utilization.set(pool["utilization"])
+
+registry.add_collector(_collect_db_pool)
+
+# --------------------------
+# Sonda de lag del event loop
+# --------------------------
+
+class EventLoopLagProbe:
+    """Programa un sleep corto y registra cuánto tarda de más el loop en despertar"""
+
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self.last_lag: float = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - start - self.interval)
+            event_loop_lag_seconds.observe(self.last_lag)
+
+event_loop_lag_probe = EventLoopLagProbe()
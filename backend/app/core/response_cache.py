@@ -0,0 +1,132 @@
+# backend/app/core/response_cache.py
+# Cache de respuestas para endpoints de polling (status/config/performance/positions)
+# con invalidación por versión y GET condicional (ETag / 304 Not Modified).
+
+import hashlib
+import inspect
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+class ResponseCache:
+    """
+    Entradas indexadas por (ruta, usuario). Cada entrada guarda la versión del
+    namespace (scanner) con la que se construyó: cuando el scanner cambia de estado
+    llama a bump(namespace) y la siguiente petición reconstruye la respuesta.
+    El TTL es solo una red de seguridad para datos que cambian fuera del scanner.
+    """
+
+    def __init__(self, default_ttl: float = 30.0, max_entries: int = 2000):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._versions: Dict[str, int] = {}
+        self._entries: "OrderedDict[Tuple[str, Any], Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    # --------------------------
+    # Versiones por namespace
+    # --------------------------
+
+    def bump(self, namespace: str):
+        """Marca como obsoletas todas las respuestas del namespace"""
+        with self._lock:
+            self._versions[namespace] = self._versions.get(namespace, 0) + 1
+
+    def get_version(self, namespace: str) -> int:
+        with self._lock:
+            return self._versions.get(namespace, 0)
+
+    # --------------------------
+    # Entradas
+    # --------------------------
+
+    @staticmethod
+    def _make_etag(payload: Any) -> str:
+        body = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+        return '"' + hashlib.sha1(body.encode("utf-8")).hexdigest() + '"'
+
+    def _get(self, key: Tuple[str, Any], version: int) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["version"] != version or time.time() > entry["expires_at"]:
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def _set(self, key: Tuple[str, Any], version: int, payload: Any, ttl: float) -> Dict:
+        entry = {
+            "version": version,
+            "payload": payload,
+            "etag": self._make_etag(payload),
+            "expires_at": time.time() + ttl,
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate_user(self, user_id: Any):
+        """Elimina las respuestas cacheadas de un usuario"""
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == user_id]:
+                self._entries.pop(key, None)
+
+    async def respond(
+        self,
+        request: Request,
+        namespace: str,
+        user_id: Any,
+        builder: Callable[[], Any],
+        ttl: Optional[float] = None,
+    ) -> Response:
+        """
+        Devuelve la respuesta cacheada (o 304 si el cliente ya la tiene).
+        `builder` puede ser una función normal o una corutina que devuelve el payload.
+        """
+        key = (request.url.path, user_id)
+        version = self.get_version(namespace)
+        entry = self._get(key, version)
+
+        if entry is None:
+            self.misses += 1
+            payload = builder()
+            if inspect.isawaitable(payload):
+                payload = await payload
+            entry = self._set(key, version, jsonable_encoder(payload), ttl or self.default_ttl)
+        else:
+            self.hits += 1
+
+        headers = {"ETag": entry["etag"], "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and entry["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        return JSONResponse(content=entry["payload"], headers=headers)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "namespaces": dict(self._versions),
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+# Instancia global
+response_cache = ResponseCache()
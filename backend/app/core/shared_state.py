@@ -0,0 +1,189 @@
+# backend/app/core/shared_state.py
+# Invalidación de cachés en memoria entre procesos (workers de la API + app.worker).
+# Cada commit que inserta/modifica/borra un modelo rastreado incrementa la versión de su nombre
+# en la tabla shared_versions; cada proceso lee todas las versiones con UNA query cada
+# SHARED_STATE_POLL_SECONDS y ejecuta (en un hilo) los handlers registrados con watch()
+# para los nombres que cambiaron.
+
+import asyncio
+import itertools
+import logging
+import os
+import time
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.core.metrics import registry, Counter
+from app.db import models
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+SHARED_STATE_POLL_SECONDS = float(os.getenv("SHARED_STATE_POLL_SECONDS", "2"))
+
+# Modelo -> versión que se incrementa al hacer commit de cambios en él
+TRACKED_MODELS = {
+    models.PositionLot: "position_lots",
+    models.StrategySubscription: "subscriptions",
+    models.TradingApiKey: "subscriptions",
+    models.User: "users",
+    models.RevokedToken: "revoked_tokens",
+}
+
+_BUMP_SQL = text(
+    "INSERT INTO shared_versions (name, version, updated_at) VALUES (:name, 1, CURRENT_TIMESTAMP) "
+    "ON CONFLICT (name) DO UPDATE SET version = shared_versions.version + 1, updated_at = CURRENT_TIMESTAMP"
+)
+_PENDING_KEY = "shared_state_pending"
+
+shared_state_reloads_total = registry.register(Counter(
+    "botu_shared_state_reloads_total", "Recargas de cachés en memoria por cambios de otro proceso (o TTL)", ["name"]))
+
+class _Watcher:
+    __slots__ = ("name", "handler", "max_age", "version", "ran_at")
+
+    def __init__(self, name: str, handler: Callable[[], None], max_age: Optional[float]):
+        self.name = name
+        self.handler = handler
+        self.max_age = max_age
+        self.version: Optional[int] = None
+        self.ran_at = 0.0
+
+class SharedState:
+    """
+    Versiones por nombre en Postgres. Un handler se ejecuta cuando su versión cambia, en la
+    primera lectura (carga inicial) y, si tiene max_age, cuando pasó ese tiempo sin ejecutarse
+    (red de seguridad ante cambios hechos fuera del ORM).
+    """
+
+    def __init__(self, poll_seconds: float = SHARED_STATE_POLL_SECONDS):
+        self.poll_seconds = poll_seconds
+        self._watchers: List[_Watcher] = []
+        self._versions: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._sync_lock: Optional[asyncio.Lock] = None
+        self.last_poll_at: Optional[float] = None
+        self.errors = 0
+
+    # --------------------------
+    # Registro y escritura
+    # --------------------------
+
+    def watch(self, name: str, handler: Callable[[], None], max_age: Optional[float] = None):
+        """Registra un handler síncrono (se ejecuta con asyncio.to_thread) para la versión `name`"""
+        self._watchers.append(_Watcher(name, handler, max_age))
+
+    def bump(self, *names: str):
+        """Incrementa versiones fuera de un commit del ORM (escrituras con SQL directo)"""
+        try:
+            with engine.begin() as conn:
+                # Orden fijo: dos commits concurrentes no se bloquean en orden cruzado
+                for name in sorted(set(names)):
+                    conn.execute(_BUMP_SQL, {"name": name})
+        except Exception as e:
+            logger.error(f"❌ No se pudo publicar el cambio de {', '.join(names)}: {e}")
+
+    # --------------------------
+    # Lectura
+    # --------------------------
+
+    def _read_versions(self) -> Dict[str, int]:
+        with engine.connect() as conn:
+            return {name: version for name, version in conn.execute(text("SELECT name, version FROM shared_versions"))}
+
+    async def sync(self):
+        """
+        Lee las versiones ahora y recarga lo que cambió. La llaman el bucle periódico y quien
+        necesite el estado al día antes de actuar (ej. el executor antes de enviar órdenes).
+        """
+        if self._sync_lock is None:
+            self._sync_lock = asyncio.Lock()
+        async with self._sync_lock:
+            try:
+                self._versions = await asyncio.to_thread(self._read_versions)
+                self.last_poll_at = time.time()
+            except Exception as e:
+                # Sin DB se sigue con las cachés actuales (y sus TTL)
+                self.errors += 1
+                logger.error(f"❌ Error leyendo shared_versions: {e}")
+                return
+            now = time.time()
+            for watcher in self._watchers:
+                version = self._versions.get(watcher.name, 0)
+                expired = watcher.max_age is not None and now - watcher.ran_at > watcher.max_age
+                if watcher.ran_at and version == watcher.version and not expired:
+                    continue
+                try:
+                    await asyncio.to_thread(watcher.handler)
+                    watcher.version = version
+                    watcher.ran_at = time.time()
+                    shared_state_reloads_total.inc(name=watcher.name)
+                except Exception as e:
+                    # Se reintenta en la próxima lectura
+                    self.errors += 1
+                    logger.error(f"❌ Error recargando {watcher.name}: {e}")
+
+    async def _poll_loop(self):
+        while True:
+            await self.sync()
+            await asyncio.sleep(self.poll_seconds)
+
+    # --------------------------
+    # Ciclo de vida
+    # --------------------------
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._poll_loop())
+            logger.info(f"✅ Shared state: versiones cada {self.poll_seconds}s ({len(self._watchers)} cachés)")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_status(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "poll_seconds": self.poll_seconds,
+            "last_poll_age_seconds": round(time.time() - self.last_poll_at, 1) if self.last_poll_at else None,
+            "versions": dict(self._versions),
+            "watchers": [
+                {"name": w.name, "version": w.version, "age_seconds": round(time.time() - w.ran_at, 1) if w.ran_at else None}
+                for w in self._watchers
+            ],
+            "errors": self.errors,
+        }
+
+# Instancia global
+shared_state = SharedState()
+
+# --------------------------
+# Versiones desde los commits del ORM
+# --------------------------
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    # En after_flush new/dirty/deleted siguen reflejando lo que se acaba de escribir
+    pending = session.info.setdefault(_PENDING_KEY, set())
+    for obj in itertools.chain(session.new, session.dirty, session.deleted):
+        name = TRACKED_MODELS.get(type(obj))
+        if name:
+            pending.add(name)
+
+@event.listens_for(Session, "after_commit")
+def _publish_changes(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending:
+        # Fuera de la transacción del commit: no retiene el lock de la fila mientras dura
+        shared_state.bump(*pending)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_PENDING_KEY, None)
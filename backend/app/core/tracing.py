@@ -0,0 +1,199 @@
+# backend/app/core/tracing.py
+# Trazas ligeras compatibles con OpenTelemetry (mismo modelo trace/span y export OTLP/JSON por líneas).
+# Sin dependencias: el contexto viaja en contextvars, así que sobrevive a await y asyncio.to_thread.
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Archivo de export (una línea JSON por span). Vacío (por defecto) = no exportar.
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+# Rotación del archivo: tamaño máximo y cantidad de archivos anteriores (.1, .2, ...)
+TRACE_EXPORT_MAX_BYTES = int(os.getenv("TRACE_EXPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_EXPORT_BACKUPS = int(os.getenv("TRACE_EXPORT_BACKUPS", "3"))
+# Spans pendientes de escribir; con la cola llena se descartan (nunca se frena al que traza)
+TRACE_EXPORT_QUEUE_SIZE = int(os.getenv("TRACE_EXPORT_QUEUE_SIZE", "10000"))
+SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "botu-backend")
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("current_span", default=None)
+
+def _attr_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+class Span:
+    """Un span: operación con inicio/fin dentro de una traza"""
+
+    def __init__(self, name: str, trace_id: str, parent_span_id: Optional[str], attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent_span_id
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.events: List[Dict[str, Any]] = []
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status_code = "STATUS_CODE_UNSET"
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes):
+        self.events.append({"name": name, "timeUnixNano": str(time.time_ns()), "attributes": attributes})
+
+    def record_exception(self, exc: BaseException):
+        self.status_code = "STATUS_CODE_ERROR"
+        self.status_message = str(exc)
+        self.add_event("exception", **{"exception.type": type(exc).__name__, "exception.message": str(exc)})
+
+    @property
+    def duration_ms(self) -> Optional[float]:
+        return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": "SPAN_KIND_INTERNAL",
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or time.time_ns()),
+            "attributes": [{"key": k, "value": _attr_value(v)} for k, v in self.attributes.items()],
+            "events": [
+                {
+                    "name": e["name"],
+                    "timeUnixNano": e["timeUnixNano"],
+                    "attributes": [{"key": k, "value": _attr_value(v)} for k, v in e["attributes"].items()],
+                }
+                for e in self.events
+            ],
+            "status": {"code": self.status_code, "message": self.status_message},
+            "resource": {"service.name": SERVICE_NAME},
+        }
+
+class FileSpanExporter:
+    """
+    Escribe cada span terminado como una línea JSON (stand-in de un collector OTLP). export() solo
+    encola: un hilo aparte escribe por lotes y rota el archivo al superar max_bytes, así el event
+    loop nunca hace I/O de disco por un span.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = TRACE_EXPORT_MAX_BYTES,
+        backups: int = TRACE_EXPORT_BACKUPS,
+        queue_size: int = TRACE_EXPORT_QUEUE_SIZE,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.dropped = 0
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < 500:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                lines = "".join(json.dumps(span.to_otlp(), default=str) + "\n" for span in batch)
+                self._rotate_if_needed()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(lines)
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudieron exportar {len(batch)} spans: {e}")
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+        for i in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+class Tracer:
+    def __init__(self, exporter: Optional[FileSpanExporter] = None):
+        self.exporter = exporter
+
+    @contextmanager
+    def start_span(self, name: str, **attributes):
+        """Abre un span hijo del span actual (o raíz de una traza nueva)"""
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.record_exception(exc)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            if span.status_code == "STATUS_CODE_UNSET":
+                span.status_code = "STATUS_CODE_OK"
+            _current_span.reset(token)
+            if self.exporter:
+                self.exporter.export(span)
+
+# Instancia global
+tracer = Tracer(FileSpanExporter(TRACE_EXPORT_FILE) if TRACE_EXPORT_FILE else None)
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+def traced(name: str):
+    """Decorador: ejecuta la función (sync o async) dentro de un span con ese nombre"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.start_span(name, **{"code.function": func.__qualname__}):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.start_span(name, **{"code.function": func.__qualname__}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,86 @@
+# app/db/async_database.py
+# Capa de acceso asíncrona (AsyncSession + asyncpg) para las rutas de lectura más usadas.
+# La capa síncrona de app/db/database.py se mantiene para scripts, servicios y escrituras.
+
+from contextlib import asynccontextmanager
+import logging
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.database import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_RECYCLE,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUT,
+    DB_STATEMENT_TIMEOUT_MS,
+)
+
+logger = logging.getLogger(__name__)
+
+def _to_async_url(url: str) -> str:
+    """Convierte la URL síncrona (psycopg2) a su equivalente asyncpg"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+ASYNC_DATABASE_URL = _to_async_url(DATABASE_URL)
+
+# ✅ Engine asíncrono (pool propio, mismos límites que el engine síncrono)
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    connect_args={"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}},
+)
+
+# ✅ Sesiones asíncronas (expire_on_commit=False para poder leer atributos tras el commit)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# ✅ Dependency para rutas FastAPI
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# ✅ Sesión con liberación garantizada (para servicios en background)
+@asynccontextmanager
+async def async_session_scope():
+    """
+    Equivalente asíncrono de session_scope(): rollback si hay excepción y cierre siempre.
+
+        async with async_session_scope() as db:
+            result = await db.execute(select(...))
+    """
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
+
+def get_async_pool_status() -> dict:
+    """Estado del pool asíncrono (para health/metrics)"""
+    pool = async_engine.pool
+    status = {"pool_class": pool.__class__.__name__}
+    for attr in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, attr, None)
+        if callable(fn):
+            status[attr] = fn()
+    return status
+
+async def dispose_async_engine():
+    """Cierra las conexiones del pool asíncrono (shutdown de la app)"""
+    try:
+        await async_engine.dispose()
+        logger.info("✅ Pool asíncrono de DB cerrado")
+    except Exception as e:
+        logger.error(f"❌ Error cerrando pool asíncrono de DB: {e}")
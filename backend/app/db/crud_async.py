@@ -0,0 +1,231 @@
+# backend/app/db/crud_async.py
+# Consultas de solo lectura sobre AsyncSession para las rutas calientes (posiciones, historial, órdenes, estado).
+# Las escrituras siguen pasando por crud_trading (sesión síncrona).
+
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.db.crud_trading import order_with_api_info_to_dict
+from app.db.models import TradingApiKey, TradingOrder
+
+MAINNET_SYMBOLS = ['BTCUSDT', 'ETHUSDT', 'BNBUSDT', 'PAXGUSDT']
+SYSTEM_REASONS = ['U_PATTERN', 'MANUAL_TRADE', 'EXTERNAL_SELL']
+
+# --------------------------
+# API Keys
+# --------------------------
+
+async def get_user_trading_api_keys(db: AsyncSession, user_id: int) -> List[TradingApiKey]:
+    """Obtiene todas las API keys de trading de un usuario"""
+    result = await db.execute(select(TradingApiKey).where(TradingApiKey.user_id == user_id))
+    return list(result.scalars().all())
+
+async def get_active_mainnet_api_key_ids(db: AsyncSession, user_id: int) -> List[int]:
+    """IDs de las API keys mainnet activas del usuario"""
+    result = await db.execute(
+        select(TradingApiKey.id).where(
+            TradingApiKey.user_id == user_id,
+            TradingApiKey.is_testnet == False,
+            TradingApiKey.is_active == True
+        ).order_by(TradingApiKey.id)
+    )
+    return list(result.scalars().all())
+
+# --------------------------
+# Posiciones abiertas
+# --------------------------
+
+async def get_open_buy_orders(
+    db: AsyncSession,
+    api_key_ids: Sequence[int],
+    symbols: Sequence[str]
+) -> List[TradingOrder]:
+    """
+    Órdenes BUY FILLED sin una venta FILLED posterior (misma API key y símbolo).
+    Una sola consulta con NOT EXISTS en lugar de una consulta por cada compra.
+    """
+    if not api_key_ids:
+        return []
+
+    sell = aliased(TradingOrder)
+    later_sell = select(sell.id).where(
+        sell.api_key_id == TradingOrder.api_key_id,
+        sell.symbol == TradingOrder.symbol,
+        sell.side == 'SELL',
+        sell.status == 'FILLED',
+        sell.created_at > TradingOrder.created_at
+    ).exists()
+
+    result = await db.execute(
+        select(TradingOrder).where(
+            TradingOrder.api_key_id.in_(api_key_ids),
+            TradingOrder.symbol.in_(symbols),
+            TradingOrder.side == 'BUY',
+            TradingOrder.status == 'FILLED',
+            ~later_sell
+        ).order_by(TradingOrder.api_key_id, TradingOrder.created_at.desc())
+    )
+    return list(result.scalars().all())
+
+async def get_user_open_positions(db: AsyncSession, user_id: int, symbol: str) -> List[Dict]:
+    """Posiciones abiertas mainnet de un símbolo en el formato de las rutas /positions de cada scanner"""
+    api_key_ids = await get_active_mainnet_api_key_ids(db, user_id)
+    buy_orders = await get_open_buy_orders(db, api_key_ids, [symbol])
+
+    positions = []
+    for buy_order in buy_orders:
+        entry_price = buy_order.executed_price or buy_order.price or 0
+        quantity = buy_order.executed_quantity or buy_order.quantity or 0
+        positions.append({
+            'order_id': buy_order.id,
+            'api_key_id': buy_order.api_key_id,
+            'quantity': float(quantity),
+            'entry_price': float(entry_price),
+            'entry_time': buy_order.created_at.isoformat(),
+            'total_usdt': float(quantity * entry_price),
+            'status': 'open',
+            'symbol': buy_order.symbol,
+            'binance_order_id': buy_order.binance_order_id,
+            'order_type': buy_order.order_type,
+            'reason': buy_order.reason
+        })
+    return positions
+
+# --------------------------
+# Historial de órdenes
+# --------------------------
+
+async def get_mainnet_order_history(
+    db: AsyncSession,
+    api_key_ids: Sequence[int],
+    limit: int = 50,
+    offset: int = 0,
+    system_only: bool = False
+) -> Tuple[int, List[Tuple[TradingOrder, Optional[TradingOrder]]]]:
+    """
+    Página del historial mainnet: devuelve (total, [(orden, compra_previa)]).
+    Para cada venta FILLED se resuelve la compra anterior del mismo símbolo
+    con una única consulta adicional (no una por fila).
+    """
+    filters = [
+        TradingOrder.api_key_id.in_(api_key_ids),
+        TradingOrder.symbol.in_(MAINNET_SYMBOLS)
+    ]
+    if system_only:
+        filters.append(TradingOrder.reason.in_(SYSTEM_REASONS))
+
+    total = (await db.execute(
+        select(func.count()).select_from(TradingOrder).where(*filters)
+    )).scalar_one()
+
+    orders = list((await db.execute(
+        select(TradingOrder).where(*filters)
+        .order_by(TradingOrder.created_at.desc())
+        .offset(offset).limit(limit)
+    )).scalars().all())
+
+    # Compra previa de cada venta (subconsulta correlacionada)
+    sells = [o for o in orders if o.side == 'SELL' and o.status == 'FILLED']
+    buys_by_sell: Dict[int, TradingOrder] = {}
+    if sells:
+        sell = aliased(TradingOrder)
+        buy = aliased(TradingOrder)
+        prev_buy_id = select(buy.id).where(
+            buy.api_key_id == sell.api_key_id,
+            buy.symbol == sell.symbol,
+            buy.side == 'BUY',
+            buy.status.in_(['FILLED', 'COMPLETED']),
+            buy.created_at < sell.created_at
+        ).order_by(buy.created_at.desc()).limit(1).scalar_subquery()
+
+        pairs = (await db.execute(
+            select(sell.id, prev_buy_id).where(sell.id.in_([o.id for o in sells]))
+        )).all()
+        buy_ids = {buy_id for _, buy_id in pairs if buy_id is not None}
+        buys = {}
+        if buy_ids:
+            buys = {
+                o.id: o for o in (await db.execute(
+                    select(TradingOrder).where(TradingOrder.id.in_(buy_ids))
+                )).scalars().all()
+            }
+        buys_by_sell = {sell_id: buys[buy_id] for sell_id, buy_id in pairs if buy_id in buys}
+
+    return total, [(o, buys_by_sell.get(o.id)) for o in orders]
+
+async def get_user_trading_orders_with_api_info(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 100,
+    symbol: Optional[str] = None,
+    status: Optional[str] = None,
+    side: Optional[str] = None
+) -> List[dict]:
+    """Versión asíncrona de crud_trading.get_user_trading_orders_with_api_info"""
+    query = select(TradingOrder, TradingApiKey).join(
+        TradingApiKey, TradingOrder.api_key_id == TradingApiKey.id
+    ).where(TradingOrder.user_id == user_id)
+
+    if symbol:
+        query = query.where(TradingOrder.symbol == symbol)
+    if status:
+        query = query.where(TradingOrder.status == status)
+    if side:
+        query = query.where(TradingOrder.side == side)
+
+    rows = (await db.execute(query.order_by(desc(TradingOrder.created_at)).limit(limit))).all()
+    return [order_with_api_info_to_dict(order, api_key) for order, api_key in rows]
+
+# --------------------------
+# Estadísticas
+# --------------------------
+
+async def count_active_positions(db: AsyncSession, user_id: int) -> int:
+    """Número de compras FILLED sin venta FILLED posterior del mismo símbolo"""
+    sell = aliased(TradingOrder)
+    later_sell = select(sell.id).where(
+        sell.user_id == user_id,
+        sell.symbol == TradingOrder.symbol,
+        sell.side == 'SELL',
+        sell.status == 'FILLED',
+        sell.created_at > TradingOrder.created_at
+    ).exists()
+    return (await db.execute(
+        select(func.count()).select_from(TradingOrder).where(
+            and_(
+                TradingOrder.user_id == user_id,
+                TradingOrder.side == 'BUY',
+                TradingOrder.status == 'FILLED',
+                ~later_sell
+            )
+        )
+    )).scalar_one()
+
+async def get_trading_statistics(db: AsyncSession, user_id: int, days: int = 30) -> dict:
+    """Versión asíncrona de crud_trading.get_trading_statistics"""
+    start_date = datetime.now() - timedelta(days=days)
+
+    orders = list((await db.execute(
+        select(TradingOrder).where(
+            TradingOrder.user_id == user_id,
+            TradingOrder.created_at >= start_date,
+            TradingOrder.status == 'FILLED'
+        )
+    )).scalars().all())
+
+    total_trades = len([o for o in orders if o.side == 'SELL'])
+    total_pnl = sum([o.pnl_usdt for o in orders if o.pnl_usdt is not None])
+    winning_trades = len([o for o in orders if o.pnl_usdt and o.pnl_usdt > 0])
+
+    return {
+        'total_orders': len(orders),
+        'total_trades': total_trades,
+        'total_pnl_usdt': total_pnl,
+        'winning_trades': winning_trades,
+        'win_rate': (winning_trades / total_trades * 100) if total_trades > 0 else 0,
+        'active_positions': await count_active_positions(db, user_id)
+    }
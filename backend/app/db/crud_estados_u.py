@@ -1,9 +1,11 @@
 # app/db/crud_estados_u.py
 
+from sqlalchemy import or_
 from sqlalchemy.orm import Session
 from app.db import models
 from app.schemas import estados_u_schema
 from datetime import date
+from typing import List
 
 # Crear o actualizar estado
 def upsert_estado_u(db: Session, estado: estados_u_schema.EstadoUCreate):
@@ -34,6 +36,39 @@ def upsert_estado_u(db: Session, estado: estados_u_schema.EstadoUCreate):
     db.refresh(db_estado)
     return db_estado
 
+# Crear o actualizar varios estados en una sola transacción
+def bulk_upsert_estados_u(db: Session, estados: List[estados_u_schema.EstadoUCreate]) -> int:
+    if not estados:
+        return 0
+
+    tickers = [estado.ticker for estado in estados]
+    existentes = {
+        e.ticker: e for e in db.query(models.EstadoU).filter(models.EstadoU.ticker.in_(tickers)).all()
+    }
+
+    for estado in estados:
+        db_estado = existentes.get(estado.ticker)
+        if db_estado:
+            db_estado.estado_actual = estado.estado_actual
+            db_estado.ultima_fecha_escaneo = estado.ultima_fecha_escaneo
+            db_estado.proxima_fecha_escaneo = estado.proxima_fecha_escaneo
+            db_estado.nivel_ruptura = estado.nivel_ruptura
+            db_estado.slope_left = estado.slope_left
+            db_estado.precio_cierre = estado.precio_cierre
+        else:
+            db.add(models.EstadoU(
+                ticker=estado.ticker,
+                estado_actual=estado.estado_actual,
+                ultima_fecha_escaneo=estado.ultima_fecha_escaneo,
+                proxima_fecha_escaneo=estado.proxima_fecha_escaneo,
+                nivel_ruptura=estado.nivel_ruptura,
+                slope_left=estado.slope_left,
+                precio_cierre=estado.precio_cierre
+            ))
+
+    db.commit()
+    return len(estados)
+
 # Obtener un ticker
 def get_estado_u(db: Session, ticker: str):
     return db.query(models.EstadoU).filter(models.EstadoU.ticker == ticker).first()
@@ -42,6 +77,12 @@ def get_estado_u(db: Session, ticker: str):
 def get_all_estados_u(db: Session, skip: int = 0, limit: int = 1000):
     return db.query(models.EstadoU).offset(skip).limit(limit).all()
 
+# Obtener los estados que toca escanear hoy (sin fecha o con próxima fecha vencida)
+def get_due_estados_u(db: Session, hoy: date):
+    return db.query(models.EstadoU).filter(
+        or_(models.EstadoU.proxima_fecha_escaneo.is_(None), models.EstadoU.proxima_fecha_escaneo <= hoy)
+    ).order_by(models.EstadoU.proxima_fecha_escaneo.asc().nullsfirst()).all()
+
 # Obtener todos los estados con datos de Ticker (para vista EstadosTickersView)
 def get_all_estados_with_tickers(
     db: Session,
@@ -1,20 +1,23 @@
 # backend/app/db/crud_trading.py
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, desc
-from typing import List, Optional
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, desc, func
+from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import hashlib
+import logging
 import os
 from cryptography.fernet import Fernet
 
-from app.db.models import TradingApiKey, TradingOrder, User
+from app.db.models import PositionLot, TradingApiKey, TradingOrder, User
 from app.schemas.trading_schema import (
     TradingApiKeyCreate, 
     TradingApiKeyUpdate,
     TradingOrderCreate
 )
 
+logger = logging.getLogger(__name__)
+
 # Clave de encriptación (en producción, debe estar en variables de entorno)
 # Usar una clave fija para desarrollo - en producción debe ser una variable de entorno
 ENCRYPTION_KEY = os.getenv('API_KEY_ENCRYPTION_KEY', b'jIWONSuNd7kne20HKEFHCDpKDtblLCaeQKrKTOba6M0=')
@@ -368,6 +371,67 @@ def cancel_trading_order(db: Session, order_id: int, user_id: int) -> bool:
         logger.error(f"Error cancelando orden {order_id}: {e}")
         return False
 
+# --------------------------
+# Posiciones abiertas (position_lots)
+# --------------------------
+
+def get_open_positions_by_strategy(db: Session, strategy_ids: Optional[List[str]] = None) -> Dict[str, Dict[int, int]]:
+    """
+    Qué estrategias tienen posiciones abiertas y en qué API keys, en UNA query agrupada:
+    {strategy_id: {api_key_id: lotes abiertos}}
+    """
+    query = db.query(
+        PositionLot.strategy_id, PositionLot.api_key_id, func.count(PositionLot.id)
+    ).filter(PositionLot.status == 'OPEN')
+    if strategy_ids:
+        query = query.filter(PositionLot.strategy_id.in_(strategy_ids))
+
+    open_positions: Dict[str, Dict[int, int]] = {}
+    for strategy_id, api_key_id, count in query.group_by(PositionLot.strategy_id, PositionLot.api_key_id).all():
+        open_positions.setdefault(strategy_id, {})[api_key_id] = int(count)
+    return open_positions
+
+def get_open_position_lots(db: Session, strategy_id: str, api_key_ids: Optional[List[int]] = None) -> List[PositionLot]:
+    """Lotes abiertos de una estrategia (opcionalmente solo de ciertas API keys), del más antiguo al más nuevo"""
+    query = db.query(PositionLot).filter(
+        PositionLot.strategy_id == strategy_id,
+        PositionLot.status == 'OPEN'
+    )
+    if api_key_ids is not None:
+        query = query.filter(PositionLot.api_key_id.in_(api_key_ids))
+    return query.options(selectinload(PositionLot.orders)).order_by(PositionLot.opened_at).all()
+
+def order_with_api_info_to_dict(order: TradingOrder, api_key: TradingApiKey) -> dict:
+    """Serializa una orden junto con la información de su API key (testnet/mainnet)"""
+    return {
+        "id": order.id,
+        "user_id": order.user_id,
+        "api_key_id": order.api_key_id,
+        "alerta_id": order.alerta_id,
+        "symbol": order.symbol,
+        "side": order.side,
+        "order_type": order.order_type,
+        "quantity": order.quantity,
+        "price": order.price,
+        "executed_price": order.executed_price,
+        "executed_quantity": order.executed_quantity,
+        "status": order.status,
+        "binance_order_id": order.binance_order_id,
+        "binance_client_order_id": order.binance_client_order_id,
+        "take_profit_price": order.take_profit_price,
+        "stop_loss_price": order.stop_loss_price,
+        "created_at": order.created_at,
+        "executed_at": order.executed_at,
+        "pnl_usdt": order.pnl_usdt,
+        "pnl_percentage": order.pnl_percentage,
+        "commission": order.commission,
+        "commission_asset": order.commission_asset,
+        "reason": order.reason,
+        # Información de la API key
+        "is_testnet": api_key.is_testnet,
+        "exchange": api_key.exchange
+    }
+
 def get_user_trading_orders_with_api_info(
     db: Session, 
     user_id: int, 
@@ -391,45 +455,14 @@ def get_user_trading_orders_with_api_info(
     orders = query.order_by(desc(TradingOrder.created_at)).limit(limit).all()
     
     # Construir respuesta con información adicional
-    result = []
-    for order, api_key in orders:
-        order_dict = {
-            "id": order.id,
-            "user_id": order.user_id,
-            "api_key_id": order.api_key_id,
-            "alerta_id": order.alerta_id,
-            "symbol": order.symbol,
-            "side": order.side,
-            "order_type": order.order_type,
-            "quantity": order.quantity,
-            "price": order.price,
-            "executed_price": order.executed_price,
-            "executed_quantity": order.executed_quantity,
-            "status": order.status,
-            "binance_order_id": order.binance_order_id,
-            "binance_client_order_id": order.binance_client_order_id,
-            "take_profit_price": order.take_profit_price,
-            "stop_loss_price": order.stop_loss_price,
-            "created_at": order.created_at,
-            "executed_at": order.executed_at,
-            "pnl_usdt": order.pnl_usdt,
-            "pnl_percentage": order.pnl_percentage,
-            "commission": order.commission,
-            "commission_asset": order.commission_asset,
-            "reason": order.reason,
-            # Información de la API key
-            "is_testnet": api_key.is_testnet,
-            "exchange": api_key.exchange
-        }
-        result.append(order_dict)
-    
-    return result
+    return [order_with_api_info_to_dict(order, api_key) for order, api_key in orders]
 
 def get_user_portfolio_summary(db: Session, user_id: int) -> dict:
     """Obtiene resumen completo del portfolio del usuario con datos reales de Binance"""
     try:
         # Obtener todas las API keys del usuario
         api_keys = get_user_trading_api_keys(db, user_id)
+        api_keys_by_id = {k.id: k for k in api_keys}
         
         portfolio_summary = {
             "total_balance_usdt": 0.0,
@@ -461,86 +494,51 @@ def get_user_portfolio_summary(db: Session, user_id: int) -> dict:
             }
         }
         
+        from app.services.portfolio_cache_service import portfolio_cache
+        
         for api_key in api_keys:
             try:
-                # Obtener balances reales de Binance
-                credentials = get_decrypted_api_credentials(db, api_key.id)
-                if not credentials:
+                # Balances desde cache (solo la primera consulta de la key va a Binance)
+                def _load_credentials(api_key=api_key):
+                    credentials = get_decrypted_api_credentials(db, api_key.id)
+                    if not credentials:
+                        return None
+                    return credentials[0], credentials[1], api_key.is_testnet
+                
+                balances = portfolio_cache.get_balances_for_key(api_key.id, _load_credentials)
+                if not balances:
                     continue
-                    
-                from trading_core.binance_client import BinanceClient
-                api_key_str, secret_key = credentials
-                client = BinanceClient(api_key_str, secret_key, testnet=api_key.is_testnet)
                 
-                success, account_info = client.test_connection()
-                if success and isinstance(account_info, dict):
-                    balances = account_info.get('balances', [])
-                    
-                    # Cache simple de precios en USDT para minimizar llamadas
-                    price_cache = {}
-                    import requests
-                    
-                    # Calcular balance total en USDT (mejora incremental: sumar también BTC/BNB/otros con conversión spot)
-                    for balance in balances:
-                        asset = balance.get('asset', '')
-                        if not asset:
-                            continue
-                        free = float(balance.get('free', 0))
-                        locked = float(balance.get('locked', 0))
-                        total_amount = free + locked
-                        if total_amount <= 0:
-                            continue
-                        env_key = "testnet" if api_key.is_testnet else "mainnet"
-                        if asset == 'USDT':
-                            portfolio_summary["by_environment"][env_key]["balance_usdt"] += total_amount
-                            portfolio_summary["total_balance_usdt"] += total_amount
-                            portfolio_summary["available_balance_usdt"] += free
-                            portfolio_summary["locked_balance_usdt"] += locked
-                        else:
-                            # Intentar convertir a USDT con ticker directo; si no existe, intentar vía BTC
-                            usdt_value = 0.0
-                            try:
-                                symbol_direct = f"{asset}USDT"
-                                if symbol_direct not in price_cache:
-                                    r = requests.get("https://api.binance.com/api/v3/ticker/price", params={"symbol": symbol_direct}, timeout=5)
-                                    if r.status_code == 200:
-                                        price_cache[symbol_direct] = float(r.json().get('price', 0))
-                                    else:
-                                        price_cache[symbol_direct] = 0.0
-                                price = price_cache.get(symbol_direct, 0.0)
-                                if price and price > 0:
-                                    usdt_value = total_amount * price
-                                else:
-                                    # Fallback vía BTC si hay par contra BTC
-                                    symbol_btc = f"{asset}BTC"
-                                    if symbol_btc not in price_cache:
-                                        r2 = requests.get("https://api.binance.com/api/v3/ticker/price", params={"symbol": symbol_btc}, timeout=5)
-                                        if r2.status_code == 200:
-                                            price_cache[symbol_btc] = float(r2.json().get('price', 0))
-                                        else:
-                                            price_cache[symbol_btc] = 0.0
-                                    price_ab = price_cache.get(symbol_btc, 0.0)
-                                    if price_ab and price_ab > 0:
-                                        # Obtener BTCUSDT
-                                        if 'BTCUSDT' not in price_cache:
-                                            r3 = requests.get("https://api.binance.com/api/v3/ticker/price", params={"symbol": "BTCUSDT"}, timeout=5)
-                                            if r3.status_code == 200:
-                                                price_cache['BTCUSDT'] = float(r3.json().get('price', 0))
-                                            else:
-                                                price_cache['BTCUSDT'] = 0.0
-                                        btc_usdt = price_cache.get('BTCUSDT', 0.0)
-                                        if btc_usdt and btc_usdt > 0:
-                                            usdt_value = total_amount * price_ab * btc_usdt
-                            except Exception:
-                                usdt_value = 0.0
-                            if usdt_value > 0:
-                                portfolio_summary["by_environment"][env_key]["balance_usdt"] += usdt_value
-                                portfolio_summary["total_balance_usdt"] += usdt_value
+                env_key = "testnet" if api_key.is_testnet else "mainnet"
+                
+                # Calcular balance total en USDT usando el snapshot compartido de precios
+                for balance in balances:
+                    asset = balance.get('asset', '')
+                    if not asset:
+                        continue
+                    free = float(balance.get('free', 0))
+                    locked = float(balance.get('locked', 0))
+                    total_amount = free + locked
+                    if total_amount <= 0:
+                        continue
+                    if asset == 'USDT':
+                        portfolio_summary["by_environment"][env_key]["balance_usdt"] += total_amount
+                        portfolio_summary["total_balance_usdt"] += total_amount
+                        portfolio_summary["available_balance_usdt"] += free
+                        portfolio_summary["locked_balance_usdt"] += locked
+                    else:
+                        usdt_value = portfolio_cache.prices.to_usdt(asset, total_amount)
+                        if usdt_value > 0:
+                            portfolio_summary["by_environment"][env_key]["balance_usdt"] += usdt_value
+                            portfolio_summary["total_balance_usdt"] += usdt_value
                         
             except Exception as e:
                 logger.warning(f"No se pudo obtener balance para API key {api_key.id}: {e}")
                 continue
         
+        # Balances/precios que el loop de background aún no cargó (se cargan en segundos; el cliente puede reintentar)
+        portfolio_summary["warming_up"] = portfolio_cache.is_warming_up(list(api_keys_by_id))
+        
         # Obtener estadísticas de trading de los últimos 30 días
         orders = db.query(TradingOrder).filter(
             and_(
@@ -555,8 +553,8 @@ def get_user_portfolio_summary(db: Session, user_id: int) -> dict:
                 # Determinar crypto del símbolo
                 crypto = order.symbol.replace('USDT', '') if order.symbol.endswith('USDT') else 'OTHER'
                 
-                # Obtener información de testnet/mainnet
-                order_api_key = get_trading_api_key(db, order.api_key_id, user_id)
+                # Obtener información de testnet/mainnet (keys ya cargadas arriba)
+                order_api_key = api_keys_by_id.get(order.api_key_id)
                 env_key = "testnet" if order_api_key and order_api_key.is_testnet else "mainnet"
                 
                 if order.side == 'SELL' and order.pnl_usdt is not None:
@@ -1,12 +1,17 @@
 # app/db/database.py
 
 from dotenv import load_dotenv
+from contextlib import contextmanager
+import logging
 import os
+import threading
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+logger = logging.getLogger(__name__)
+
 # ✅ Cargar variables del archivo .env
 load_dotenv()
 
@@ -16,8 +21,30 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("❌ DATABASE_URL no configurado. Se requiere PostgreSQL para funcionar.")
 
+# ✅ Parámetros del pool (ajustables por entorno)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))        # segundos esperando una conexión libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # reciclar conexiones cada 30 min
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))  # 15s por sentencia
+
+_is_postgres = DATABASE_URL.startswith("postgres")
+
+_engine_kwargs = {
+    "pool_pre_ping": True,
+}
+if _is_postgres:
+    _engine_kwargs.update({
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        # statement_timeout por sesión: ninguna consulta puede retener una conexión indefinidamente
+        "connect_args": {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"},
+    })
+
 # ✅ Crear engine SQLAlchemy
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **_engine_kwargs)
 
 # ✅ Configurar sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -25,6 +52,81 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # ✅ Base para los modelos ORM
 Base = declarative_base()
 
+# ✅ Métricas de uso del pool
+_pool_stats_lock = threading.Lock()
+_pool_stats = {
+    "checkouts": 0,
+    "checkins": 0,
+    "connects": 0,
+    "invalidated": 0,
+    "max_checked_out": 0,
+}
+_POOL_WARNING_RATIO = 0.8
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    with _pool_stats_lock:
+        _pool_stats["connects"] += 1
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    with _pool_stats_lock:
+        _pool_stats["checkouts"] += 1
+        checked_out = _pool_stats["checkouts"] - _pool_stats["checkins"]
+        if checked_out > _pool_stats["max_checked_out"]:
+            _pool_stats["max_checked_out"] = checked_out
+    if _is_postgres:
+        capacity = DB_POOL_SIZE + DB_MAX_OVERFLOW
+        if capacity and checked_out >= capacity * _POOL_WARNING_RATIO:
+            logger.warning(f"⚠️ Pool DB cerca del límite: {checked_out}/{capacity} conexiones en uso")
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    with _pool_stats_lock:
+        _pool_stats["checkins"] += 1
+
+@event.listens_for(engine, "invalidate")
+def _on_invalidate(dbapi_connection, connection_record, exception):
+    with _pool_stats_lock:
+        _pool_stats["invalidated"] += 1
+
+def get_pool_status() -> dict:
+    """Estado actual del pool de conexiones (para health/metrics)"""
+    pool = engine.pool
+    status = {
+        "pool_class": pool.__class__.__name__,
+        "statement_timeout_ms": DB_STATEMENT_TIMEOUT_MS if _is_postgres else None,
+    }
+    for attr in ("size", "checkedin", "checkedout", "overflow"):
+        fn = getattr(pool, attr, None)
+        if callable(fn):
+            status[attr] = fn()
+    if _is_postgres:
+        status["capacity"] = DB_POOL_SIZE + DB_MAX_OVERFLOW
+        status["utilization"] = round(status.get("checkedout", 0) / status["capacity"], 3) if status["capacity"] else None
+    with _pool_stats_lock:
+        status.update(_pool_stats)
+    return status
+
+# ✅ Sesión con liberación garantizada (para servicios y scripts)
+@contextmanager
+def session_scope():
+    """
+    Context manager de sesión: hace rollback si hay excepción y SIEMPRE cierra la sesión,
+    devolviendo la conexión al pool. Los commits siguen siendo explícitos.
+
+        with session_scope() as db:
+            db.query(...)
+    """
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 # ✅ Dependency para obtener una sesión de DB
 def get_db():
     db = SessionLocal()
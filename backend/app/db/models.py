@@ -1,8 +1,9 @@
 # app/db/models.py
 
-from sqlalchemy import Column, Integer, String, Float, Date, Boolean, ForeignKey, DateTime, func
+from sqlalchemy import Column, Integer, String, Float, Date, Boolean, ForeignKey, DateTime, Index, UniqueConstraint, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
+from app.core.tracing import current_trace_id
 
 # --------------------------
 # Tabla Signal
@@ -299,6 +300,31 @@ class TradingApiKey(Base):
     # Relaciones
     user = relationship("User")
 
+# --------------------------
+# Tabla Strategy Subscriptions (API key ↔ estrategia)
+# --------------------------
+
+class StrategySubscription(Base):
+    __tablename__ = "strategy_subscriptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    api_key_id = Column(Integer, ForeignKey("trading_api_keys.id", ondelete="CASCADE"), nullable=False)
+    strategy_id = Column(String, nullable=False)  # btc_4h, eth_4h, bnb_4h, paxg_4h, btc_30m
+    enabled = Column(Boolean, nullable=False, default=False)
+    allocated_usdt = Column(Float, nullable=False, default=0.0)
+    params = Column(String, nullable=True)  # JSON con overrides por usuario (TP/SL, etc.)
+    created_at = Column(DateTime, default=func.now())
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # Relaciones
+    api_key = relationship("TradingApiKey")
+
+    __table_args__ = (
+        UniqueConstraint("api_key_id", "strategy_id", name="uq_strategy_subscriptions_key_strategy"),
+        # "Todas las keys habilitadas para la estrategia X"
+        Index("ix_strategy_subscriptions_strategy_enabled", "strategy_id", "enabled"),
+    )
+
 # --------------------------
 # Tabla Trading Orders (Órdenes automáticas)
 # --------------------------
@@ -341,12 +367,65 @@ class TradingOrder(Base):
     commission = Column(Float, nullable=True)
     commission_asset = Column(String, nullable=True)
     reason = Column(String, nullable=True)  # Razón del trade: 'U_PATTERN', 'TAKE_PROFIT', 'STOP_LOSS', 'MAX_HOLD'
+    trace_id = Column(String, nullable=True, index=True, default=current_trace_id)  # Traza señal→fill (ver app/core/tracing.py)
+    position_lot_id = Column(Integer, ForeignKey("position_lots.id"), nullable=True, index=True)  # Lote al que pertenece la BUY
     
     # Relaciones
     user = relationship("User")
     api_key = relationship("TradingApiKey")
     alerta = relationship("Alerta")
 
+# --------------------------
+# Tabla Position Lots (posición abierta por orden de Binance)
+# --------------------------
+
+class PositionLot(Base):
+    __tablename__ = "position_lots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    api_key_id = Column(Integer, ForeignKey("trading_api_keys.id"), nullable=False)
+    strategy_id = Column(String, nullable=False)  # btc_4h, eth_4h, bnb_4h, paxg_4h, btc_30m
+    symbol = Column(String, nullable=False)
+    binance_order_id = Column(String, nullable=True)
+
+    # Agregado de todos los fills de la orden
+    quantity = Column(Float, nullable=False)
+    invested_usdt = Column(Float, nullable=False)
+    avg_price = Column(Float, nullable=False)
+    commission = Column(Float, nullable=True)
+    commission_asset = Column(String, nullable=True)
+
+    status = Column(String, nullable=False, default='OPEN')  # OPEN, CLOSED
+    opened_at = Column(DateTime, default=func.now())
+    closed_at = Column(DateTime, nullable=True)
+    close_reason = Column(String, nullable=True)  # TAKE_PROFIT, STOP_LOSS, MAX_HOLD_TIME, EXTERNAL_SELL...
+    # use_alter: trading_orders también referencia a position_lots (ciclo de FKs)
+    sell_order_id = Column(Integer, ForeignKey("trading_orders.id", use_alter=True, name="fk_position_lots_sell_order"), nullable=True)
+
+    # Relaciones
+    api_key = relationship("TradingApiKey")
+    orders = relationship("TradingOrder", foreign_keys=[TradingOrder.position_lot_id], order_by=TradingOrder.id)
+    sell_order = relationship("TradingOrder", foreign_keys=[sell_order_id])
+    fills = relationship("PositionFill", cascade="all, delete-orphan", order_by="PositionFill.id")
+
+    __table_args__ = (
+        # "Lotes abiertos de la estrategia X" (evaluación de ventas)
+        Index("ix_position_lots_strategy_status", "strategy_id", "status"),
+    )
+
+class PositionFill(Base):
+    __tablename__ = "position_fills"
+
+    id = Column(Integer, primary_key=True, index=True)
+    lot_id = Column(Integer, ForeignKey("position_lots.id", ondelete="CASCADE"), nullable=False, index=True)
+    trade_id = Column(String, nullable=True)  # tradeId del fill en Binance
+    quantity = Column(Float, nullable=False)
+    price = Column(Float, nullable=False)
+    commission = Column(Float, nullable=True)
+    commission_asset = Column(String, nullable=True)
+    created_at = Column(DateTime, default=func.now())
+
 # --------------------------
 # Tabla Trading Events (para alertas desacopladas)
 # --------------------------
@@ -379,6 +458,40 @@ class TradingEvent(Base):
     api_key = relationship("TradingApiKey")
     user = relationship("User")
 
+# --------------------------
+# Tabla Scanner Checkpoints (estado de cada scanner para reinicios en caliente)
+# --------------------------
+
+class ScannerCheckpoint(Base):
+    __tablename__ = "scanner_checkpoints"
+
+    scanner_key = Column(String, primary_key=True)  # btc_4h, eth_4h, bnb_4h, paxg_4h, btc_30m
+    state = Column(String, nullable=False)  # JSON: estado, cooldowns, último escaneo, logs
+    desired_running = Column(Boolean, nullable=True)  # Start/stop pedido por la API al worker (NULL = sin pedido)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+# --------------------------
+# Tabla Shared Versions (invalidación de cachés en memoria entre procesos)
+# --------------------------
+
+class SharedVersion(Base):
+    __tablename__ = "shared_versions"
+
+    name = Column(String, primary_key=True)  # position_lots, subscriptions, users, revoked_tokens
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+# --------------------------
+# Tabla Revoked Tokens (logout visible para todos los workers de la API)
+# --------------------------
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, default=func.now())
+
 # --------------------------
 # Tabla Telegram Connections (un solo bot/chat por usuario)
 # --------------------------
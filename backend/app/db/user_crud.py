@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.db import models
 from app.schemas import user_schema
@@ -42,3 +43,11 @@ def log_user_login(db: Session, user_id: int, ip_address: str = None, user_agent
     db.commit()
     db.refresh(login_entry)
     return login_entry
+
+def revoke_token(db: Session, jti: str, exp: float = None):
+    """Registra un token cerrado con logout (lo leen todos los procesos) y purga los ya vencidos"""
+    now = datetime.utcnow()
+    db.query(models.RevokedToken).filter(models.RevokedToken.expires_at < now).delete(synchronize_session=False)
+    expires_at = datetime.utcfromtimestamp(exp) if exp else now + timedelta(days=1)
+    db.merge(models.RevokedToken(jti=jti, expires_at=expires_at))
+    db.commit()
@@ -7,9 +7,10 @@ import asyncio
 import logging
 import os
 from dotenv import load_dotenv
+from app.core.config import settings
 from app.db import models
 from app.db.database import engine
-from app.api.v1 import u_routes, auth_routes, ordenes_routes, alertas_routes, users_routes, bitcoin_bot_routes, telegram_routes, eth_bot_routes, bnb_bot_routes, profile_routes, health_routes, trading_routes, debug_routes, bitcoin30m_scanner_routes, bitcoin30m_mainnet_routes, bnb_mainnet_routes, eth_mainnet_routes, btc_4h_mainnet_routes, paxg_mainnet_routes, mainnet_history_routes, bnb_4h_mainnet_routes, eth_4h_mainnet_routes, paxg_4h_mainnet_routes, migrate_routes
+from app.api.v1 import u_routes, auth_routes, ordenes_routes, alertas_routes, users_routes, bitcoin_bot_routes, telegram_routes, eth_bot_routes, bnb_bot_routes, profile_routes, health_routes, trading_routes, debug_routes, bitcoin30m_scanner_routes, bitcoin30m_mainnet_routes, bnb_mainnet_routes, eth_mainnet_routes, btc_4h_mainnet_routes, paxg_mainnet_routes, mainnet_history_routes, bnb_4h_mainnet_routes, eth_4h_mainnet_routes, paxg_4h_mainnet_routes, migrate_routes, dashboard_routes, metrics_routes
 from app.services.health_monitor_service import health_monitor
 
 # Cargar variables de entorno
@@ -29,23 +30,106 @@ async def lifespan(app: FastAPI):
     try:
         logger.info("🚀 BOTU SERVER STARTING UP...")
         
-        # Lógica antigua de crypto bots eliminada (usamos un solo bot ahora)
+        # Sonda de lag del event loop (métrica botu_event_loop_lag_seconds)
+        from app.core.metrics import event_loop_lag_probe
+        event_loop_lag_probe.start()
+        
+        # Watchdog de bloqueos del event loop (ver /health/loop-blocking)
+        from app.core.loop_watchdog import loop_watchdog
+        loop_watchdog.start()
         
-        # Iniciar Health Monitor automáticamente
-        success = await health_monitor.start_monitoring()
-        if success:
-            logger.info("✅ Health Monitor iniciado automáticamente")
+        # Stream de precios compartido por scanners, executors y rutas
+        try:
+            from app.services.price_oracle import price_oracle
+            await price_oracle.start()
+        except Exception as e:
+            logger.error(f"❌ Error iniciando Price Oracle: {e}")
+
+        # Event bus en proceso: los logs del motor llegan a los scanners por el suscriptor scanner_logs
+        # y las señales a los executor_<estrategia>; sin scanners aquí, la UI recibe los eventos del worker
+        try:
+            from app.core.event_bus import event_bus, LogEntry
+            from app.services.scanner_registry import deliver_log_entry
+            event_bus.subscribe("scanner_logs", [LogEntry], deliver_log_entry)
+            if settings.SCANNERS_IN_API:
+                from app.services.strategy_engine import subscribe_executors
+                subscribe_executors()
+            await event_bus.start()
+            if not settings.SCANNERS_IN_API:
+                from app.services.event_stream import event_stream_listener
+                event_stream_listener.start()
+        except Exception as e:
+            logger.error(f"❌ Error iniciando Event Bus: {e}")
+
+        # Suscripciones API key ↔ estrategia: backfill desde columnas legacy y carga del mapa
+        try:
+            from app.services.strategy_subscriptions import subscription_registry
+            await asyncio.to_thread(subscription_registry.bootstrap)
+        except Exception as e:
+            logger.error(f"❌ Error cargando suscripciones de estrategias: {e}")
+
+        # Cachés en memoria al día con lo que escriben otros procesos (workers de la API, app.worker)
+        try:
+            from app.core.shared_state import shared_state
+            shared_state.start()
+        except Exception as e:
+            logger.error(f"❌ Error iniciando Shared State: {e}")
+
+        # Lógica antigua de crypto bots eliminada (usamos un solo bot ahora)
+
+        # Reinicio en caliente: restaurar checkpoints y relanzar los scanners que estaban corriendo
+        if settings.SCANNERS_IN_API:
+            try:
+                from app.services.scanner_checkpoints import scanner_checkpoints
+                from app.services.scanner_registry import get_mainnet_scanners
+                from app.services.strategy_engine import sync_all_position_lots
+                # BUY sin lote (anteriores a position_lots) -> lotes, antes del primer ciclo
+                await asyncio.to_thread(sync_all_position_lots)
+                were_running = await asyncio.to_thread(scanner_checkpoints.restore_all)
+                scanners = get_mainnet_scanners()
+                for key in were_running:
+                    scanner = scanners[key]["scanner"]
+                    start = getattr(scanner, "start_scanning", None) or scanner.start_scanner
+                    await start()
+                    logger.info(f"♻️ Scanner {scanners[key]['label']} relanzado desde checkpoint")
+                scanner_checkpoints.start()
+            except Exception as e:
+                logger.error(f"❌ Error restaurando checkpoints de scanners: {e}")
+        else:
+            # Los scanners corren en app.worker: status/logs se sirven con sus checkpoints
+            try:
+                from app.services.scanner_checkpoints import scanner_checkpoints
+                await asyncio.to_thread(scanner_checkpoints.mirror_all)
+                scanner_checkpoints.start(mirror=True)
+            except Exception as e:
+                logger.error(f"❌ Error leyendo checkpoints del worker: {e}")
+
+        # Iniciar Health Monitor automáticamente (si los scanners corren aquí y no en app.worker)
+        if settings.SCANNERS_IN_API:
+            success = await health_monitor.start_monitoring()
+            if success:
+                logger.info("✅ Health Monitor iniciado automáticamente")
+            else:
+                logger.error("❌ Error iniciando Health Monitor automáticamente")
         else:
-            logger.error("❌ Error iniciando Health Monitor automáticamente")
+            logger.info("ℹ️ SCANNERS_IN_API=false: scanners, Health Monitor y Alert Sender corren en app.worker")
         
-        # Iniciar Alert Sender automáticamente
+        # Iniciar refresco en background de precios/balances del portfolio
         try:
-            from app.telegram.alert_sender import alert_sender
-            # Ejecutar en background sin bloquear
-            asyncio.create_task(alert_sender.start_monitoring())
-            logger.info("✅ Alert Sender iniciado automáticamente")
+            from app.services.portfolio_cache_service import portfolio_cache
+            await portfolio_cache.start_background_refresh()
         except Exception as e:
-            logger.error(f"❌ Error iniciando Alert Sender: {e}")
+            logger.error(f"❌ Error iniciando Portfolio Cache: {e}")
+        
+        # Iniciar Alert Sender automáticamente
+        if settings.SCANNERS_IN_API:
+            try:
+                from app.telegram.alert_sender import alert_sender
+                # Ejecutar en background sin bloquear
+                asyncio.create_task(alert_sender.start_monitoring())
+                logger.info("✅ Alert Sender iniciado automáticamente")
+            except Exception as e:
+                logger.error(f"❌ Error iniciando Alert Sender: {e}")
             
     except Exception as e:
         logger.error(f"❌ Error en startup automático: {e}")
@@ -57,6 +141,37 @@ async def lifespan(app: FastAPI):
         logger.info("🛑 BOTU SERVER SHUTTING DOWN...")
         await health_monitor.stop_monitoring()
         logger.info("✅ Health Monitor detenido correctamente")
+
+        # Checkpoint final de los scanners (con su estado de ejecución actual); sin scanners solo se leían
+        from app.services.scanner_checkpoints import scanner_checkpoints
+        await scanner_checkpoints.stop(final_save=settings.SCANNERS_IN_API)
+
+        # Detener refresco del portfolio
+        try:
+            from app.services.portfolio_cache_service import portfolio_cache
+            await portfolio_cache.stop_background_refresh()
+        except Exception as e:
+            logger.error(f"❌ Error deteniendo Portfolio Cache: {e}")
+        
+        # Detener lectura de versiones compartidas
+        from app.core.shared_state import shared_state
+        await shared_state.stop()
+        
+        # Detener event bus (y la escucha de eventos del worker)
+        try:
+            from app.services.event_stream import event_stream_listener
+            await event_stream_listener.stop()
+            from app.core.event_bus import event_bus
+            await event_bus.stop()
+        except Exception as e:
+            logger.error(f"❌ Error deteniendo Event Bus: {e}")
+        
+        # Detener stream de precios
+        try:
+            from app.services.price_oracle import price_oracle
+            await price_oracle.stop()
+        except Exception as e:
+            logger.error(f"❌ Error deteniendo Price Oracle: {e}")
         
         # Detener Alert Sender
         try:
@@ -65,6 +180,16 @@ async def lifespan(app: FastAPI):
             logger.info("✅ Alert Sender detenido correctamente")
         except Exception as e:
             logger.error(f"❌ Error deteniendo Alert Sender: {e}")
+        
+        # Detener sonda de lag del event loop
+        from app.core.metrics import event_loop_lag_probe
+        await event_loop_lag_probe.stop()
+        from app.core.loop_watchdog import loop_watchdog
+        await loop_watchdog.stop()
+        
+        # Cerrar pool asíncrono de DB
+        from app.db.async_database import dispose_async_engine
+        await dispose_async_engine()
             
     except Exception as e:
         logger.error(f"❌ Error en shutdown: {e}")
@@ -131,6 +256,8 @@ app.include_router(bnb_4h_mainnet_routes.router, tags=["bnb-4h-mainnet-scanner"]
 app.include_router(eth_4h_mainnet_routes.router, tags=["eth-4h-mainnet-scanner"])  # ETH 4h Mainnet Scanner endpoints
 app.include_router(paxg_4h_mainnet_routes.router, tags=["paxg-4h-mainnet-scanner"])  # PAXG 4h Mainnet Scanner endpoints
 app.include_router(mainnet_history_routes.router, tags=["mainnet-history"])  # Mainnet History endpoints
+app.include_router(dashboard_routes.router, tags=["dashboard"])  # Snapshot consolidado de scanners
+app.include_router(metrics_routes.router, tags=["metrics"])      # Métricas Prometheus
 app.include_router(health_routes.router, tags=["health"])        # Health Monitor endpoints
 app.include_router(debug_routes.router, tags=["debug"])                   # Debug endpoints
 app.include_router(migrate_routes.router, tags=["migrate"])                   # Migration endpoints
@@ -1,11 +1,6 @@
 # backend/app/services/auto_trading_executor.py
 
 import logging
-import os
-import hmac
-import hashlib
-import time
-import requests
 from typing import Optional, Dict, List, Any
 from datetime import datetime
 from sqlalchemy.orm import Session
@@ -15,6 +10,7 @@ from app.db import crud_trading
 from app.db.models import TradingApiKey, TradingOrder
 from app.schemas.trading_schema import TradingOrderCreate
 from app.services import trading_events
+from app.services.binance_account import binance_account
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -357,7 +353,7 @@ class AutoTradingExecutor:
             # Ejecutar orden REAL en Binance
             try:
                 # Obtener credenciales
-                credentials = crud_trading.get_decrypted_api_credentials(db, api_key_config.id)
+                credentials = binance_account.get_credentials(api_key_config.id)
                 if not credentials:
                     logger.error(f"❌ No se pudieron obtener credenciales para usuario {user_id}")
                     crud_trading.update_trading_order_status(db, db_order.id, 'REJECTED')
@@ -604,7 +600,7 @@ class AutoTradingExecutor:
             # Ejecutar venta REAL en Binance MAINNET
             try:
                 # Obtener credenciales
-                credentials = crud_trading.get_decrypted_api_credentials(db, api_key_config.id)
+                credentials = binance_account.get_credentials(api_key_config.id)
                 if not credentials:
                     logger.error(f"❌ No se pudieron obtener credenciales para venta usuario {user_id}")
                     crud_trading.update_trading_order_status(db, db_sell_order.id, 'REJECTED')
@@ -705,82 +701,37 @@ class AutoTradingExecutor:
             logger.error(f"❌ Error ejecutando orden de salida: {e}")
     
     async def _execute_binance_order(self, api_key: str, secret_key: str, symbol: str, side: str, quantity: float, is_testnet: bool = False):
-        """Ejecuta una orden real en Binance MAINNET usando HMAC SHA256 con quantity"""
-        try:
-            # Solo usar mainnet - ignorar parámetro is_testnet
-            base_url = "https://api.binance.com"
-            endpoint = "/api/v3/order"
-            url = f"{base_url}{endpoint}"
-            
-            # Parámetros de la orden
-            params = {
-                'symbol': symbol,
-                'side': side,
-                'type': 'MARKET',
-                'quantity': f"{quantity:.8f}",
-                'recvWindow': 5000,
-                'timestamp': int(time.time() * 1000)
-            }
-            
-            # Crear signature HMAC SHA256
-            from urllib.parse import urlencode
-            query = urlencode(params)
-            signature = hmac.new(secret_key.encode(), query.encode(), hashlib.sha256).hexdigest()
-            
-            headers = {'X-MBX-APIKEY': api_key}
-            
-            logger.info(f"📤 [Binance] POST /order {symbol} {side} MARKET qty={quantity:.8f}")
-            
-            # Enviar orden
-            response = requests.post(f"{url}?{query}&signature={signature}", headers=headers, timeout=15)
-            
-            try:
-                data = response.json()
-            except:
-                data = {'status_code': response.status_code, 'text': response.text}
-            
-            logger.info(f"[Binance] POST /order {symbol} {side} qty={quantity:.8f} resp={response.status_code} body={data}")
-            data['success'] = True if response.status_code == 200 else False
-            return data
-                
-        except Exception as e:
-            logger.error(f"❌ Error ejecutando orden Binance: {e}")
-            return {'success': False, 'error': str(e)}
+        """Ejecuta una orden real en Binance MAINNET con quantity (ignora is_testnet)"""
+        logger.info(f"📤 [Binance] POST /order {symbol} {side} MARKET qty={quantity:.8f}")
+        return await self._send_order((api_key, secret_key), {
+            'symbol': symbol,
+            'side': side,
+            'type': 'MARKET',
+            'quantity': f"{quantity:.8f}",
+            'recvWindow': 5000
+        })
     
     async def _execute_binance_order_quote(self, api_key: str, secret_key: str, symbol: str, side: str, quote_usdt: float):
         """Ejecuta una orden en Binance MAINNET usando quoteOrderQty (valor en USDT)"""
+        logger.info(f"📤 [Binance] POST /order {symbol} {side} MARKET quoteOrderQty=${quote_usdt:.2f}")
+        return await self._send_order((api_key, secret_key), {
+            'symbol': symbol,
+            'side': side,
+            'type': 'MARKET',
+            'quoteOrderQty': f"{float(quote_usdt):.2f}",
+            'recvWindow': 5000
+        })
+    
+    async def _send_order(self, credentials: tuple, params: Dict) -> Dict:
+        """POST /order firmado por el cliente compartido (mismo pool HTTP que el motor de estrategias)"""
         try:
-            base_url = "https://api.binance.com"
-            endpoint = "/api/v3/order"
-            
-            # Parámetros de la orden
-            params = {
-                'symbol': symbol,
-                'side': side,
-                'type': 'MARKET',
-                'quoteOrderQty': f"{float(quote_usdt):.2f}",
-                'recvWindow': 5000,
-                'timestamp': int(time.time() * 1000)
-            }
-            
-            # Crear signature HMAC SHA256
-            from urllib.parse import urlencode
-            query = urlencode(params)
-            signature = hmac.new(secret_key.encode(), query.encode(), hashlib.sha256).hexdigest()
-            
-            headers = {'X-MBX-APIKEY': api_key}
-            
-            logger.info(f"📤 [Binance] POST /order {symbol} {side} MARKET quoteOrderQty=${quote_usdt:.2f}")
-            
-            # Enviar orden
-            response = requests.post(f"{base_url}{endpoint}?{query}&signature={signature}", headers=headers, timeout=15)
-            
+            response = await binance_account.signed_request("POST", "/api/v3/order", params, credentials=credentials)
             try:
                 data = response.json()
-            except:
+            except ValueError:
                 data = {'status_code': response.status_code, 'text': response.text}
             
-            logger.info(f"[Binance] POST /order {symbol} {side} quote=${quote_usdt:.2f} resp={response.status_code} body={data}")
+            logger.info(f"[Binance] POST /order {params['symbol']} {params['side']} resp={response.status_code} body={data}")
             data['success'] = True if response.status_code == 200 else False
             return data
                 
@@ -803,36 +754,7 @@ class AutoTradingExecutor:
         """
         Obtiene balance de la API key desde Binance (incluyendo BNB)
         """
-        try:
-            # Obtener credenciales desencriptadas
-            credentials = crud_trading.get_decrypted_api_credentials(SessionLocal(), api_key_config.id)
-            if not credentials:
-                return None
-            key, secret = credentials
-
-            import hmac, hashlib, time
-            from urllib.parse import urlencode
-            url = "https://api.binance.com/api/v3/account"
-            ts = int(time.time() * 1000)
-            params = { 'timestamp': ts }
-            query = urlencode(params)
-            signature = hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
-            headers = { 'X-MBX-APIKEY': key }
-            resp = requests.get(f"{url}?{query}&signature={signature}", headers=headers, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-            balances = { b['asset']: float(b['free']) + float(b['locked']) for b in data.get('balances', []) }
-            return { 
-                'USDT': balances.get('USDT', 0.0), 
-                'BTC': balances.get('BTC', 0.0),
-                'ETH': balances.get('ETH', 0.0),
-                'BNB': balances.get('BNB', 0.0),
-                'SOL': balances.get('SOL', 0.0)
-            }
-            
-        except Exception as e:
-            logger.error(f"Error obteniendo balance: {e}")
-            return None
+        return await binance_account.get_balances(api_key_config.id, ('USDT', 'BTC', 'ETH', 'BNB', 'SOL'))
     
 
 # Instancia singleton
@@ -0,0 +1,210 @@
+# backend/app/services/binance_account.py
+# Cliente de endpoints firmados de Binance compartido por todas las estrategias:
+# cache de credenciales desencriptadas por API key, firma HMAC, balances, órdenes,
+# myTrades y filtros de exchangeInfo. Todo sale por el gobernador de peso (un solo pool HTTP).
+
+import hashlib
+import hmac
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import requests
+
+from app.core.binance_governor import binance_http, PRIORITY_ORDER, PRIORITY_RECONCILE
+from app.core.metrics import order_rtt_seconds
+from app.db.crud_trading import get_decrypted_api_credentials
+from app.db.database import session_scope
+
+logger = logging.getLogger(__name__)
+
+BINANCE_API_BASE = "https://api.binance.com"
+
+# Las credenciales desencriptadas se reutilizan durante este tiempo (se invalidan al editar la key)
+CREDENTIALS_TTL_SECONDS = float(os.getenv("BINANCE_CREDENTIALS_TTL_SECONDS", "300"))
+# exchangeInfo cambia muy poco: un refresco por hora y símbolo
+EXCHANGE_FILTERS_TTL_SECONDS = 3600.0
+
+# Códigos de Binance que indican credenciales inválidas/revocadas
+AUTH_ERROR_CODES = {-2014, -2015}
+
+class BinanceAccountClient:
+    """Thread-safe: se usa desde corutinas y desde scanners en asyncio.to_thread"""
+
+    def __init__(self, credentials_ttl: float = CREDENTIALS_TTL_SECONDS):
+        self.credentials_ttl = credentials_ttl
+        # api_key_id -> (key, secret, cargado_en)
+        self._credentials: Dict[int, Tuple[str, str, float]] = {}
+        # symbol -> (filtros, cargado_en)
+        self._filters: Dict[str, Tuple[Dict, float]] = {}
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Credenciales
+    # --------------------------
+
+    def get_credentials(self, api_key_id: int) -> Optional[Tuple[str, str]]:
+        """(api_key, secret) desencriptados, desde memoria si no venció el TTL"""
+        with self._lock:
+            cached = self._credentials.get(api_key_id)
+            if cached and time.time() - cached[2] < self.credentials_ttl:
+                return cached[0], cached[1]
+
+        with session_scope() as db:
+            creds = get_decrypted_api_credentials(db, api_key_id)
+        if not creds:
+            return None
+        with self._lock:
+            self._credentials[api_key_id] = (creds[0], creds[1], time.time())
+        return creds
+
+    def invalidate_api_key(self, api_key_id: int):
+        """Descarta credenciales cacheadas (al actualizar/borrar la API key)"""
+        with self._lock:
+            self._credentials.pop(api_key_id, None)
+
+    # --------------------------
+    # Requests firmadas
+    # --------------------------
+
+    async def signed_request(
+        self,
+        method: str,
+        path: str,
+        params: Dict,
+        api_key_id: Optional[int] = None,
+        credentials: Optional[Tuple[str, str]] = None,
+        priority: int = PRIORITY_ORDER,
+    ) -> requests.Response:
+        """Firma `params` (con timestamp) y envía la request. Usa `credentials` o las de `api_key_id`"""
+        creds = credentials or (self.get_credentials(api_key_id) if api_key_id is not None else None)
+        if not creds:
+            raise ValueError(f"Sin credenciales para API key {api_key_id}")
+        key, secret = creds
+
+        query = urlencode({**params, 'timestamp': int(time.time() * 1000)})
+        signature = hmac.new(secret.encode(), query.encode(), hashlib.sha256).hexdigest()
+        headers = {'X-MBX-APIKEY': key}
+        url = f"{BINANCE_API_BASE}{path}"
+        if method == "GET":
+            response = await binance_http.aget(f"{url}?{query}&signature={signature}", headers=headers, priority=priority, timeout=15)
+        else:
+            response = await binance_http.arequest(method, url, headers=headers, data=f"{query}&signature={signature}", priority=priority, timeout=15)
+
+        if response.status_code in (401, 400) and api_key_id is not None:
+            try:
+                if response.json().get('code') in AUTH_ERROR_CODES:
+                    # Key revocada o rotada: volver a leerla de la DB en la próxima request
+                    self.invalidate_api_key(api_key_id)
+            except ValueError:
+                pass
+        return response
+
+    async def get_balances(self, api_key_id: int, assets: Iterable[str]) -> Optional[Dict[str, float]]:
+        """Balance total (free + locked) de los activos pedidos"""
+        try:
+            response = await self.signed_request("GET", "/api/v3/account", {}, api_key_id=api_key_id)
+            response.raise_for_status()
+            balances = {b['asset']: float(b['free']) + float(b['locked']) for b in response.json().get('balances', [])}
+            return {asset: balances.get(asset, 0.0) for asset in assets}
+        except Exception as e:
+            logger.error(f"Error obteniendo balance: {e}")
+            return None
+
+    async def place_order(self, api_key_id: int, order_data: Dict) -> Dict:
+        """
+        Orden MARKET por `quantity` o `quoteOrderQty`. Devuelve el cuerpo de Binance con
+        'success' normalizado (mismo contrato que usaban los executors).
+        """
+        params = {
+            'symbol': order_data['symbol'],
+            'side': order_data['side'],
+            'type': order_data['type'],
+            'recvWindow': 5000
+        }
+        if order_data['type'] == 'MARKET':
+            if 'quoteOrderQty' in order_data:
+                params['quoteOrderQty'] = f"{float(order_data['quoteOrderQty']):.2f}"
+            elif 'quantity' in order_data:
+                params['quantity'] = f"{float(order_data['quantity']):.8f}"
+
+        try:
+            if not self.get_credentials(api_key_id):
+                return {'success': False, 'msg': 'NO_CREDENTIALS'}
+            sent_at = time.perf_counter()
+            resp = await self.signed_request("POST", "/api/v3/order", params, api_key_id=api_key_id)
+            order_rtt_seconds.observe(
+                time.perf_counter() - sent_at,
+                symbol=params['symbol'], side=params['side'], outcome='ok' if resp.status_code == 200 else 'rejected'
+            )
+            try:
+                data = resp.json()
+            except Exception:
+                data = {'status_code': resp.status_code, 'text': resp.text}
+
+            logger.info(f"[Binance] POST /order {params['symbol']} {params['side']} {params['type']} qty={params.get('quantity')} quote={params.get('quoteOrderQty')} resp={resp.status_code} body={data}")
+            data['success'] = resp.status_code == 200
+            return data
+        except Exception as e:
+            logger.error(f"Error ejecutando orden en Binance: {e}")
+            return {'success': False, 'error': str(e)}
+
+    async def get_my_trades(self, api_key_id: int, symbol: str, limit: int = 200) -> Optional[List[Dict]]:
+        """Últimos trades de la cuenta para el símbolo (reconciliación)"""
+        response = await self.signed_request(
+            "GET", "/api/v3/myTrades", {'symbol': symbol, 'limit': limit, 'recvWindow': 5000},
+            api_key_id=api_key_id, priority=PRIORITY_RECONCILE
+        )
+        if response.status_code != 200:
+            logger.warning(f"[Reconcile] Binance myTrades {response.status_code}: {response.text}")
+            return None
+        return response.json() or []
+
+    # --------------------------
+    # Filtros de exchange
+    # --------------------------
+
+    async def get_exchange_filters(self, symbol: str) -> Optional[Dict]:
+        """minQty, stepSize y minNotional del símbolo (cacheados una hora)"""
+        with self._lock:
+            cached = self._filters.get(symbol)
+            if cached and time.time() - cached[1] < EXCHANGE_FILTERS_TTL_SECONDS:
+                return cached[0]
+        try:
+            resp = await binance_http.aget(f"{BINANCE_API_BASE}/api/v3/exchangeInfo", params={'symbol': symbol}, priority=PRIORITY_ORDER, timeout=15)
+            resp.raise_for_status()
+            data = resp.json()
+            if not data.get('symbols'):
+                logger.warning(f"⚠️ No se encontró información para {symbol}, usando valores por defecto")
+                return None
+
+            filters = {}
+            for filter_item in data['symbols'][0].get('filters', []):
+                filter_type = filter_item.get('filterType')
+                if filter_type == 'LOT_SIZE':
+                    filters['minQty'] = float(filter_item.get('minQty', 0))
+                    filters['stepSize'] = float(filter_item.get('stepSize', 0))
+                elif filter_type in ('MIN_NOTIONAL', 'NOTIONAL') and 'minNotional' in filter_item:
+                    filters['minNotional'] = float(filter_item['minNotional'])
+
+            logger.info(f"📊 Filtros Binance para {symbol}: {filters}")
+            with self._lock:
+                self._filters[symbol] = (filters, time.time())
+            return filters
+        except Exception as e:
+            logger.error(f"Error obteniendo filtros de Binance para {symbol}: {e}")
+            return None
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "cached_credentials": len(self._credentials),
+                "credentials_ttl_seconds": self.credentials_ttl,
+                "cached_filters": sorted(self._filters),
+            }
+
+# Instancia global
+binance_account = BinanceAccountClient()
@@ -3,7 +3,6 @@
 
 import asyncio
 import logging
-import requests
 import hmac
 import hashlib
 import time
@@ -14,6 +13,7 @@ from urllib.parse import urlencode
 from app.db.database import get_db
 from app.db.models import TradingApiKey, TradingOrder
 from app.db.crud_trading import get_decrypted_api_credentials
+from app.core.binance_governor import binance_http, PRIORITY_RECONCILE
 
 logger = logging.getLogger(__name__)
 
@@ -77,7 +77,7 @@ class BinanceOrderChecker:
             
             url = f"{self.base_url}{endpoint}?{query}&signature={signature}"
             
-            response = requests.get(url, headers=headers, timeout=15)
+            response = await binance_http.aget(url, headers=headers, priority=PRIORITY_RECONCILE, timeout=15)
             response.raise_for_status()
             
             orders = response.json()
@@ -7,13 +7,17 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import pandas as pd
 import numpy as np
-import requests
 import time
 from sqlalchemy.orm import Session
 
-from app.db.database import get_db
+from app.core.event_bus import event_bus, CandleClosed, SignalDetected
+from app.core.metrics import kline_fetch_seconds, scan_cycle_seconds
+from app.core.tracing import traced
+from app.core.response_cache import response_cache
 from app.db.models import TradingApiKey, TradingOrder
-from app.services.auto_trading_mainnet30m_executor import AutoTradingMainnet30mExecutor
+from app.services.strategy_engine import get_strategy_engine
+from app.core.binance_governor import binance_http, PRIORITY_MARKET_DATA
+from app.services.price_oracle import price_oracle
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +32,7 @@ class Bitcoin30mMainnetScanner:
         self.last_scan_time = None
         self.alerts_count = 0
         self.scanner_logs = []
+        self.cache_namespace = "btc_30m_mainnet"  # Namespace del cache de respuestas (status/config/positions)
         self.last_alert_sent = None
         self.cooldown_period = 300  # 5 minutos entre alertas
         self._last_known_btc_price: float = 0.0  # Cache de último precio conocido
@@ -48,6 +53,7 @@ class Bitcoin30mMainnetScanner:
         self.current_state = "SEARCHING_BUY"  # SEARCHING_BUY, MONITORING_SELL, IDLE
         self.state_changed_at = None
         self.last_position_check = None
+        self.last_closed_candle = None  # open_time de la última vela cerrada publicada en el event bus
         
         # Configuración específica para Mainnet (más conservadora)
         self.config = {
@@ -68,95 +74,52 @@ class Bitcoin30mMainnetScanner:
             'max_rupture_factor': 1.025    # Máximo 2.5%
         }
         
-        self.executor = AutoTradingMainnet30mExecutor()
+        self.executor = get_strategy_engine('btc_30m')
     
     async def _check_current_state(self) -> str:
         """
-        Determina el estado actual del bot basado en posiciones abiertas
+        Determina el estado actual del bot basado en posiciones abiertas.
+        Lee el estado en memoria (scanner_state), que actualizan los eventos de apertura/cierre de lotes,
+        después de adoptar las BUY sin lote (si no, nunca pasarían a MONITORING_SELL).
         """
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                from app.db.database import get_db
-                from app.db.models import TradingOrder, TradingApiKey
-                
-                db = next(get_db())
-            
-                # Verificar si hay posiciones abiertas
-                api_keys = db.query(TradingApiKey).filter(
-                    TradingApiKey.btc_30m_mainnet_enabled == True,
-                    TradingApiKey.is_active == True
-                ).all()
-                
-                has_open_positions = False
-                for api_key in api_keys:
-                    # Buscar órdenes de compra ejecutadas (solo las que no están completadas)
-                    buy_orders = db.query(TradingOrder).filter(
-                        TradingOrder.api_key_id == api_key.id,
-                        TradingOrder.symbol == 'BTCUSDT',
-                        TradingOrder.side == 'BUY',
-                        TradingOrder.status == 'FILLED'  # Solo órdenes ejecutadas que no están completadas
-                    ).all()
-                    
-                    # Verificar si alguna de estas órdenes NO tiene venta asociada
-                    for buy_order in buy_orders:
-                        # Verificar si ya tiene orden de venta posterior
-                        sell_order = db.query(TradingOrder).filter(
-                            TradingOrder.api_key_id == api_key.id,
-                            TradingOrder.symbol == 'BTCUSDT',
-                            TradingOrder.side == 'SELL',
-                            TradingOrder.status == 'FILLED',
-                            TradingOrder.created_at > buy_order.created_at
-                        ).order_by(TradingOrder.created_at.asc()).first()
-                        
-                        # Si no hay venta, es una posición abierta
-                        if not sell_order:
-                            has_open_positions = True
-                            break
-                    
-                    if has_open_positions:
-                        break
-                
-                # Determinar estado
-                if has_open_positions:
-                    new_state = "MONITORING_SELL"
-                else:
-                    new_state = "SEARCHING_BUY"
-                
-                # Log cambio de estado
-                if new_state != self.current_state:
-                    old_state = self.current_state
-                    self.current_state = new_state
-                    self.state_changed_at = datetime.now()
-                    
-                    state_emoji = "🔍" if new_state == "SEARCHING_BUY" else "📊"
-                    state_desc = "Buscando oportunidades de compra" if new_state == "SEARCHING_BUY" else "Monitoreando posiciones para venta"
-                    
-                    self.add_log(
-                    f"{state_emoji} CAMBIO DE ESTADO: {state_desc}",
-                    "INFO",
-                    {
-                        'new_state': new_state,
-                        'previous_state': old_state,
-                        'timestamp': self.state_changed_at.isoformat()
-                    }
-                )
-            
-                return self.current_state
-                
-            except Exception as e:
-                logger.error(f"Error verificando estado (intento {attempt + 1}/{max_retries}): {e}")
-                
-                if attempt < max_retries - 1:
-                    # Backoff exponencial: 2, 4, 8 segundos
-                    wait_time = 2 ** attempt
-                    logger.warning(f"🔄 Reintentando en {wait_time} segundos...")
-                    await asyncio.sleep(wait_time)
-                    continue
-                else:
-                    # Último intento falló, mantener estado anterior
-                    logger.warning(f"🔄 Falló después de {max_retries} intentos. Manteniendo estado anterior: {self.current_state}")
-                    return self.current_state
+        await self.executor.sync_position_lots()
+        try:
+            from app.services.scanner_state import scanner_state
+            # Si quedó invalidado (lotes adoptados arriba) se recarga en un hilo, no en el event loop
+            await scanner_state.ensure_fresh()
+            # Una lectura por ciclo del estado compartido por todos los scanners (sin query por key)
+            open_api_key_ids = scanner_state.open_positions().get('btc_30m', [])
+        except Exception as e:
+            # Mantener estado anterior
+            logger.error(f"Error verificando estado: {e}")
+            return self.current_state
+
+        # Determinar estado
+        if open_api_key_ids:
+            new_state = "MONITORING_SELL"
+        else:
+            new_state = "SEARCHING_BUY"
+
+        # Log cambio de estado
+        if new_state != self.current_state:
+            old_state = self.current_state
+            self.current_state = new_state
+            self.state_changed_at = datetime.now()
+
+            state_emoji = "🔍" if new_state == "SEARCHING_BUY" else "📊"
+            state_desc = "Buscando oportunidades de compra" if new_state == "SEARCHING_BUY" else "Monitoreando posiciones para venta"
+
+            self.add_log(
+                f"{state_emoji} CAMBIO DE ESTADO: {state_desc}",
+                "INFO",
+                {
+                    'new_state': new_state,
+                    'previous_state': old_state,
+                    'timestamp': self.state_changed_at.isoformat()
+                }
+            )
+
+        return self.current_state
     
     async def _recover_state(self):
         """
@@ -193,8 +156,18 @@ class Bitcoin30mMainnetScanner:
         
         async def _run_loop():
             try:
+                # Tras un reinicio en caliente, esperar lo que faltaba del intervalo (no re-escanear la misma vela)
+                from app.services.scanner_checkpoints import scanner_checkpoints
+                resume_in = scanner_checkpoints.resume_delay(self, self.config['scan_interval'])
+                if resume_in > 0:
+                    self.add_log(f"♻️ Retomando ciclo desde checkpoint: próximo escaneo en {resume_in:.0f}s")
+                    try:
+                        await asyncio.wait_for(self._stop_event.wait(), timeout=resume_in)
+                    except asyncio.TimeoutError:
+                        pass
                 while self.is_running and not self._stop_event.is_set():
-                    await self._scan_cycle()
+                    with scan_cycle_seconds.time(scanner=self.cache_namespace):
+                        await self._scan_cycle()
                     # Espera cancelable
                     try:
                         await asyncio.wait_for(self._stop_event.wait(), timeout=self.config['scan_interval'])
@@ -230,6 +203,7 @@ class Bitcoin30mMainnetScanner:
         finally:
             self._task = None
     
+    @traced("btc_30m.scan_cycle")
     async def _scan_cycle(self):
         """Ciclo principal de escaneo con lógica de estados"""
         try:
@@ -255,6 +229,12 @@ class Bitcoin30mMainnetScanner:
             current_price = float(df.iloc[-1]['close'])
             self.last_scan_price = current_price
             
+            # Vela recién cerrada (la última fila es la vela en curso): se publica una sola vez
+            candle = CandleClosed.from_frame('btc_30m', 'BTCUSDT', '30m', df)
+            if candle and candle.open_time != self.last_closed_candle:
+                self.last_closed_candle = candle.open_time
+                await event_bus.publish_wait(candle)
+            
             # Determinar estado actual del bot
             current_state = await self._check_current_state()
             
@@ -326,6 +306,7 @@ class Bitcoin30mMainnetScanner:
             logger.error(f"Error en estado de monitoreo de ventas: {e}")
             self.add_log(f"❌ Error monitoreando ventas: {e}")
     
+    @traced("btc_30m.fetch_klines")
     async def _get_historical_data_30min(self) -> Optional[pd.DataFrame]:
         """Obtiene datos históricos de 30 minutos para análisis"""
         try:
@@ -339,7 +320,8 @@ class Bitcoin30mMainnetScanner:
                 'limit': limit
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            with kline_fetch_seconds.time(symbol=params['symbol'], interval=params['interval']):
+                response = await binance_http.aget(url, params=params, priority=PRIORITY_MARKET_DATA, timeout=10)
             response.raise_for_status()
             
             klines = response.json()
@@ -566,6 +548,7 @@ class Bitcoin30mMainnetScanner:
         x = np.arange(len(values))
         return np.polyfit(x, values, 1)[0]
     
+    @traced("btc_30m.process_signal")
     async def _process_signal(self, signal: Dict):
         """Procesa una señal de compra detectada"""
         try:
@@ -602,10 +585,12 @@ class Bitcoin30mMainnetScanner:
                 "INFO"
             )
             
-            # Ejecutar trading automático
+            # Ejecutar trading automático (executor_btc_30m por el event bus)
             # IMPORTANTE: La señal ya tiene entry_price = nivel_ruptura (línea 458), igual al backtest
             # El ejecutor usará signal['entry_price'] como precio de entrada
-            trade_result = await self.executor.execute_buy_order(signal)
+            signal_event = SignalDetected('btc_30m', 'BTCUSDT', signal.get('current_price'), signal, source=self.cache_namespace)
+            await event_bus.publish_wait(signal_event)
+            trade_result = await signal_event.outcome()
             
             # Log del resultado del trade
             if trade_result and trade_result.get('success'):
@@ -681,6 +666,7 @@ class Bitcoin30mMainnetScanner:
             })
         
         self.scanner_logs.append(log_entry)
+        response_cache.bump(self.cache_namespace)
         
         # Mantener solo los últimos 1000 logs
         if len(self.scanner_logs) > 1000:
@@ -689,18 +675,12 @@ class Bitcoin30mMainnetScanner:
         logger.info(f"[Bitcoin30m-Mainnet-{level}] {message}")
     
     def _get_current_btc_price(self) -> float:
-        """Obtiene el precio actual de BTC"""
-        try:
-            import requests
-            response = requests.get("https://api.binance.com/api/v3/ticker/price", params={"symbol": "BTCUSDT"}, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            price = float(data['price'])
-            self._last_known_btc_price = price
-            return price
-        except Exception as e:
-            logger.warning(f"No se pudo obtener precio BTC (Binance): {e}")
+        """Obtiene el precio actual de BTC desde el price oracle"""
+        price = price_oracle.get_price_sync("BTCUSDT")
+        if price is None:
             return self._last_known_btc_price if self._last_known_btc_price > 0 else 0.0
+        self._last_known_btc_price = price
+        return price
     
     def get_status(self) -> Dict[str, Any]:
         """Obtiene el estado actual del scanner 30m Mainnet"""
@@ -752,32 +732,13 @@ class Bitcoin30mMainnetScanner:
             "state_changed_at": self.state_changed_at.isoformat() if self.state_changed_at else None
         }
 
+    @traced("btc_30m.evaluate_readiness")
     def _evaluate_readiness(self):
         """Evalúa si hay condiciones para operar automáticamente y almacena razones."""
         try:
-            from app.db.database import get_db
-            from app.db.models import TradingApiKey
-            db = next(get_db())
-            keys = db.query(TradingApiKey).filter(
-                TradingApiKey.is_testnet == False,
-                TradingApiKey.is_active == True
-            ).all()
-            enabled = [k for k in keys if getattr(k, 'btc_30m_mainnet_enabled', False)]
-            allocated_ok = any((k.btc_30m_mainnet_allocated_usdt or 0) > 0 for k in enabled)
-            # Para balance_ok, asumimos true (el ejecutor valida saldo real). Aquí solo señalamos asignación
-            reasons = []
-            if len(enabled) == 0:
-                reasons.append('sin claves mainnet habilitadas')
-            if not allocated_ok:
-                reasons.append('asignación USDT=0')
-            auto_ready = len(enabled) > 0 and allocated_ok
-            self.readiness_cache = {
-                'auto_ready': auto_ready,
-                'enabled_keys': len(enabled),
-                'allocated_ok': allocated_ok,
-                'balance_ok': allocated_ok,  # proxy
-                'reasons': reasons
-            }
+            # Estado en memoria, recalculado solo al cambiar suscripciones (sin query por ciclo)
+            from app.services.scanner_state import scanner_state
+            self.readiness_cache = scanner_state.readiness('btc_30m', 'BTC 30m')
         except Exception:
             self.readiness_cache = {
                 'auto_ready': False,
@@ -2,7 +2,6 @@
 
 import asyncio
 import logging
-import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
@@ -19,6 +18,7 @@ from app.db import crud_users, crud_alertas
 from app.schemas.alerta_schema import AlertaCreate
 from app.telegram.telegram_bot import telegram_bot
 from app.services.auto_trading_executor import auto_trading_executor
+from app.core.binance_governor import binance_http, PRIORITY_MARKET_DATA
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -210,7 +210,7 @@ class BitcoinScanner30mService:
                 'limit': self.config['data_limit']  # 1000 velas
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = await binance_http.aget(url, params=params, priority=PRIORITY_MARKET_DATA, timeout=10)
             response.raise_for_status()
             
             klines = response.json()
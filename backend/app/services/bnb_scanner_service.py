@@ -14,10 +14,16 @@ import os
 # Add src path for trading modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
+from app.core.event_bus import event_bus, CandleClosed, SignalDetected
+from app.core.metrics import kline_fetch_seconds, scan_cycle_seconds
+from app.core.tracing import traced
+from app.core.response_cache import response_cache
 from app.db.database import SessionLocal
 from app.db import crud_users, crud_alertas
 from app.schemas.alerta_schema import AlertaCreate
 from app.telegram.telegram_bot import telegram_bot
+from app.core.binance_governor import binance_http, PRIORITY_MARKET_DATA
+from app.services.price_oracle import price_oracle
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
@@ -48,6 +54,7 @@ class BnbScannerService:
         self.last_alert_sent = None  # Timestamp de la última alerta enviada
         self.cooldown_period = 60 * 60  # 1 hora de cooldown entre alertas
         self.scanner_logs = []  # Lista de logs para mostrar en el frontend
+        self.cache_namespace = "bnb_4h_mainnet"  # Namespace del cache de respuestas (status/config/positions)
         self.max_logs = 50  # Máximo número de logs a mantener
         self.last_scan_price = None  # Último precio escaneado
         self.readiness_cache = {
@@ -62,10 +69,11 @@ class BnbScannerService:
         self.current_state = "SEARCHING_BUY"  # SEARCHING_BUY, MONITORING_SELL, IDLE
         self.state_changed_at = None
         self.last_position_check = None
+        self.last_closed_candle = None  # open_time de la última vela cerrada publicada en el event bus
         
         # Inicializar executor específico para BNB 4h
-        from app.services.auto_trading_bnb4h_executor import AutoTradingBnb4hExecutor
-        self.executor = AutoTradingBnb4hExecutor()
+        from app.services.strategy_engine import get_strategy_engine
+        self.executor = get_strategy_engine('bnb_4h')
         
         # Control de ciclo y parada inmediata (como Bitcoin30m)
         import asyncio as _asyncio
@@ -74,75 +82,48 @@ class BnbScannerService:
         
     async def _check_current_state(self) -> str:
         """
-        Determina el estado actual del bot basado en posiciones abiertas
+        Determina el estado actual del bot basado en posiciones abiertas.
+        Lee el estado en memoria (scanner_state), que actualizan los eventos de apertura/cierre de lotes,
+        después de adoptar las BUY sin lote (si no, nunca pasarían a MONITORING_SELL).
         """
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                from app.db.database import get_db
-                from app.db.models import TradingOrder, TradingApiKey
-                
-                db = next(get_db())
-                
-                # Verificar si hay posiciones abiertas de BNB
-                api_keys = db.query(TradingApiKey).filter(
-                    TradingApiKey.bnb_4h_mainnet_enabled == True,
-                    TradingApiKey.is_active == True
-                ).all()
-                
-                has_open_positions = False
-                for api_key in api_keys:
-                    open_orders = db.query(TradingOrder).filter(
-                        TradingOrder.api_key_id == api_key.id,
-                        TradingOrder.symbol == 'BNBUSDT',
-                        TradingOrder.side == 'BUY',
-                        TradingOrder.status == 'FILLED'
-                    ).all()
-                    
-                    if open_orders:
-                        has_open_positions = True
-                        break
-                
-                # Determinar estado
-                if has_open_positions:
-                    new_state = "MONITORING_SELL"
-                else:
-                    new_state = "SEARCHING_BUY"
-                
-                # Log cambio de estado
-                if new_state != self.current_state:
-                    old_state = self.current_state
-                    self.current_state = new_state
-                    self.state_changed_at = datetime.now()
-                    
-                    state_emoji = "🔍" if new_state == "SEARCHING_BUY" else "📊"
-                    state_desc = "Buscando oportunidades de compra" if new_state == "SEARCHING_BUY" else "Monitoreando posiciones para venta"
-                    
-                    self._add_log(
-                        "INFO",
-                        f"{state_emoji} CAMBIO DE ESTADO: {state_desc}",
-                        {
-                            'new_state': new_state,
-                            'previous_state': old_state,
-                            'timestamp': self.state_changed_at.isoformat()
-                        }
-                    )
-                
-                return self.current_state
-                
-            except Exception as e:
-                logger.error(f"Error verificando estado BNB (intento {attempt + 1}/{max_retries}): {e}")
-                
-                if attempt < max_retries - 1:
-                    # Backoff exponencial: 2, 4, 8 segundos
-                    wait_time = 2 ** attempt
-                    logger.warning(f"🔄 Reintentando en {wait_time} segundos...")
-                    await asyncio.sleep(wait_time)
-                    continue
-                else:
-                    # Último intento falló, mantener estado anterior
-                    logger.warning(f"🔄 Falló después de {max_retries} intentos. Manteniendo estado anterior: {self.current_state}")
-                    return self.current_state
+        await self.executor.sync_position_lots()
+        try:
+            from app.services.scanner_state import scanner_state
+            # Si quedó invalidado (lotes adoptados arriba) se recarga en un hilo, no en el event loop
+            await scanner_state.ensure_fresh()
+            # Una lectura por ciclo del estado compartido por todos los scanners (sin query por key)
+            open_api_key_ids = scanner_state.open_positions().get('bnb_4h', [])
+        except Exception as e:
+            # Mantener estado anterior
+            logger.error(f"Error verificando estado BNB: {e}")
+            return self.current_state
+
+        # Determinar estado
+        if open_api_key_ids:
+            new_state = "MONITORING_SELL"
+        else:
+            new_state = "SEARCHING_BUY"
+
+        # Log cambio de estado
+        if new_state != self.current_state:
+            old_state = self.current_state
+            self.current_state = new_state
+            self.state_changed_at = datetime.now()
+
+            state_emoji = "🔍" if new_state == "SEARCHING_BUY" else "📊"
+            state_desc = "Buscando oportunidades de compra" if new_state == "SEARCHING_BUY" else "Monitoreando posiciones para venta"
+
+            self._add_log(
+                "INFO",
+                f"{state_emoji} CAMBIO DE ESTADO: {state_desc}",
+                {
+                    'new_state': new_state,
+                    'previous_state': old_state,
+                    'timestamp': self.state_changed_at.isoformat()
+                }
+            )
+
+        return self.current_state
     
     async def _recover_state(self):
         """
@@ -213,6 +194,7 @@ class BnbScannerService:
     def update_config(self, new_config: Dict[str, Any]):
         """Actualiza la configuración del scanner (solo admin)"""
         self.config.update(new_config)
+        response_cache.bump(self.cache_namespace)
         logger.info(f"✅ Configuración BNB actualizada: {self.config}")
     
     def _add_log(self, level: str, message: str, details: dict = None, current_price: Optional[float] = None):
@@ -227,6 +209,7 @@ class BnbScannerService:
         }
         
         self.scanner_logs.append(log_entry)
+        response_cache.bump(self.cache_namespace)
         
         # Mantener solo los últimos logs
         if len(self.scanner_logs) > self.max_logs:
@@ -268,6 +251,7 @@ class BnbScannerService:
             
         try:
             self.is_running = False
+            response_cache.bump(self.cache_namespace)
             if self.scan_task:
                 self.scan_task.cancel()
                 try:
@@ -284,10 +268,18 @@ class BnbScannerService:
         """Loop principal del scanner"""
         logger.info(f"🔄 BNB Iniciando loop de escaneo cada {self.config['scan_interval']/3600:.1f} horas")
         
+        # Tras un reinicio en caliente, esperar lo que faltaba del intervalo (no re-escanear la misma vela)
+        from app.services.scanner_checkpoints import scanner_checkpoints
+        resume_in = scanner_checkpoints.resume_delay(self, self.config['scan_interval'])
+        if resume_in > 0:
+            logger.info(f"♻️ BNB Scanner retoma el ciclo desde checkpoint: próximo escaneo en {resume_in:.0f}s")
+            await asyncio.sleep(resume_in)
+        
         while self.is_running:
             try:
                 # Realizar escaneo
-                await self._scan_cycle()
+                with scan_cycle_seconds.time(scanner=self.cache_namespace):
+                    await self._scan_cycle()
                 
                 # Esperar hasta el próximo escaneo
                 await asyncio.sleep(self.config['scan_interval'])
@@ -301,6 +293,7 @@ class BnbScannerService:
                 # Esperar tiempo progresivo para evitar bucles de errores
                 await asyncio.sleep(min(300, 60 * (1 + len([log for log in self.scanner_logs if log.get('level') == 'ERROR']))))
     
+    @traced("bnb_4h.scan_cycle")
     async def _scan_cycle(self):
         """Ciclo principal de escaneo con lógica de estados (igual que Bitcoin 30m)"""
         try:
@@ -326,6 +319,12 @@ class BnbScannerService:
             current_price = float(df.iloc[-1]['close'])
             self.last_scan_price = current_price
             
+            # Vela recién cerrada (la última fila es la vela en curso): se publica una sola vez
+            candle = CandleClosed.from_frame('bnb_4h', self.config['symbol'], self.config['timeframe'], df)
+            if candle and candle.open_time != self.last_closed_candle:
+                self.last_closed_candle = candle.open_time
+                await event_bus.publish_wait(candle)
+            
             # Determinar estado actual del bot
             current_state = await self._check_current_state()
             
@@ -424,6 +423,7 @@ class BnbScannerService:
         except Exception as e:
             logger.error(f"❌ Error en escaneo BNB: {e}")
     
+    @traced("bnb_4h.fetch_klines")
     async def _get_binance_data(self) -> Optional[pd.DataFrame]:
         """Obtiene datos históricos de Binance para BNB con reintentos"""
         max_retries = 3
@@ -437,7 +437,8 @@ class BnbScannerService:
                     'limit': self.config['data_limit']  # 120 velas
                 }
                 
-                response = requests.get(url, params=params, timeout=30)
+                with kline_fetch_seconds.time(symbol=params['symbol'], interval=self.config['timeframe']):
+                    response = await binance_http.aget(url, params=params, priority=PRIORITY_MARKET_DATA, timeout=30)
                 response.raise_for_status()
                 
                 klines = response.json()
@@ -644,6 +645,7 @@ class BnbScannerService:
         x = np.arange(len(values))
         return np.polyfit(x, values, 1)[0]
     
+    @traced("bnb_4h.process_signal")
     async def _process_signal(self, signal: Dict, df: pd.DataFrame):
         """Procesa una señal detectada y envía alertas"""
         try:
@@ -653,6 +655,21 @@ class BnbScannerService:
             profit_target = rupture_level * (1 + self.config['profit_target'])
             stop_loss = rupture_level * (1 - self.config['stop_loss'])
             
+            # 🤖 TRADING AUTOMÁTICO BNB: la señal va al executor por el event bus y la orden
+            # sale ya, sin esperar la alerta en DB ni el broadcast de Telegram de abajo.
+            # IMPORTANTE: Usar nivel_ruptura como entry_price (igual al backtest)
+            signal_data = {
+                'entry_price': rupture_level,  # Usar nivel_ruptura como precio de entrada (igual al backtest)
+                'rupture_level': rupture_level,
+                'profit_target': profit_target,
+                'stop_loss': stop_loss,
+                'signal_strength': signal.get('signal_strength', 0),
+                'depth': signal.get('depth', 0),
+                'timestamp': signal.get('timestamp', datetime.now())
+            }
+            signal_event = SignalDetected('bnb_4h', signal['symbol'], current_price, signal_data, source=self.cache_namespace)
+            await event_bus.publish_wait(signal_event)
+            
             alert_message = (
                 f"🚀 PATRÓN U DETECTADO EN BNB\n\n"
                 f"📊 Análisis:\n"
@@ -705,22 +722,9 @@ class BnbScannerService:
                 self.alerts_count += 1
                 self.last_alert_sent = datetime.now()
                 
-                # 4. 🤖 EJECUTAR TRADING AUTOMÁTICO BNB (Nueva funcionalidad)
-                # Usar las mismas estrategias probadas (8% TP, 3% SL)
-                # IMPORTANTE: Usar nivel_ruptura como entry_price (igual al backtest)
+                # 4. 🤖 Resultado del trading automático BNB (la orden salió al publicar la señal)
                 try:
-                    signal_data = {
-                        'entry_price': rupture_level,  # Usar nivel_ruptura como precio de entrada (igual al backtest)
-                        'rupture_level': rupture_level,
-                        'profit_target': profit_target,
-                        'stop_loss': stop_loss,
-                        'signal_strength': signal.get('signal_strength', 0),
-                        'depth': signal.get('depth', 0),
-                        'timestamp': signal.get('timestamp', datetime.now())
-                    }
-                    
-                    # Ejecutar trading automático para usuarios que lo tengan habilitado
-                    trade_result = await self.executor.execute_buy_order(signal_data)
+                    trade_result = await signal_event.outcome()
                     
                     self._add_log("SUCCESS", "🤖 Trading automático BNB ejecutado para usuarios habilitados", {
                         "crypto": "BNB",
@@ -992,31 +996,13 @@ class BnbScannerService:
             "auto_trading_readiness": self.readiness_cache
         }
     
+    @traced("bnb_4h.evaluate_readiness")
     def _evaluate_readiness(self):
         """Evalúa si hay condiciones para operar automáticamente"""
         try:
-            from app.db.database import get_db
-            from app.db.models import TradingApiKey
-            db = next(get_db())
-            keys = db.query(TradingApiKey).filter(
-                TradingApiKey.is_testnet == False,
-                TradingApiKey.is_active == True
-            ).all()
-            enabled = [k for k in keys if getattr(k, 'bnb_4h_mainnet_enabled', False)]
-            allocated_ok = any((k.bnb_4h_mainnet_allocated_usdt or 0) > 0 for k in enabled)
-            reasons = []
-            if len(enabled) == 0:
-                reasons.append('sin claves mainnet habilitadas para BNB')
-            if not allocated_ok:
-                reasons.append('asignación BNB USDT=0')
-            auto_ready = len(enabled) > 0 and allocated_ok
-            self.readiness_cache = {
-                'auto_ready': auto_ready,
-                'enabled_keys': len(enabled),
-                'allocated_ok': allocated_ok,
-                'balance_ok': allocated_ok,
-                'reasons': reasons
-            }
+            # Estado en memoria, recalculado solo al cambiar suscripciones (sin query por ciclo)
+            from app.services.scanner_state import scanner_state
+            self.readiness_cache = scanner_state.readiness('bnb_4h', 'BNB')
         except Exception:
             self.readiness_cache = {
                 'auto_ready': False,
@@ -1049,43 +1035,29 @@ class BnbScannerService:
         }
     
     def get_positions(self) -> Dict[str, Any]:
-        """Obtiene las posiciones activas del scanner"""
+        """Obtiene las posiciones activas del scanner (lotes abiertos de las keys suscritas, una query)"""
         try:
-            from app.db.database import get_db
-            from app.db.models import TradingOrder, TradingApiKey
-            
-            db = next(get_db())
+            from app.db.database import session_scope
+            from app.db.crud_trading import get_open_position_lots
+            from app.services.strategy_subscriptions import subscription_registry
             
-            # Obtener posiciones activas
-            api_keys = db.query(TradingApiKey).filter(
-                TradingApiKey.bnb_4h_mainnet_enabled == True,
-                TradingApiKey.is_active == True
-            ).all()
-            
-            positions = []
-            for api_key in api_keys:
-                buy_orders = db.query(TradingOrder).filter(
-                    TradingOrder.api_key_id == api_key.id,
-                    TradingOrder.symbol == 'BNBUSDT',
-                    TradingOrder.side == 'BUY',
-                    TradingOrder.status == 'FILLED'
-                ).all()
-                
-                for order in buy_orders:
-                    positions.append({
-                        "order_id": order.id,
-                        "symbol": order.symbol,
-                        "side": order.side,
-                        "quantity": float(order.executed_quantity or 0),
-                        "price": float(order.price or 0),
-                        "created_at": order.created_at.isoformat(),
-                        "status": order.status
-                    })
+            with session_scope() as db:
+                lots = get_open_position_lots(db, 'bnb_4h', subscription_registry.get_api_key_ids('bnb_4h'))
+                positions = [{
+                    "order_id": lot.orders[0].id if lot.orders else None,
+                    "position_lot_id": lot.id,
+                    "symbol": lot.symbol,
+                    "side": "BUY",
+                    "quantity": float(lot.quantity or 0),
+                    "price": float(lot.avg_price or 0),
+                    "created_at": lot.opened_at.isoformat() if lot.opened_at else None,
+                    "status": "FILLED"
+                } for lot in lots]
             
-            return {
-                "total_positions": len(positions),
-                "positions": positions
-            }
+                return {
+                    "total_positions": len(positions),
+                    "positions": positions
+                }
             
         except Exception as e:
             logger.error(f"Error obteniendo posiciones: {e}")
@@ -1101,18 +1073,12 @@ class BnbScannerService:
         }
     
     def _get_current_bnb_price(self) -> float:
-        """Obtiene el precio actual de BNB"""
-        try:
-            import requests
-            response = requests.get("https://api.binance.com/api/v3/ticker/price", params={"symbol": "BNBUSDT"}, timeout=5)
-            response.raise_for_status()
-            data = response.json()
-            price = float(data['price'])
-            self.last_scan_price = price
-            return price
-        except Exception as e:
-            logger.error(f"Error obteniendo precio BNB: {e}")
+        """Obtiene el precio actual de BNB desde el price oracle"""
+        price = price_oracle.get_price_sync("BNBUSDT")
+        if price is None:
             return self.last_scan_price or 0.0
+        self.last_scan_price = price
+        return price
 
 # Instancia global del scanner
 bnb_scanner = BnbScannerService()
\ No newline at end of file
@@ -0,0 +1,270 @@
+# backend/app/services/bulk_exit.py
+# Salida masiva: cuando TP/SL se dispara para muchos usuarios a la vez, todas las SELL se envían
+# en paralelo (paralelismo acotado, una tarea aislada por API key) y luego las órdenes SELL,
+# el cierre de los lotes y sus BUY y los TradingEvent se guardan en UNA sola transacción.
+
+import asyncio
+import logging
+import math
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.event_bus import event_bus, PositionClosed
+from app.core.tracing import traced
+from app.db.models import TradingApiKey, TradingOrder
+from app.services import position_lots, trading_events
+from app.services.scanner_state import scanner_state
+from app.services.sell_evaluator import ExitDecision, SellStrategy
+
+logger = logging.getLogger(__name__)
+
+# API keys vendiendo a la vez (cada una envía sus órdenes en serie)
+BULK_EXIT_CONCURRENCY = int(os.getenv("BULK_EXIT_CONCURRENCY", "8"))
+MIN_NOTIONAL_USDT = 5.0
+
+class SellFill:
+    """SELL ejecutada en Binance pendiente de guardar"""
+
+    def __init__(self, decision: ExitDecision, quantity: float, binance_result: Dict):
+        self.decision = decision
+        self.quantity = quantity
+        self.binance_result = binance_result
+        self.binance_order_id = str(binance_result.get('orderId', ''))
+
+        fills = binance_result.get('fills') or []
+        filled_qty = sum(float(f.get('qty', 0)) for f in fills)
+        # Precio promedio ponderado de los fills (o el precio del snapshot si Binance no los devuelve)
+        self.price = (
+            sum(float(f.get('qty', 0)) * float(f.get('price', 0)) for f in fills) / filled_qty
+            if filled_qty > 0 else decision.price
+        )
+        self.commission = sum(float(f.get('commission', 0)) for f in fills)
+        self.commission_asset = next((f.get('commissionAsset') for f in fills if f.get('commissionAsset')), None)
+
+        # PnL final después de comisiones (si la comisión fue en el activo base ya está descontada)
+        invested = decision.lot.invested
+        sell_value = self.quantity * self.price
+        if self.commission > 0 and self.commission_asset == 'USDT':
+            sell_value -= self.commission
+        self.pnl_usdt = sell_value - invested
+        self.pnl_percentage = (self.pnl_usdt / invested) * 100 if invested > 0 else 0
+
+def round_to_step(quantity: float, step_size: float) -> float:
+    """Redondea hacia abajo al múltiplo de stepSize (LOT_SIZE)"""
+    return math.floor(quantity / step_size) * step_size
+
+# --------------------------
+# Envío en paralelo
+# --------------------------
+
+async def _exit_api_key(
+    executor,
+    strategy: SellStrategy,
+    api_key: TradingApiKey,
+    decisions: List[ExitDecision],
+    semaphore: asyncio.Semaphore,
+    step_size: float,
+    min_qty: float,
+    min_notional: float,
+    balance: Optional[Dict] = None,
+) -> List[SellFill]:
+    """
+    Todas las salidas de una API key, en serie (no compiten por el saldo). Usa el balance ya leído
+    en la evaluación del ciclo; solo lo pide a Binance si falta o después de una orden rechazada.
+    """
+    async with semaphore:
+        if not balance:
+            balance = await executor._get_balance(api_key)
+        if not balance:
+            logger.error(f"❌ [{strategy.tag}] No se pudo obtener balance para API key {api_key.id}: salidas omitidas")
+            return []
+
+        available = float(balance.get(strategy.base_asset, 0.0))
+        fills = []
+        for index, decision in enumerate(decisions):
+            price = decision.price
+            quantity = round_to_step(min(available, decision.lot.quantity), step_size)
+            if quantity < min_qty or quantity * price < min_notional:
+                logger.error(
+                    f"❌ [{strategy.tag}] {decision.lot.label}: cantidad {quantity:.8f} {strategy.base_asset} "
+                    f"(${quantity * price:.2f}) por debajo del mínimo de Binance"
+                )
+                continue
+
+            result = await executor._execute_binance_order(api_key, {
+                'symbol': strategy.symbol,
+                'side': 'SELL',
+                'type': 'MARKET',
+                'quantity': quantity,
+            })
+            if not result or not result.get('success'):
+                error_msg = result.get('msg', 'Error desconocido') if result else 'Sin respuesta de Binance'
+                error_code = result.get('code', 'N/A') if result else 'N/A'
+                message = f"❌ Error ejecutando venta de {decision.lot.label} en Binance: [{error_code}] {error_msg}"
+                logger.error(f"[{strategy.tag}] {message}")
+                if strategy.log:
+                    strategy.log(message, "ERROR", price)
+                # El rechazo puede deberse a un saldo que cambió: releerlo si quedan salidas de esta key
+                if index < len(decisions) - 1:
+                    refreshed = await executor._get_balance(api_key)
+                    if refreshed:
+                        available = float(refreshed.get(strategy.base_asset, 0.0))
+                continue
+
+            available -= quantity
+            fills.append(SellFill(decision, quantity, result))
+        return fills
+
+# --------------------------
+# Persistencia
+# --------------------------
+
+def _persist_fills(db: Session, strategy: SellStrategy, fills: List[SellFill]) -> List[TradingOrder]:
+    """SELL + cierre de lote/BUY + TradingEvent de todas las salidas en una sola transacción"""
+    sell_orders = []
+    try:
+        for fill in fills:
+            lot = fill.decision.lot
+            sell_order = TradingOrder(
+                user_id=lot.api_key.user_id,
+                api_key_id=lot.api_key.id,
+                symbol=strategy.symbol,
+                side='sell',
+                order_type='market',
+                quantity=fill.quantity,
+                price=fill.decision.price,
+                executed_price=fill.price,
+                executed_quantity=fill.quantity,
+                commission=fill.commission or None,
+                commission_asset=fill.commission_asset,
+                status='FILLED',
+                executed_at=datetime.now(),
+                binance_order_id=fill.binance_order_id,
+                pnl_usdt=fill.pnl_usdt,
+                pnl_percentage=fill.pnl_percentage,
+                reason=f"GROUP_SELL_{fill.decision.reason}" if lot.is_group else fill.decision.reason,
+            )
+            db.add(sell_order)
+            sell_orders.append(sell_order)
+            position_lots.close_lot(lot.position, fill.decision.reason, sell_order)
+            for buy_order in lot.orders:
+                buy_order.status = 'completed'
+
+        # IDs de las SELL para enlazar los eventos, sin cerrar la transacción
+        db.flush()
+
+        for fill, sell_order in zip(fills, sell_orders):
+            lot = fill.decision.lot
+            extra = {'reason': fill.decision.reason, 'buy_order_id': lot.reference.id, 'position_lot_id': lot.position.id, 'bulk': True}
+            if lot.is_group:
+                extra.update({'group_order_id': lot.reference.binance_order_id, 'group_size': len(lot.orders)})
+            db.add(trading_events.build_event(
+                event_type="ORDER_FILLED_SELL",
+                order=sell_order,
+                user_id=lot.api_key.user_id,
+                api_key_id=lot.api_key.id,
+                symbol=strategy.symbol,
+                side="SELL",
+                quantity=fill.quantity,
+                price=fill.price,
+                pnl_usdt=fill.pnl_usdt,
+                pnl_percentage=fill.pnl_percentage,
+                source='executor',
+                payload=extra,
+            ))
+
+        db.commit()
+        return sell_orders
+    except Exception:
+        db.rollback()
+        raise
+
+# --------------------------
+# Entrada
+# --------------------------
+
+@traced("bulk_exit.execute")
+async def execute_bulk_exit(
+    db: Session,
+    executor,
+    strategy: SellStrategy,
+    decisions: List[ExitDecision],
+    filters: Optional[Dict] = None,
+    concurrency: int = BULK_EXIT_CONCURRENCY,
+    balances: Optional[Dict[int, Optional[Dict]]] = None,
+) -> List[SellFill]:
+    """
+    Envía todas las SELL en paralelo y las guarda juntas. El executor aporta _get_balance,
+    _execute_binance_order y _send_sell_notification; `balances` son los del ciclo de evaluación
+    ({api_key_id: balance}). Devuelve las salidas ejecutadas.
+    """
+    if not decisions:
+        return []
+
+    step_size = (filters or {}).get('stepSize') or strategy.step_size
+    min_qty = (filters or {}).get('minQty') or strategy.min_qty
+    min_notional = (filters or {}).get('minNotional') or strategy.min_notional or MIN_NOTIONAL_USDT
+
+    by_key: Dict[int, List[ExitDecision]] = {}
+    for decision in decisions:
+        by_key.setdefault(decision.lot.api_key.id, []).append(decision)
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    api_keys = [key_decisions[0].lot.api_key for key_decisions in by_key.values()]
+    logger.info(f"🚀 [{strategy.tag}] Salida masiva: {len(decisions)} posición(es) en {len(api_keys)} API key(s)")
+
+    results = await asyncio.gather(
+        *(_exit_api_key(executor, strategy, api_key, by_key[api_key.id], semaphore, step_size, min_qty, min_notional,
+                        balance=(balances or {}).get(api_key.id))
+          for api_key in api_keys),
+        return_exceptions=True
+    )
+
+    fills: List[SellFill] = []
+    for api_key, result in zip(api_keys, results):
+        if isinstance(result, Exception):
+            # Un fallo en una API key no afecta a las demás
+            logger.error(f"❌ [{strategy.tag}] Error en salida de API key {api_key.id}: {result}")
+            continue
+        fills.extend(result)
+
+    if not fills:
+        return []
+
+    try:
+        _persist_fills(db, strategy, fills)
+    except Exception as e:
+        # Las órdenes ya se ejecutaron en Binance: la reconciliación del próximo ciclo las registrará
+        logger.error(f"❌ [{strategy.tag}] Error guardando {len(fills)} venta(s) ejecutadas: {e}")
+        return fills
+
+    for fill in fills:
+        lot = fill.decision.lot
+        scanner_state.position_closed(strategy.strategy_id, lot.api_key.id)
+        event_bus.publish(PositionClosed(
+            strategy.strategy_id, strategy.symbol, lot.api_key.id, lot.position.id, fill.decision.reason,
+            fill.quantity, fill.price, fill.pnl_usdt, fill.pnl_percentage
+        ))
+        sell_order_data = {
+            'symbol': strategy.symbol,
+            'quantity': fill.quantity,
+            'price': fill.price,
+            'total_usdt': fill.quantity * fill.price,
+            'order_id': fill.binance_order_id,
+        }
+        await executor._send_sell_notification(
+            lot.api_key, lot.reference, sell_order_data, fill.pnl_percentage / 100, fill.decision.reason, fill.pnl_usdt
+        )
+        message = (
+            f"✅ Venta ejecutada ({lot.label}): {fill.quantity:.8f} {strategy.base_asset} @ ${fill.price:,.2f} | "
+            f"PnL: ${fill.pnl_usdt:+.2f} ({fill.pnl_percentage:+.2f}%) - {fill.decision.reason}"
+        )
+        logger.info(f"[{strategy.tag}] {message}")
+        if strategy.log:
+            strategy.log(message, "SUCCESS", fill.price)
+
+    logger.info(f"✅ [{strategy.tag}] Salida masiva completada: {len(fills)}/{len(decisions)} venta(s)")
+    return fills
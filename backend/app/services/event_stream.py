@@ -0,0 +1,156 @@
+# backend/app/services/event_stream.py
+# Stream de eventos para la UI (/dashboard/stream, Server-Sent Events).
+# Cada cliente abre un stream del event bus (cola propia acotada, sin frenar a los scanners).
+# Con SCANNERS_IN_API=false los eventos nacen en app.worker: el suscriptor ui_relay del worker
+# los reenvía con pg_notify('botu_events') y cada proceso de la API los escucha con LISTEN y los
+# entrega a sus streams con event_bus.relay().
+
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from typing import AsyncIterator, Iterable, Optional
+
+from sqlalchemy import text
+
+from app.core.event_bus import (
+    event_bus, Event, CandleClosed, SignalDetected, OrderFilled, PositionClosed, LogEntry,
+)
+from app.db.database import engine
+
+logger = logging.getLogger(__name__)
+
+EVENT_STREAM_CHANNEL = "botu_events"
+EVENT_STREAM_KEEPALIVE_SECONDS = float(os.getenv("EVENT_STREAM_KEEPALIVE_SECONDS", "15"))
+EVENT_STREAM_QUEUE_SIZE = int(os.getenv("EVENT_STREAM_QUEUE_SIZE", "100"))
+# NOTIFY admite payloads de hasta 8000 bytes
+_MAX_PAYLOAD_BYTES = 7900
+
+EVENT_STREAM_TYPES = (CandleClosed, SignalDetected, OrderFilled, PositionClosed, LogEntry)
+# Eventos con api_key_id: cada usuario solo ve los de sus API keys
+_PRIVATE_TYPES = (OrderFilled, PositionClosed)
+
+def _serialize(event: Event) -> str:
+    return json.dumps(event.to_dict(), default=str)
+
+# --------------------------
+# Clientes SSE
+# --------------------------
+
+def _visible(event: Event, api_key_ids: Iterable[int]) -> bool:
+    if isinstance(event, _PRIVATE_TYPES):
+        return event.api_key_id in api_key_ids
+    return True
+
+async def stream_events(request, api_key_ids: Iterable[int]) -> AsyncIterator[str]:
+    """Generador SSE de un cliente: eventos del bus filtrados por usuario + keepalive"""
+    api_key_ids = set(api_key_ids)
+    name = f"ui_stream_{uuid.uuid4().hex[:8]}"
+    subscription = event_bus.open_stream(name, EVENT_STREAM_TYPES, maxsize=EVENT_STREAM_QUEUE_SIZE)
+    try:
+        # El navegador reintenta a los 5s si se corta la conexión
+        yield "retry: 5000\n\n"
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(subscription.next(), timeout=EVENT_STREAM_KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if _visible(event, api_key_ids):
+                yield f"event: {event.name}\ndata: {_serialize(event)}\n\n"
+    finally:
+        event_bus.unsubscribe(name)
+
+# --------------------------
+# Relay worker -> API (NOTIFY / LISTEN)
+# --------------------------
+
+def _notify(payload: str):
+    with engine.begin() as conn:
+        conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": EVENT_STREAM_CHANNEL, "payload": payload})
+
+async def relay_event(event: Event):
+    """Suscriptor ui_relay (app.worker): publica el evento para los procesos de la API"""
+    payload = _serialize(event)
+    if len(payload.encode("utf-8")) > _MAX_PAYLOAD_BYTES:
+        logger.warning(f"⚠️ [EventStream] {event.name} de {event.strategy_id} demasiado grande para NOTIFY, no se reenvía")
+        return
+    await asyncio.to_thread(_notify, payload)
+
+def subscribe_relay():
+    event_bus.subscribe("ui_relay", EVENT_STREAM_TYPES, relay_event)
+
+class EventStreamListener:
+    """
+    Hilo con una conexión propia (fuera del pool) en LISTEN botu_events: cada notificación se
+    reconstruye con Event.from_dict y va a los streams de este proceso. Se reconecta si cae.
+    """
+
+    def __init__(self, poll_seconds: float = 1.0):
+        self.poll_seconds = poll_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.received = 0
+        self.errors = 0
+
+    def _connect(self):
+        connection = engine.raw_connection()
+        connection.detach()
+        dbapi_connection = connection.driver_connection
+        dbapi_connection.autocommit = True
+        with dbapi_connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {EVENT_STREAM_CHANNEL}")
+        return dbapi_connection
+
+    def _listen(self, dbapi_connection):
+        while not self._stop.is_set():
+            if not select.select([dbapi_connection], [], [], self.poll_seconds)[0]:
+                continue
+            dbapi_connection.poll()
+            while dbapi_connection.notifies:
+                notify = dbapi_connection.notifies.pop(0)
+                try:
+                    event = Event.from_dict(json.loads(notify.payload))
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"❌ [EventStream] Notificación inválida: {e}")
+                    continue
+                if event is not None:
+                    self.received += 1
+                    event_bus.relay(event)
+
+    def _run(self):
+        while not self._stop.is_set():
+            dbapi_connection = None
+            try:
+                dbapi_connection = self._connect()
+                logger.info(f"📡 [EventStream] Escuchando {EVENT_STREAM_CHANNEL}")
+                self._listen(dbapi_connection)
+            except Exception as e:
+                self.errors += 1
+                logger.error(f"❌ [EventStream] Error en LISTEN {EVENT_STREAM_CHANNEL}: {e}")
+                self._stop.wait(5)
+            finally:
+                if dbapi_connection is not None:
+                    try:
+                        dbapi_connection.close()
+                    except Exception:
+                        pass
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="event-stream-listener", daemon=True)
+            self._thread.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join, self.poll_seconds + 1)
+            self._thread = None
+
+# Instancia global
+event_stream_listener = EventStreamListener()
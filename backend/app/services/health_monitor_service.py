@@ -2,10 +2,12 @@
 
 import asyncio
 import logging
+import math
 import psutil
-import requests
+import time
+from collections import deque
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
+from typing import Awaitable, Callable, Dict, List, Any
 from sqlalchemy.orm import Session
 import sys
 import os
@@ -13,16 +15,45 @@ import os
 # Add src path for trading modules
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'src'))
 
-from app.db.database import SessionLocal
+from app.db.database import session_scope
 from app.db import crud_alertas, crud_users
-from app.services.eth_scanner_service import eth_scanner
-from app.services.bitcoin_scanner_service import bitcoin_scanner
-from app.services.bnb_scanner_service import bnb_scanner
+from app.services.scanner_registry import get_all_scanners
+from app.core.binance_governor import binance_http, PRIORITY_DASHBOARD
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Máximo tiempo sin escanear antes de avisar, según timeframe del scanner
+MAX_SCAN_SILENCE_SECONDS = {"4h": 7200, "30m": 3600}
+
+class ProbeWindow:
+    """Ventana deslizante con los últimos resultados de un probe (latencia y errores)"""
+    
+    def __init__(self, maxlen: int = 200):
+        self._samples = deque(maxlen=maxlen)
+    
+    def record(self, latency: float, ok: bool):
+        self._samples.append((latency, ok))
+    
+    @staticmethod
+    def _percentile(sorted_values: List[float], pct: float) -> float:
+        index = min(len(sorted_values) - 1, max(0, math.ceil(pct / 100 * len(sorted_values)) - 1))
+        return sorted_values[index]
+    
+    def stats(self) -> Dict[str, Any]:
+        samples = list(self._samples)
+        if not samples:
+            return {"samples": 0, "p50_ms": None, "p99_ms": None, "error_rate": None}
+        latencies = sorted(latency for latency, _ in samples)
+        errors = sum(1 for _, ok in samples if not ok)
+        return {
+            "samples": len(samples),
+            "p50_ms": round(self._percentile(latencies, 50) * 1000, 1),
+            "p99_ms": round(self._percentile(latencies, 99) * 1000, 1),
+            "error_rate": round(errors / len(samples), 4),
+        }
+
 class HealthMonitorService:
     """
     Servicio de monitoreo de salud del servidor y scanners
@@ -36,12 +67,17 @@ class HealthMonitorService:
             "report_times": ["09:00", "21:00"],  # 9 AM y 9 PM
             "timezone": "UTC",
             "check_interval": 30 * 60,  # Verificar cada 30 minutos
+            "probe_timeout": 15,  # Segundos máximos por probe
             "admin_telegram_token": os.getenv('TELEGRAM_HEALTH_BOT_TOKEN'),
             "admin_chat_ids": []  # Se llenará dinámicamente
         }
         self.last_report_sent = None
         self.system_alerts = []
         self.max_alerts = 100
+        self.probe_windows = {name: ProbeWindow() for name in ("server", "database", "scanners", "binance_api")}
+        
+        # Primera lectura de CPU: las siguientes con interval=None miden desde aquí sin bloquear
+        psutil.cpu_percent(interval=None)
         
     def _add_system_alert(self, level: str, component: str, message: str, details: dict = None):
         """Agrega una alerta del sistema"""
@@ -133,15 +169,41 @@ class HealthMonitorService:
                 self._add_system_alert("ERROR", "HEALTH_MONITOR", f"Error en loop principal: {str(e)}")
                 await asyncio.sleep(60)  # Esperar 1 minuto antes de reintentar
     
+    async def _run_probe(self, name: str, probe: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Ejecuta un probe con timeout y registra latencia/resultado en su ventana"""
+        timeout = self.config['probe_timeout']
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(probe(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._add_system_alert("ERROR", name.upper(), f"Probe sin respuesta en {timeout}s")
+            result = {"healthy": False, "error": f"Timeout ({timeout}s)"}
+        latency = time.perf_counter() - start
+        self.probe_windows[name].record(latency, result.get('healthy', False))
+        result["probe_latency_ms"] = round(latency * 1000, 1)
+        return result
+    
+    async def collect_health(self) -> Dict[str, Any]:
+        """Ejecuta todos los probes en paralelo"""
+        probes = {
+            "server": self._check_server_health,
+            "database": self._check_database_health,
+            "scanners": self._check_scanners_health,
+            "binance_api": self._check_binance_api_health
+        }
+        results = await asyncio.gather(*(self._run_probe(name, probe) for name, probe in probes.items()))
+        return dict(zip(probes.keys(), results))
+    
+    def get_probe_stats(self) -> Dict[str, Dict[str, Any]]:
+        """p50/p99 de latencia y tasa de error de cada probe (ventana deslizante)"""
+        return {name: window.stats() for name, window in self.probe_windows.items()}
+    
     async def _check_system_health(self):
         """Verifica la salud completa del sistema"""
         try:
             health_report = {
                 "timestamp": datetime.now(),
-                "server": await self._check_server_health(),
-                "database": await self._check_database_health(),
-                "scanners": await self._check_scanners_health(),
-                "binance_api": await self._check_binance_api_health()
+                **(await self.collect_health())
             }
             
             # Detectar problemas críticos
@@ -159,10 +221,10 @@ class HealthMonitorService:
     async def _check_server_health(self) -> Dict[str, Any]:
         """Verifica salud del servidor"""
         try:
-            # CPU, RAM, Disk
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # CPU, RAM, Disk (CPU sin intervalo: uso medio desde la lectura anterior, no bloquea)
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            disk = await asyncio.to_thread(psutil.disk_usage, '/')
             
             # Verificar límites críticos
             warnings = []
@@ -188,21 +250,24 @@ class HealthMonitorService:
             self._add_system_alert("ERROR", "SERVER", f"Error verificando servidor: {str(e)}")
             return {"healthy": False, "error": str(e)}
     
-    async def _check_database_health(self) -> Dict[str, Any]:
-        """Verifica salud de la base de datos"""
-        try:
-            db = SessionLocal()
-            start_time = datetime.now()
+    def _query_database(self):
+        """Consultas síncronas del probe de DB (se ejecutan en un hilo)"""
+        from sqlalchemy import text
+        with session_scope() as db:
+            start_time = time.perf_counter()
             
             # Test básico de conexión
-            from sqlalchemy import text
             result = db.execute(text("SELECT 1")).fetchone()
-            response_time = (datetime.now() - start_time).total_seconds()
+            response_time = time.perf_counter() - start_time
             
             # Verificar tablas críticas
             alertas_count = crud_alertas.get_alertas_count(db)
-            
-            db.close()
+        return result, response_time, alertas_count
+    
+    async def _check_database_health(self) -> Dict[str, Any]:
+        """Verifica salud de la base de datos"""
+        try:
+            result, response_time, alertas_count = await asyncio.to_thread(self._query_database)
             
             healthy = result is not None and response_time < 5.0
             if not healthy:
@@ -219,35 +284,27 @@ class HealthMonitorService:
             return {"healthy": False, "error": str(e)}
     
     async def _check_scanners_health(self) -> Dict[str, Any]:
-        """Verifica salud de los 3 scanners"""
+        """Verifica salud de todos los scanners registrados"""
         try:
-            scanners_status = {
-                "bitcoin": {
-                    "running": bitcoin_scanner.is_running,
-                    "last_scan": bitcoin_scanner.last_scan_time,
-                    "alerts_count": bitcoin_scanner.alerts_count
-                },
-                "ethereum": {
-                    "running": eth_scanner.is_running,
-                    "last_scan": eth_scanner.last_scan_time,
-                    "alerts_count": eth_scanner.alerts_count
-                },
-                "bnb": {
-                    "running": bnb_scanner.is_running,
-                    "last_scan": bnb_scanner.last_scan_time,
-                    "alerts_count": bnb_scanner.alerts_count
-                }
-            }
-            
-            # Verificar problemas
+            scanners_status = {}
             issues = []
-            for name, status in scanners_status.items():
+            for key, entry in get_all_scanners().items():
+                scanner = entry["scanner"]
+                status = {
+                    "label": entry["label"],
+                    "running": scanner.is_running,
+                    "last_scan": scanner.last_scan_time,
+                    "alerts_count": getattr(scanner, "alerts_count", 0)
+                }
+                scanners_status[key] = status
+                
+                # Verificar problemas
                 if not status['running']:
-                    issues.append(f"{name} scanner detenido")
+                    issues.append(f"{entry['label']} scanner detenido")
                 elif status['last_scan']:
                     time_since_scan = (datetime.now() - status['last_scan']).total_seconds()
-                    if time_since_scan > 7200:  # Más de 2 horas sin escanear
-                        issues.append(f"{name} sin escanear por {time_since_scan/3600:.1f}h")
+                    if time_since_scan > MAX_SCAN_SILENCE_SECONDS.get(entry["timeframe"], 7200):
+                        issues.append(f"{entry['label']} sin escanear por {time_since_scan/3600:.1f}h")
             
             if issues:
                 self._add_system_alert("WARNING", "SCANNERS", f"Problemas detectados: {', '.join(issues)}")
@@ -264,9 +321,9 @@ class HealthMonitorService:
     async def _check_binance_api_health(self) -> Dict[str, Any]:
         """Verifica salud de la API de Binance"""
         try:
-            start_time = datetime.now()
-            response = requests.get("https://api.binance.com/api/v3/ping", timeout=10)
-            response_time = (datetime.now() - start_time).total_seconds()
+            start_time = time.perf_counter()
+            response = await binance_http.aget("https://api.binance.com/api/v3/ping", priority=PRIORITY_DASHBOARD, timeout=10)
+            response_time = time.perf_counter() - start_time
             
             healthy = response.status_code == 200 and response_time < 5.0
             if not healthy:
@@ -301,12 +358,7 @@ class HealthMonitorService:
         """Envía reporte programado de salud a admins"""
         try:
             # Generar reporte completo
-            health_data = {
-                "server": await self._check_server_health(),
-                "database": await self._check_database_health(),
-                "scanners": await self._check_scanners_health(),
-                "binance_api": await self._check_binance_api_health()
-            }
+            health_data = await self.collect_health()
             
             # Contar alertas recientes (últimas 12 horas)
             recent_alerts = len([a for a in self.system_alerts 
@@ -333,6 +385,11 @@ class HealthMonitorService:
         scanners_emoji = "🟢" if health_data['scanners']['healthy'] else "🔴"
         api_emoji = "🟢" if health_data['binance_api']['healthy'] else "🔴"
         
+        scanner_lines = "\n".join(
+            f"   • {status['label']}: {'🟢' if status['running'] else '🔴'} ({status['alerts_count']} alertas)"
+            for status in health_data['scanners'].get('scanners', {}).values()
+        )
+        
         message = f"""🏥 **REPORTE DE SALUD DEL SERVIDOR**
 📅 {timestamp}
 
@@ -348,9 +405,7 @@ class HealthMonitorService:
    • Total alertas: {health_data['database']['total_alerts']}
 
 🤖 **SCANNERS** {scanners_emoji}
-   • Bitcoin: {'🟢' if health_data['scanners']['scanners']['bitcoin']['running'] else '🔴'} ({health_data['scanners']['scanners']['bitcoin']['alerts_count']} alertas)
-   • Ethereum: {'🟢' if health_data['scanners']['scanners']['ethereum']['running'] else '🔴'} ({health_data['scanners']['scanners']['ethereum']['alerts_count']} alertas)
-   • BNB: {'🟢' if health_data['scanners']['scanners']['bnb']['running'] else '🔴'} ({health_data['scanners']['scanners']['bnb']['alerts_count']} alertas)
+{scanner_lines}
 
 🌐 **BINANCE API** {api_emoji}
    • Estado: {health_data['binance_api']['status_code']}
@@ -399,7 +454,8 @@ class HealthMonitorService:
             "recent_alerts": len([a for a in self.system_alerts 
                                 if (datetime.now() - datetime.fromisoformat(a['timestamp'])).total_seconds() < 24 * 3600]),
             "next_report_times": self.config['report_times'],
-            "config": self.config
+            "config": self.config,
+            "probe_stats": self.get_probe_stats()
         }
 
 # Instancia global del monitor de salud
@@ -0,0 +1,273 @@
+# backend/app/services/portfolio_cache_service.py
+# Snapshot compartido de precios y cache de balances por API key para el portfolio
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.services.price_oracle import price_oracle
+from trading_core.binance_client import BinanceClient
+
+logger = logging.getLogger(__name__)
+
+class PriceSnapshot:
+    """
+    Mapa {symbol: precio} de todo el mercado servido por el price oracle (stream para los
+    símbolos suscritos, UNA llamada bulk a /ticker/price para el resto).
+    Se comparte entre todos los usuarios; lo carga y renueva solo el loop de background (antes de
+    que venza el TTL). Los requests leen memoria: vacío = calentando, vencido se sigue sirviendo.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_stale_seconds: float = 120.0):
+        self.ttl_seconds = ttl_seconds
+        self.max_stale_seconds = max_stale_seconds
+        self._prices: Dict[str, float] = {}
+        self._updated_at: float = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self) -> bool:
+        """Renueva el snapshot desde el price oracle (bulk REST solo si hay precios vencidos)"""
+        try:
+            prices = price_oracle.get_all_prices(max_age=self.ttl_seconds)
+            if prices:
+                with self._lock:
+                    self._prices = prices
+                    self._updated_at = time.time()
+            return bool(prices)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo refrescar snapshot de precios: {e}")
+            return False
+
+    def get_prices(self) -> Dict[str, float]:
+        """Devuelve el snapshot desde memoria (vacío hasta la primera carga del loop)"""
+        with self._lock:
+            return self._prices
+
+    def is_warm(self) -> bool:
+        return bool(self._prices)
+
+    def to_usdt(self, asset: str, amount: float) -> float:
+        """Convierte una cantidad de un activo a USDT (directo o vía BTC)"""
+        if amount <= 0:
+            return 0.0
+        if asset == 'USDT':
+            return amount
+
+        prices = self.get_prices()
+        direct = prices.get(f"{asset}USDT", 0.0)
+        if direct > 0:
+            return amount * direct
+
+        # Fallback vía BTC si hay par contra BTC
+        via_btc = prices.get(f"{asset}BTC", 0.0)
+        btc_usdt = prices.get('BTCUSDT', 0.0)
+        if via_btc > 0 and btc_usdt > 0:
+            return amount * via_btc * btc_usdt
+        return 0.0
+
+    def get_status(self) -> Dict:
+        return {
+            "symbols": len(self._prices),
+            "age_seconds": round(time.time() - self._updated_at, 1) if self._updated_at else None,
+            "ttl_seconds": self.ttl_seconds,
+            # El loop de background dejó de renovarlo
+            "stale": bool(self._updated_at) and (time.time() - self._updated_at) > self.max_stale_seconds
+        }
+
+class BalanceCache:
+    """
+    Cache de balances de Binance por API key con TTL.
+    Las keys consultadas recientemente se refrescan en segundo plano para que
+    el endpoint de portfolio responda siempre desde memoria.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, idle_eviction_seconds: float = 30 * 60):
+        self.ttl_seconds = ttl_seconds
+        self.idle_eviction_seconds = idle_eviction_seconds
+        # api_key_id -> {'client', 'balances', 'fetched_at', 'last_access', 'error'}
+        self._entries: Dict[int, Dict] = {}
+        self._lock = threading.Lock()
+
+    def register(self, api_key_id: int, api_key: str, secret_key: str, testnet: bool):
+        """Registra (o reutiliza) el cliente autenticado de una API key"""
+        with self._lock:
+            entry = self._entries.get(api_key_id)
+            if entry is None or entry['client'].testnet != testnet:
+                self._entries[api_key_id] = {
+                    'client': BinanceClient(api_key, secret_key, testnet=testnet),
+                    'balances': None,
+                    'fetched_at': 0.0,
+                    'last_access': time.time(),
+                    'error': None
+                }
+
+    def is_registered(self, api_key_id: int) -> bool:
+        with self._lock:
+            return api_key_id in self._entries
+
+    def invalidate(self, api_key_id: int):
+        """Elimina la entrada (al actualizar/borrar la API key)"""
+        with self._lock:
+            self._entries.pop(api_key_id, None)
+
+    def _fetch(self, api_key_id: int) -> Optional[List[Dict]]:
+        with self._lock:
+            entry = self._entries.get(api_key_id)
+        if entry is None:
+            return None
+        try:
+            account_info = entry['client'].get_account_info()
+            balances = account_info.get('balances', []) if isinstance(account_info, dict) else []
+            # Guardar solo activos con saldo para reducir memoria
+            balances = [
+                b for b in balances
+                if float(b.get('free', 0)) > 0 or float(b.get('locked', 0)) > 0
+            ]
+            with self._lock:
+                entry['balances'] = balances
+                entry['fetched_at'] = time.time()
+                entry['error'] = None
+            return balances
+        except Exception as e:
+            with self._lock:
+                entry['error'] = str(e)
+            logger.warning(f"⚠️ No se pudo obtener balance para API key {api_key_id}: {e}")
+            return entry['balances']
+
+    def get_balances(self, api_key_id: int) -> Optional[List[Dict]]:
+        """
+        Devuelve balances cacheados sin consultar a Binance: None si la key aún no se cargó
+        (la carga y los refrescos de vencidos los hace el loop de background).
+        """
+        with self._lock:
+            entry = self._entries.get(api_key_id)
+            if entry is None:
+                return None
+            entry['last_access'] = time.time()
+            return entry['balances']
+
+    def is_loaded(self, api_key_id: int) -> bool:
+        with self._lock:
+            entry = self._entries.get(api_key_id)
+            return entry is not None and entry['fetched_at'] > 0
+
+    def refresh_stale(self):
+        """Refresca las entradas vencidas y descarta las que nadie consulta"""
+        now = time.time()
+        with self._lock:
+            for api_key_id in [k for k, e in self._entries.items() if now - e['last_access'] > self.idle_eviction_seconds]:
+                self._entries.pop(api_key_id, None)
+            stale = [k for k, e in self._entries.items() if now - e['fetched_at'] > self.ttl_seconds]
+        for api_key_id in stale:
+            self._fetch(api_key_id)
+
+    def get_status(self) -> Dict:
+        now = time.time()
+        with self._lock:
+            return {
+                "cached_keys": len(self._entries),
+                "entries": {
+                    k: {
+                        "age_seconds": round(now - e['fetched_at'], 1) if e['fetched_at'] else None,
+                        "error": e['error']
+                    } for k, e in self._entries.items()
+                }
+            }
+
+class PortfolioCacheService:
+    """
+    Fachada usada por get_user_portfolio_summary: precios compartidos + balances por key
+    con un loop de refresco en segundo plano.
+    """
+
+    def __init__(self):
+        self.refresh_interval = 20  # segundos
+        # TTL mayor que el intervalo: el loop renueva el snapshot antes de que venza
+        self.prices = PriceSnapshot(ttl_seconds=self.refresh_interval * 1.5)
+        self.balances = BalanceCache(ttl_seconds=60.0)
+        self.is_running = False
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+
+    def _request_refresh(self):
+        """Despierta el loop de background (key nueva o snapshot sin cargar) sin esperar su intervalo"""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def is_warming_up(self, api_key_ids: List[int]) -> bool:
+        """Algún dato del portfolio todavía no lo cargó el loop de background"""
+        return not self.prices.is_warm() or any(
+            self.balances.is_registered(k) and not self.balances.is_loaded(k) for k in api_key_ids
+        )
+
+    def get_balances_for_key(self, api_key_id: int, credentials_loader) -> Optional[List[Dict]]:
+        """
+        Obtiene balances de una key. `credentials_loader` solo se invoca la primera vez
+        (devuelve (api_key, secret_key, testnet) o None).
+        """
+        if not self.balances.is_registered(api_key_id):
+            creds: Optional[Tuple[str, str, bool]] = credentials_loader()
+            if not creds:
+                return None
+            api_key_str, secret_key, testnet = creds
+            self.balances.register(api_key_id, api_key_str, secret_key, testnet)
+        balances = self.balances.get_balances(api_key_id)
+        if balances is None or not self.prices.is_warm():
+            self._request_refresh()
+        return balances
+
+    def invalidate_api_key(self, api_key_id: int):
+        self.balances.invalidate(api_key_id)
+
+    async def start_background_refresh(self) -> bool:
+        """Inicia el refresco periódico de precios y balances"""
+        if self.is_running:
+            return False
+        self.is_running = True
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._refresh_loop())
+        logger.info("✅ Portfolio cache: refresco en segundo plano iniciado")
+        return True
+
+    async def stop_background_refresh(self):
+        self.is_running = False
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+
+    async def _refresh_loop(self):
+        while self.is_running:
+            # Pedidos que lleguen durante este refresco despiertan la siguiente vuelta
+            self._wake.clear()
+            try:
+                # Las llamadas HTTP son bloqueantes: ejecutarlas fuera del event loop
+                await asyncio.to_thread(self.prices.refresh)
+                await asyncio.to_thread(self.balances.refresh_stale)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"❌ Error refrescando portfolio cache: {e}")
+            # Intervalo normal, o antes si un request encontró datos sin cargar
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.refresh_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_status(self) -> Dict:
+        return {
+            "is_running": self.is_running,
+            "prices": self.prices.get_status(),
+            "balances": self.balances.get_status()
+        }
+
+# Instancia global
+portfolio_cache = PortfolioCacheService()
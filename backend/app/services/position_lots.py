@@ -0,0 +1,155 @@
+# backend/app/services/position_lots.py
+# Lotes de posición: una fila por orden BUY de Binance, creada al momento del fill con sus
+# fills como filas hijas. La evaluación de ventas lee los lotes ya agregados y no reagrupa.
+# Las BUY que llegan por otros caminos (executor legacy, scripts de recuperación, órdenes
+# separadas antiguas) se adoptan una sola vez: al arrancar y en cada ciclo de los scanners
+# (StrategyEngine.sync_position_lots), sin importar si el scanner está buscando compras.
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.db.models import PositionFill, PositionLot, TradingOrder
+
+logger = logging.getLogger(__name__)
+
+def _order_quantity(order: TradingOrder) -> float:
+    return float(order.executed_quantity or order.quantity or 0)
+
+def _order_price(order: TradingOrder) -> float:
+    return float(order.executed_price or order.price or 0)
+
+def _build_lot(strategy_id: str, orders: List[TradingOrder], fills: List[PositionFill]) -> PositionLot:
+    """Lote con totales agregados de `fills` y las BUY enlazadas"""
+    reference = orders[0]
+    opened = [o.created_at for o in orders if o.created_at]
+    quantity = sum(f.quantity for f in fills)
+    invested = sum(f.quantity * f.price for f in fills)
+    commission = sum(f.commission or 0.0 for f in fills)
+    return PositionLot(
+        user_id=reference.user_id,
+        api_key_id=reference.api_key_id,
+        strategy_id=strategy_id,
+        symbol=reference.symbol,
+        binance_order_id=reference.binance_order_id,
+        quantity=quantity,
+        invested_usdt=invested,
+        avg_price=invested / quantity if quantity > 0 else 0.0,
+        commission=commission or None,
+        commission_asset=next((f.commission_asset for f in fills if f.commission_asset), None),
+        status='OPEN',
+        opened_at=min(opened) if opened else datetime.now(),
+        orders=orders,
+        fills=fills,
+    )
+
+# --------------------------
+# Alta al momento del fill
+# --------------------------
+
+def record_buy_lot(db: Session, strategy_id: str, order: TradingOrder, binance_result: Dict) -> PositionLot:
+    """
+    Crea el lote de una BUY recién ejecutada a partir de la respuesta de Binance (un fill hijo
+    por cada fill de la orden). El llamador hace commit.
+    """
+    fills = [
+        PositionFill(
+            trade_id=str(f['tradeId']) if f.get('tradeId') is not None else None,
+            quantity=float(f.get('qty', 0)),
+            price=float(f.get('price', 0)),
+            commission=float(f.get('commission', 0)) or None,
+            commission_asset=f.get('commissionAsset'),
+        )
+        for f in binance_result.get('fills') or []
+        if float(f.get('qty', 0)) > 0
+    ]
+    if not fills:
+        # Binance no devolvió fills: un único fill con lo registrado en la orden
+        fills = [PositionFill(
+            quantity=_order_quantity(order),
+            price=_order_price(order),
+            commission=order.commission,
+            commission_asset=order.commission_asset,
+        )]
+
+    lot = _build_lot(strategy_id, [order], fills)
+    db.add(lot)
+    return lot
+
+def close_lot(lot: PositionLot, reason: str, sell_order: Optional[TradingOrder] = None):
+    """Marca el lote como cerrado (el llamador actualiza las BUY y hace commit)"""
+    lot.status = 'CLOSED'
+    lot.closed_at = datetime.now()
+    lot.close_reason = reason
+    if sell_order is not None:
+        lot.sell_order = sell_order
+
+# --------------------------
+# Sincronización (reconciliación)
+# --------------------------
+
+def adopt_orphan_orders(
+    db: Session,
+    strategy_id: str,
+    symbol: str,
+    api_key_ids: List[int],
+    reason: Optional[str] = None,
+    exclude_reasons: Iterable[str] = (),
+) -> int:
+    """
+    BUY abiertas sin lote -> un lote por orden de Binance (las filas con el mismo
+    binance_order_id, de una orden separada, quedan en el mismo lote). Una query; no commitea.
+    """
+    query = db.query(TradingOrder).filter(
+        TradingOrder.api_key_id.in_(api_key_ids),
+        TradingOrder.symbol == symbol,
+        TradingOrder.side == 'BUY',
+        TradingOrder.status == 'FILLED',
+        TradingOrder.position_lot_id.is_(None)
+    )
+    if reason:
+        query = query.filter(TradingOrder.reason == reason)
+    exclude_reasons = list(exclude_reasons)
+    if exclude_reasons:
+        query = query.filter((TradingOrder.reason.is_(None)) | (~TradingOrder.reason.in_(exclude_reasons)))
+
+    groups: Dict[tuple, List[TradingOrder]] = {}
+    for order in query.order_by(TradingOrder.api_key_id, TradingOrder.created_at).all():
+        group_key = (order.api_key_id, order.binance_order_id or f"id:{order.id}")
+        groups.setdefault(group_key, []).append(order)
+
+    for orders in groups.values():
+        fills = [
+            PositionFill(
+                quantity=_order_quantity(o),
+                price=_order_price(o),
+                commission=o.commission,
+                commission_asset=o.commission_asset,
+                created_at=o.created_at,
+            )
+            for o in orders
+        ]
+        db.add(_build_lot(strategy_id, orders, fills))
+        logger.info(f"📦 [{strategy_id}] Lote adoptado para orden {orders[0].binance_order_id or orders[0].id} ({len(orders)} fila(s))")
+    return len(groups)
+
+def close_stale_lots(db: Session, strategy_id: str, api_key_ids: List[int]) -> int:
+    """Cierra lotes abiertos cuyas BUY ya no están FILLED (cerradas por otro proceso). No commitea"""
+    stale = db.query(PositionLot).join(
+        TradingOrder, TradingOrder.position_lot_id == PositionLot.id
+    ).filter(
+        PositionLot.strategy_id == strategy_id,
+        PositionLot.api_key_id.in_(api_key_ids),
+        PositionLot.status == 'OPEN',
+        TradingOrder.status != 'FILLED'
+    ).distinct().all()
+
+    for lot in stale:
+        close_lot(lot, 'ORDER_CLOSED')
+        for order in lot.orders:
+            if order.status == 'FILLED':
+                order.status = 'completed'
+        logger.info(f"📦 [{strategy_id}] Lote {lot.id} cerrado: sus BUY ya no están abiertas")
+    return len(stale)
@@ -0,0 +1,263 @@
+# backend/app/services/price_oracle.py
+# Oráculo de precios único: un stream de Binance (miniTicker + bookTicker) mantiene en memoria
+# el último precio y su timestamp por símbolo; si el dato supera la antigüedad máxima se
+# recurre a REST (vía el gobernador de peso). Scanners, executors y rutas leen siempre de aquí.
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+import websockets
+
+from app.core.binance_governor import binance_http, PRIORITY_MARKET_DATA
+from app.core.metrics import registry, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+BINANCE_WS_BASE = os.getenv("BINANCE_WS_BASE", "wss://stream.binance.com:9443")
+BINANCE_REST_BASE = "https://api.binance.com/api/v3"
+
+# Símbolos suscritos al stream (los que operan scanners y executors)
+PRICE_ORACLE_SYMBOLS = [
+    s.strip().upper() for s in os.getenv("PRICE_ORACLE_SYMBOLS", "BTCUSDT,ETHUSDT,BNBUSDT,PAXGUSDT").split(",") if s.strip()
+]
+# Antigüedad máxima de un precio servido desde memoria; por encima se pide a REST
+PRICE_MAX_AGE_SECONDS = float(os.getenv("PRICE_MAX_AGE_SECONDS", "5"))
+
+price_reads_total = registry.register(Counter(
+    "botu_price_oracle_reads_total", "Lecturas de precio por origen del dato", ["source"]))
+price_stream_connected = registry.register(Gauge(
+    "botu_price_oracle_stream_connected", "1 si el stream de precios está conectado"))
+
+class PriceQuote:
+    __slots__ = ("price", "bid", "ask", "updated_at", "source")
+
+    def __init__(self, price: float, updated_at: float, source: str, bid: Optional[float] = None, ask: Optional[float] = None):
+        self.price = price
+        self.bid = bid
+        self.ask = ask
+        self.updated_at = updated_at
+        self.source = source
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+    def to_dict(self) -> Dict:
+        return {
+            "price": self.price,
+            "bid": self.bid,
+            "ask": self.ask,
+            "age_seconds": round(self.age, 2),
+            "source": self.source,
+        }
+
+class PriceOracle:
+    """
+    Thread-safe: el stream escribe desde el event loop y los scanners leen desde asyncio.to_thread.
+    Garantía: get_price/get_price_sync nunca devuelven un precio más viejo que `max_age`;
+    si ni el stream ni REST lo consiguen devuelven None.
+    """
+
+    def __init__(self, symbols: Iterable[str] = PRICE_ORACLE_SYMBOLS, max_age: float = PRICE_MAX_AGE_SECONDS):
+        self.symbols = [s.upper() for s in symbols]
+        self.max_age = max_age
+        self._quotes: Dict[str, PriceQuote] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.reconnects = 0
+        self.last_message_at: Optional[float] = None
+        self._bulk_refreshed_at = 0.0
+
+    # --------------------------
+    # Ciclo de vida
+    # --------------------------
+
+    async def start(self):
+        if self._task is not None and not self._task.done():
+            return
+        self._task = asyncio.create_task(self._run_stream())
+        logger.info(f"✅ Price oracle iniciado para {', '.join(self.symbols)}")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._set_connected(False)
+
+    def _stream_url(self) -> str:
+        streams = []
+        for symbol in self.symbols:
+            streams.append(f"{symbol.lower()}@miniTicker")
+            streams.append(f"{symbol.lower()}@bookTicker")
+        return f"{BINANCE_WS_BASE}/stream?streams={'/'.join(streams)}"
+
+    def _set_connected(self, connected: bool):
+        self.connected = connected
+        price_stream_connected.set(1 if connected else 0)
+
+    async def _run_stream(self):
+        """Conexión con reconexión y backoff exponencial (Binance corta cada 24 h)"""
+        backoff = 1.0
+        while True:
+            try:
+                async with websockets.connect(self._stream_url(), ping_interval=20, ping_timeout=20) as ws:
+                    self._set_connected(True)
+                    backoff = 1.0
+                    logger.info("✅ Stream de precios conectado")
+                    async for raw in ws:
+                        self._handle_message(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Stream de precios desconectado: {e}. Reintentando en {backoff:.0f}s")
+            self._set_connected(False)
+            self.reconnects += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60.0)
+
+    def _handle_message(self, raw):
+        try:
+            message = json.loads(raw)
+            data = message.get("data", message)
+            symbol = data.get("s")
+            if not symbol:
+                return
+            now = time.time()
+            self.last_message_at = now
+
+            with self._lock:
+                quote = self._quotes.get(symbol)
+                if data.get("e") == "24hrMiniTicker":
+                    price = float(data["c"])
+                    if quote is None:
+                        self._quotes[symbol] = PriceQuote(price, now, "stream")
+                    else:
+                        quote.price, quote.updated_at, quote.source = price, now, "stream"
+                elif "b" in data and "a" in data:
+                    # bookTicker: solo bid/ask; el precio sigue siendo el último negociado
+                    if quote is not None:
+                        quote.bid, quote.ask = float(data["b"]), float(data["a"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Mensaje de stream de precios ignorado: {e}")
+
+    # --------------------------
+    # Lectura
+    # --------------------------
+
+    def _fresh_quote(self, symbol: str, max_age: Optional[float]) -> Optional[PriceQuote]:
+        max_age = self.max_age if max_age is None else max_age
+        with self._lock:
+            quote = self._quotes.get(symbol)
+            if quote is not None and quote.age <= max_age:
+                return quote
+        return None
+
+    def _store_rest(self, data) -> Dict[str, float]:
+        """Guarda la respuesta de /ticker/price (un símbolo o todos) en memoria"""
+        now = time.time()
+        prices = {}
+        for ticker in (data if isinstance(data, list) else [data]):
+            try:
+                prices[ticker["symbol"]] = float(ticker["price"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        with self._lock:
+            for symbol, price in prices.items():
+                quote = self._quotes.get(symbol)
+                # Un dato fresco del stream es más reciente que cualquier respuesta REST
+                if quote is not None and quote.source == "stream" and quote.age <= self.max_age:
+                    continue
+                if quote is None:
+                    self._quotes[symbol] = PriceQuote(price, now, "rest")
+                else:
+                    quote.price, quote.updated_at, quote.source = price, now, "rest"
+        return prices
+
+    async def get_price(self, symbol: str, max_age: Optional[float] = None, priority: int = PRIORITY_MARKET_DATA) -> Optional[float]:
+        """Precio con antigüedad <= max_age: memoria si está fresco, REST si no"""
+        symbol = symbol.upper()
+        quote = self._fresh_quote(symbol, max_age)
+        if quote is not None:
+            price_reads_total.inc(source="memory")
+            return quote.price
+        try:
+            response = await binance_http.aget(
+                f"{BINANCE_REST_BASE}/ticker/price", params={"symbol": symbol}, priority=priority, timeout=10
+            )
+            response.raise_for_status()
+            price_reads_total.inc(source="rest")
+            return self._store_rest(response.json()).get(symbol)
+        except Exception as e:
+            price_reads_total.inc(source="error")
+            logger.error(f"❌ No se pudo obtener precio de {symbol}: {e}")
+            return None
+
+    def get_price_sync(self, symbol: str, max_age: Optional[float] = None, priority: int = PRIORITY_MARKET_DATA) -> Optional[float]:
+        """Igual que get_price para código síncrono (scanners en hilos)"""
+        symbol = symbol.upper()
+        quote = self._fresh_quote(symbol, max_age)
+        if quote is not None:
+            price_reads_total.inc(source="memory")
+            return quote.price
+        try:
+            response = binance_http.get(
+                f"{BINANCE_REST_BASE}/ticker/price", params={"symbol": symbol}, priority=priority, timeout=10
+            )
+            response.raise_for_status()
+            price_reads_total.inc(source="rest")
+            return self._store_rest(response.json()).get(symbol)
+        except Exception as e:
+            price_reads_total.inc(source="error")
+            logger.error(f"❌ No se pudo obtener precio de {symbol}: {e}")
+            return None
+
+    def get_quote(self, symbol: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Último dato en memoria (precio, bid/ask, antigüedad, origen) si está fresco"""
+        quote = self._fresh_quote(symbol.upper(), max_age)
+        return quote.to_dict() if quote else None
+
+    def get_all_prices(self, max_age: Optional[float] = None, priority: int = PRIORITY_MARKET_DATA) -> Dict[str, float]:
+        """
+        Mapa {symbol: precio} de todo el mercado (portfolio). Si el último bulk tiene más de
+        max_age se refresca con UNA llamada a /ticker/price; los símbolos del stream siempre ganan.
+        """
+        max_age = self.max_age if max_age is None else max_age
+        if time.time() - self._bulk_refreshed_at > max_age:
+            try:
+                response = binance_http.get(f"{BINANCE_REST_BASE}/ticker/price", priority=priority, timeout=10)
+                response.raise_for_status()
+                self._store_rest(response.json())
+                self._bulk_refreshed_at = time.time()
+                price_reads_total.inc(source="rest")
+            except Exception as e:
+                price_reads_total.inc(source="error")
+                logger.warning(f"⚠️ No se pudo refrescar precios en bloque: {e}")
+        with self._lock:
+            return {symbol: q.price for symbol, q in self._quotes.items() if q.age <= max_age}
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            quotes = {s: self._quotes[s].to_dict() for s in self.symbols if s in self._quotes}
+            tracked = len(self._quotes)
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "stream_connected": self.connected,
+            "reconnects": self.reconnects,
+            "last_message_age_seconds": round(time.time() - self.last_message_at, 2) if self.last_message_at else None,
+            "max_age_seconds": self.max_age,
+            "tracked_symbols": tracked,
+            "quotes": quotes,
+        }
+
+# Instancia global
+price_oracle = PriceOracle()
@@ -0,0 +1,259 @@
+# backend/app/services/scanner_checkpoints.py
+# Checkpoints del estado de los scanners mainnet en la tabla scanner_checkpoints: estado del bot,
+# cooldown de alertas, último escaneo y logs. Se guardan cada SCANNER_CHECKPOINT_SECONDS y al
+# apagar; al arrancar se restauran antes de iniciar los scanners, que retoman el ciclo donde
+# quedó (esperan lo que faltaba del intervalo en vez de re-escanear la misma vela).
+# Los indicadores se recalculan con las velas de cada ciclo, así que no hay más estado que guardar.
+#
+# Con worker dedicado (SCANNERS_IN_API=false) la tabla es también el canal API <-> worker: la API
+# escribe desired_running (start/stop) y el worker lo aplica; la API copia los checkpoints del
+# worker a sus scanners locales (detenidos) para servir status y logs.
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.core.response_cache import response_cache
+from app.db.database import session_scope
+from app.db.models import ScannerCheckpoint
+from app.services.scanner_registry import get_mainnet_scanners
+
+logger = logging.getLogger(__name__)
+
+SCANNER_CHECKPOINT_SECONDS = float(os.getenv("SCANNER_CHECKPOINT_SECONDS", "15"))
+# Checkpoints más viejos que esto no se restauran (el estado ya no sirve)
+SCANNER_CHECKPOINT_MAX_AGE_SECONDS = float(os.getenv("SCANNER_CHECKPOINT_MAX_AGE_SECONDS", str(24 * 3600)))
+CHECKPOINT_MAX_LOGS = 50
+
+# Atributos de los scanners que se persisten
+_DATETIME_FIELDS = ("last_scan_time", "last_alert_sent", "state_changed_at", "last_position_check")
+_VALUE_FIELDS = ("current_state", "alerts_count", "last_scan_price", "last_closed_candle")
+
+def _to_iso(value: Any) -> Optional[str]:
+    return value.isoformat() if isinstance(value, datetime) else None
+
+def _from_iso(value: Optional[str]) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+class ScannerCheckpointStore:
+    def __init__(self, interval: float = SCANNER_CHECKPOINT_SECONDS):
+        self.interval = interval
+        self.last_saved_at: Optional[datetime] = None
+        self.last_restored: List[str] = []
+        self._saved_payloads: Dict[str, str] = {}
+        # id(scanner) -> datetime del último escaneo restaurado (para retomar el ciclo una vez)
+        self._resume_from: Dict[int, datetime] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Serialización
+    # --------------------------
+
+    def _snapshot(self, scanner) -> Dict[str, Any]:
+        state = {field: _to_iso(getattr(scanner, field, None)) for field in _DATETIME_FIELDS}
+        for field in _VALUE_FIELDS:
+            state[field] = getattr(scanner, field, None)
+        state["was_running"] = bool(scanner.is_running)
+        state["scanner_logs"] = list(scanner.scanner_logs[-CHECKPOINT_MAX_LOGS:])
+        return state
+
+    def _apply(self, scanner, state: Dict[str, Any]):
+        for field in _DATETIME_FIELDS:
+            setattr(scanner, field, _from_iso(state.get(field)))
+        for field in _VALUE_FIELDS:
+            if state.get(field) is not None:
+                setattr(scanner, field, state[field])
+        logs = state.get("scanner_logs") or []
+        # Los logs generados desde el arranque van después de los restaurados
+        scanner.scanner_logs = (logs + scanner.scanner_logs)[-CHECKPOINT_MAX_LOGS:]
+
+    # --------------------------
+    # Guardar / restaurar (bloqueante: se llama en hilo aparte)
+    # --------------------------
+
+    def save_all(self) -> int:
+        """Guarda los scanners cuyo estado cambió desde el último checkpoint; devuelve cuántos"""
+        payloads = {}
+        for key, entry in get_mainnet_scanners().items():
+            try:
+                payloads[key] = json.dumps(self._snapshot(entry["scanner"]), default=str)
+            except Exception as e:
+                logger.error(f"❌ No se pudo serializar el estado de {entry['label']}: {e}")
+        with self._lock:
+            changed = {k: v for k, v in payloads.items() if self._saved_payloads.get(k) != v}
+        if not changed:
+            return 0
+
+        with session_scope() as db:
+            rows = {
+                row.scanner_key: row
+                for row in db.query(ScannerCheckpoint).filter(ScannerCheckpoint.scanner_key.in_(list(changed))).all()
+            }
+            for key, payload in changed.items():
+                row = rows.get(key)
+                if row is None:
+                    db.add(ScannerCheckpoint(scanner_key=key, state=payload))
+                else:
+                    row.state = payload
+            db.commit()
+
+        with self._lock:
+            self._saved_payloads.update(changed)
+            self.last_saved_at = datetime.now()
+        return len(changed)
+
+    def restore_all(self) -> List[str]:
+        """
+        Restaura los checkpoints en los scanners detenidos. Devuelve las claves de los que estaban
+        corriendo al guardar el checkpoint (para que quien arranca decida si los inicia).
+        """
+        scanners = get_mainnet_scanners()
+        with session_scope() as db:
+            rows = db.query(ScannerCheckpoint).filter(ScannerCheckpoint.scanner_key.in_(list(scanners))).all()
+            checkpoints = {row.scanner_key: (row.state, row.updated_at) for row in rows}
+
+        restored, were_running = [], []
+        for key, (payload, updated_at) in checkpoints.items():
+            entry = scanners[key]
+            scanner = entry["scanner"]
+            if scanner.is_running:
+                continue
+            if updated_at and (datetime.now() - updated_at).total_seconds() > SCANNER_CHECKPOINT_MAX_AGE_SECONDS:
+                logger.info(f"ℹ️ Checkpoint de {entry['label']} vencido ({updated_at}), se ignora")
+                continue
+            try:
+                state = json.loads(payload)
+                self._apply(scanner, state)
+            except Exception as e:
+                logger.error(f"❌ Checkpoint inválido para {entry['label']}: {e}")
+                continue
+            with self._lock:
+                self._saved_payloads[key] = payload
+                if scanner.last_scan_time:
+                    self._resume_from[id(scanner)] = scanner.last_scan_time
+            restored.append(key)
+            if state.get("was_running"):
+                were_running.append(key)
+
+        self.last_restored = restored
+        if restored:
+            logger.info(f"♻️ Checkpoints restaurados: {', '.join(restored)}")
+        return were_running
+
+    def resume_delay(self, scanner, scan_interval: float) -> float:
+        """
+        Segundos que el scanner debe esperar antes del primer ciclo tras restaurar un checkpoint.
+        Solo aplica una vez: un start manual posterior escanea de inmediato como siempre.
+        """
+        with self._lock:
+            last_scan = self._resume_from.pop(id(scanner), None)
+        if last_scan is None:
+            return 0.0
+        elapsed = (datetime.now() - last_scan).total_seconds()
+        return max(0.0, scan_interval - elapsed)
+
+    # --------------------------
+    # Canal API <-> worker (bloqueante: se llama en hilo aparte)
+    # --------------------------
+
+    def request_running(self, key: str, running: bool):
+        """La API pide al worker iniciar (True) o detener (False) el scanner `key`"""
+        with session_scope() as db:
+            row = db.query(ScannerCheckpoint).filter(ScannerCheckpoint.scanner_key == key).first()
+            if row is None:
+                db.add(ScannerCheckpoint(scanner_key=key, state="{}", desired_running=running))
+            else:
+                row.desired_running = running
+            db.commit()
+
+    def desired_states(self) -> Dict[str, bool]:
+        """{scanner_key: debe_correr} de los scanners con un pedido de la API"""
+        with session_scope() as db:
+            rows = db.query(ScannerCheckpoint.scanner_key, ScannerCheckpoint.desired_running).filter(
+                ScannerCheckpoint.desired_running.isnot(None)
+            ).all()
+        return {key: bool(desired) for key, desired in rows}
+
+    def mirror_all(self) -> int:
+        """
+        API sin scanners: copia a los scanners locales el último checkpoint del worker (estado,
+        is_running y logs) para que status/logs/dashboard muestren lo que corre en el worker.
+        """
+        scanners = get_mainnet_scanners()
+        with session_scope() as db:
+            rows = db.query(ScannerCheckpoint).filter(ScannerCheckpoint.scanner_key.in_(list(scanners))).all()
+            payloads = {row.scanner_key: row.state for row in rows}
+
+        mirrored = 0
+        for key, payload in payloads.items():
+            if self._saved_payloads.get(key) == payload:
+                continue
+            scanner = scanners[key]["scanner"]
+            try:
+                state = json.loads(payload)
+                scanner.scanner_logs = []
+                self._apply(scanner, state)
+                scanner.is_running = bool(state.get("was_running"))
+            except Exception as e:
+                logger.error(f"❌ Checkpoint inválido para {scanners[key]['label']}: {e}")
+                continue
+            self._saved_payloads[key] = payload
+            response_cache.bump(scanner.cache_namespace)
+            mirrored += 1
+        return mirrored
+
+    # --------------------------
+    # Checkpoint periódico
+    # --------------------------
+
+    async def _loop(self, mirror: bool):
+        sync = self.mirror_all if mirror else self.save_all
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(sync)
+            except Exception as e:
+                logger.error(f"❌ Error sincronizando checkpoints de scanners: {e}")
+
+    def start(self, mirror: bool = False):
+        """Guarda checkpoints periódicamente; con mirror (API sin scanners) en cambio los lee"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(mirror))
+            action = "Lectura de checkpoints del worker" if mirror else "Checkpoints de scanners"
+            logger.info(f"💾 {action} cada {self.interval:.0f}s")
+
+    async def stop(self, final_save: bool = True):
+        """Detiene el checkpoint periódico; con final_save guarda el último estado antes de salir"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if final_save:
+            try:
+                saved = await asyncio.to_thread(self.save_all)
+                logger.info(f"💾 Checkpoint final de scanners guardado ({saved} cambios)")
+            except Exception as e:
+                logger.error(f"❌ Error guardando checkpoint final de scanners: {e}")
+
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "interval_seconds": self.interval,
+            "running": self._task is not None and not self._task.done(),
+            "last_saved_at": self.last_saved_at.isoformat() if self.last_saved_at else None,
+            "last_restored": self.last_restored,
+            "pending_resume": len(self._resume_from),
+        }
+
+# Instancia global
+scanner_checkpoints = ScannerCheckpointStore()
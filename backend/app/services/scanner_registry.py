@@ -0,0 +1,55 @@
+# backend/app/services/scanner_registry.py
+# Registro único de los scanners mainnet activos (para dashboard, health y métricas)
+
+from typing import Any, Dict
+
+from app.core.response_cache import response_cache
+from app.core.shared_state import shared_state
+
+def get_mainnet_scanners() -> Dict[str, Dict[str, Any]]:
+    """
+    Devuelve {clave: {'scanner', 'symbol', 'timeframe', 'label'}} para cada scanner mainnet.
+    Las importaciones son locales para no crear ciclos al importar este módulo desde servicios.
+    """
+    from app.services.bitcoin_scanner_service import bitcoin_scanner
+    from app.services.eth_scanner_service import eth_scanner
+    from app.services.bnb_scanner_service import bnb_scanner
+    from app.services.paxg_scanner_service import paxg_scanner
+    from app.services.bitcoin30m_mainnet import bitcoin_30m_mainnet_scanner
+
+    return {
+        "btc_4h": {"scanner": bitcoin_scanner, "symbol": "BTCUSDT", "timeframe": "4h", "label": "BTC 4h"},
+        "eth_4h": {"scanner": eth_scanner, "symbol": "ETHUSDT", "timeframe": "4h", "label": "ETH 4h"},
+        "bnb_4h": {"scanner": bnb_scanner, "symbol": "BNBUSDT", "timeframe": "4h", "label": "BNB 4h"},
+        "paxg_4h": {"scanner": paxg_scanner, "symbol": "PAXGUSDT", "timeframe": "4h", "label": "PAXG 4h"},
+        "btc_30m": {"scanner": bitcoin_30m_mainnet_scanner, "symbol": "BTCUSDT", "timeframe": "30m", "label": "BTC 30m"},
+    }
+
+def get_all_scanners() -> Dict[str, Dict[str, Any]]:
+    """Scanners mainnet + los de testnet que siguen corriendo en el servidor (para health)"""
+    from app.services.bitcoin_scanner_30m_service import bitcoin_scanner_30m
+
+    scanners = get_mainnet_scanners()
+    scanners["btc_30m_testnet"] = {"scanner": bitcoin_scanner_30m, "symbol": "BTCUSDT", "timeframe": "30m", "label": "BTC 30m (testnet)"}
+    return scanners
+
+def deliver_log_entry(event):
+    """
+    Suscriptor scanner_logs del event bus: escribe los LogEntry de executors/motor en los logs
+    (frontend) del scanner de su estrategia. Los 4h exponen _add_log; el de 30m, add_log.
+    """
+    entry = get_mainnet_scanners().get(event.strategy_id)
+    if entry is None:
+        return
+    scanner = entry["scanner"]
+    if hasattr(scanner, "_add_log"):
+        scanner._add_log(event.level, event.message, current_price=event.current_price)
+    else:
+        scanner.add_log(event.message, event.level, current_price=event.current_price)
+
+def bump_scanner_caches():
+    """Invalida las respuestas cacheadas de todos los scanners (posiciones cambiadas por otro proceso)"""
+    for entry in get_mainnet_scanners().values():
+        response_cache.bump(entry["scanner"].cache_namespace)
+
+shared_state.watch("position_lots", bump_scanner_caches)
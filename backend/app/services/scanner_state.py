@@ -0,0 +1,117 @@
+# backend/app/services/scanner_state.py
+# Estado de los scanners en memoria: readiness (desde el mapa de suscripciones) y qué estrategias
+# tienen lotes abiertos y en qué API keys. Se actualiza con eventos (lote abierto/cerrado, cambios
+# de suscripción) para que cada ciclo de escaneo arranque sin ir a la DB; se recarga completo, en
+# un hilo, al invalidarse y cuando otro proceso abre/cierra lotes (versión "position_lots" de
+# shared_state), con POSITION_STATE_TTL_SECONDS como red de seguridad.
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Dict, List
+
+from app.core.shared_state import shared_state
+from app.db.crud_trading import get_open_positions_by_strategy
+from app.db.database import session_scope
+from app.services.strategy_subscriptions import subscription_registry
+
+logger = logging.getLogger(__name__)
+
+POSITION_STATE_TTL_SECONDS = float(os.getenv("POSITION_STATE_TTL_SECONDS", "300"))
+
+class ScannerStateCache:
+    """Thread-safe: lo actualizan executors en el event loop y lo leen scanners"""
+
+    def __init__(self, ttl_seconds: float = POSITION_STATE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        # strategy_id -> {api_key_id: lotes abiertos}
+        self._open: Dict[str, Dict[int, int]] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Carga
+    # --------------------------
+
+    def refresh(self):
+        """Recarga los lotes abiertos de todas las estrategias con una query agrupada"""
+        with session_scope() as db:
+            open_lots = get_open_positions_by_strategy(db)
+        with self._lock:
+            self._open = open_lots
+            self._loaded_at = time.time()
+
+    def invalidate(self):
+        """El próximo ensure_fresh() recarga (cambios hechos sin evento, ej. adopción de lotes)"""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    async def ensure_fresh(self):
+        """Recarga en un hilo si el estado quedó invalidado o vencido; si no, no toca la DB"""
+        if time.time() - self._loaded_at <= self.ttl_seconds:
+            return
+        try:
+            await asyncio.to_thread(self.refresh)
+        except Exception as e:
+            # Sin DB se sigue con el último estado conocido
+            logger.error(f"❌ No se pudo recargar el estado de posiciones: {e}")
+
+    def _snapshot(self) -> Dict[str, Dict[int, int]]:
+        with self._lock:
+            return self._open
+
+    # --------------------------
+    # Eventos
+    # --------------------------
+
+    def position_opened(self, strategy_id: str, api_key_id: int):
+        with self._lock:
+            keys = dict(self._open.get(strategy_id, {}))
+            keys[api_key_id] = keys.get(api_key_id, 0) + 1
+            self._open = {**self._open, strategy_id: keys}
+
+    def position_closed(self, strategy_id: str, api_key_id: int):
+        with self._lock:
+            keys = dict(self._open.get(strategy_id, {}))
+            remaining = keys.get(api_key_id, 0) - 1
+            if remaining > 0:
+                keys[api_key_id] = remaining
+            else:
+                keys.pop(api_key_id, None)
+            self._open = {**self._open, strategy_id: keys}
+
+    # --------------------------
+    # Lectura
+    # --------------------------
+
+    def open_positions(self) -> Dict[str, List[int]]:
+        """
+        {strategy_id: [api_key_id, ...]} de todas las estrategias con lotes abiertos. Los scanners
+        lo piden una vez por ciclo (después de ensure_fresh); siempre sale de memoria.
+        """
+        return {k: list(v) for k, v in self._snapshot().items() if v}
+
+    def has_open_positions(self, strategy_id: str) -> bool:
+        return bool(self._snapshot().get(strategy_id))
+
+    def open_api_key_ids(self, strategy_id: str) -> List[int]:
+        return list(self._snapshot().get(strategy_id, {}).keys())
+
+    def readiness(self, strategy_id: str, label: str) -> Dict:
+        """readiness_cache del scanner (se recalcula solo cuando cambian las suscripciones)"""
+        return subscription_registry.readiness(strategy_id, label)
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded_age_seconds": round(time.time() - self._loaded_at, 1) if self._loaded_at else None,
+                "ttl_seconds": self.ttl_seconds,
+                "open_lots": {k: {str(a): n for a, n in v.items()} for k, v in self._open.items() if v},
+            }
+
+# Instancia global
+scanner_state = ScannerStateCache()
+# Lotes abiertos/cerrados por otro proceso (workers de la API, app.worker)
+shared_state.watch("position_lots", scanner_state.refresh, max_age=POSITION_STATE_TTL_SECONDS / 2)
@@ -0,0 +1,228 @@
+# backend/app/services/sell_evaluator.py
+# Evaluación por lotes de condiciones de venta: una sola query de lotes abiertos (position_lots) con sus
+# API keys, un precio por ciclo, un balance por API key (en paralelo) y un pase vectorizado de
+# PnL/TP/SL/max-hold. Solo las posiciones que deben salir se despachan al executor.
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from sqlalchemy.orm import Session, selectinload
+
+from app.db.models import PositionLot, TradingApiKey
+from app.services.strategy_subscriptions import subscription_registry
+
+logger = logging.getLogger(__name__)
+
+class ExitRules:
+    """Take profit / stop loss como fracción y límites de tiempo de la posición"""
+
+    def __init__(self, profit_target: float, stop_loss: float, max_hold: timedelta, min_hold: timedelta = timedelta(minutes=5)):
+        self.profit_target = profit_target
+        self.stop_loss = stop_loss
+        self.max_hold = max_hold
+        self.min_hold = min_hold
+
+class SellStrategy:
+    """Lo que distingue a cada executor a la hora de evaluar ventas"""
+
+    def __init__(
+        self,
+        tag: str,
+        symbol: str,
+        base_asset: str,
+        strategy_id: str,
+        rules: ExitRules,
+        min_qty: float,
+        step_size: float,
+        min_notional: Optional[float] = None,
+        log: Optional[Callable[[str, str, float], None]] = None,
+    ):
+        self.tag = tag                        # Prefijo de logs, ej. "Bitcoin4h"
+        self.symbol = symbol
+        self.base_asset = base_asset
+        self.strategy_id = strategy_id        # Clave en strategy_subscriptions, ej. "btc_4h"
+        self.rules = rules
+        self.min_qty = min_qty
+        self.step_size = step_size            # LOT_SIZE de Binance para redondear la venta
+        self.min_notional = min_notional
+        self.log = log                        # (mensaje, nivel, precio) → logs del scanner para el frontend
+
+class OpenLot:
+    """Posición abierta: un PositionLot (una orden de Binance) con sus BUY; totales ya agregados al fill"""
+
+    def __init__(self, api_key: TradingApiKey, position: PositionLot):
+        self.api_key = api_key
+        self.position = position
+        self.orders = position.orders
+        self.reference = self.orders[0]
+        self.quantity = float(position.quantity or 0)
+        self.invested = float(position.invested_usdt or 0)
+        self.created_at = position.opened_at
+
+    @property
+    def is_group(self) -> bool:
+        return len(self.orders) > 1
+
+    @property
+    def label(self) -> str:
+        if self.is_group:
+            return f"grupo {self.reference.binance_order_id} ({len(self.orders)} partes)"
+        return f"posición {self.reference.id}"
+
+class ExitDecision:
+    def __init__(self, lot: OpenLot, reason: str, price: float, profit_pct: float, pnl_usdt: float):
+        self.lot = lot
+        self.reason = reason
+        self.price = price
+        self.profit_pct = profit_pct
+        self.pnl_usdt = pnl_usdt
+
+# --------------------------
+# Carga
+# --------------------------
+
+def load_open_lots(db: Session, strategy: SellStrategy) -> List[OpenLot]:
+    """Lotes abiertos de la estrategia en las API keys suscritas: una query (+ selectin de sus BUY)"""
+    api_key_ids = subscription_registry.get_api_key_ids(strategy.strategy_id)
+    if not api_key_ids:
+        return []
+
+    rows = db.query(PositionLot, TradingApiKey).join(
+        TradingApiKey, TradingApiKey.id == PositionLot.api_key_id
+    ).filter(
+        PositionLot.strategy_id == strategy.strategy_id,
+        PositionLot.status == 'OPEN',
+        PositionLot.api_key_id.in_(api_key_ids)
+    ).options(selectinload(PositionLot.orders)).order_by(PositionLot.api_key_id, PositionLot.opened_at).all()
+
+    return [OpenLot(api_key, position) for position, api_key in rows if position.orders]
+
+async def fetch_balances(
+    api_keys: List[TradingApiKey],
+    get_balance: Callable[[TradingApiKey], Awaitable[Optional[Dict]]]
+) -> Dict[int, Optional[Dict]]:
+    """Un balance por API key, todas en paralelo; una key que falla no afecta a las demás"""
+    results = await asyncio.gather(*(get_balance(k) for k in api_keys), return_exceptions=True)
+    balances = {}
+    for api_key, result in zip(api_keys, results):
+        if isinstance(result, Exception):
+            logger.error(f"❌ No se pudo obtener balance para API key {api_key.id}: {result}")
+            result = None
+        balances[api_key.id] = result
+    return balances
+
+# --------------------------
+# Evaluación
+# --------------------------
+
+def evaluate_lots(
+    lots: List[OpenLot],
+    price: float,
+    balances: Dict[int, Optional[Dict]],
+    strategy: SellStrategy,
+    now: Optional[datetime] = None,
+    min_qty: Optional[float] = None,
+    min_notional: Optional[float] = None,
+) -> Dict:
+    """Pase vectorizado sobre todas las posiciones. Devuelve las salidas y contadores del ciclo"""
+    now = now or datetime.now()
+    rules = strategy.rules
+    min_qty = strategy.min_qty if min_qty is None else min_qty
+    min_notional = strategy.min_notional if min_notional is None else min_notional
+
+    quantity = np.array([lot.quantity for lot in lots], dtype=float)
+    invested = np.array([lot.invested for lot in lots], dtype=float)
+    age = np.array([(now - lot.created_at).total_seconds() for lot in lots], dtype=float)
+    has_balance = np.array([balances.get(lot.api_key.id) is not None for lot in lots], dtype=bool)
+    available = np.array([(balances.get(lot.api_key.id) or {}).get(strategy.base_asset, 0.0) for lot in lots], dtype=float)
+
+    valid = (quantity > 0) & (invested > 0)
+    pnl_usdt = quantity * price - invested
+    profit_pct = np.divide(pnl_usdt, invested, out=np.zeros_like(pnl_usdt), where=invested > 0)
+
+    in_cooldown = age < rules.min_hold.total_seconds()
+    dust = available < min_qty
+    if min_notional is not None:
+        dust &= available * price < min_notional
+
+    eligible = valid & ~in_cooldown & has_balance & ~dust
+    take_profit = eligible & (profit_pct >= rules.profit_target)
+    stop_loss = eligible & ~take_profit & (profit_pct <= -rules.stop_loss)
+    max_hold = eligible & ~take_profit & ~stop_loss & (age > rules.max_hold.total_seconds())
+
+    exits = []
+    for reason, mask in (("TAKE_PROFIT", take_profit), ("STOP_LOSS", stop_loss), ("MAX_HOLD_TIME", max_hold)):
+        for i in np.flatnonzero(mask):
+            exits.append(ExitDecision(lots[i], reason, price, float(profit_pct[i]), float(pnl_usdt[i])))
+
+    return {
+        "exits": exits,
+        "invalid": [lots[i] for i in np.flatnonzero(~valid)],
+        "cooldown": int((valid & in_cooldown).sum()),
+        "missing_balance": int((valid & ~in_cooldown & ~has_balance).sum()),
+        "dust": int((valid & ~in_cooldown & has_balance & dust).sum()),
+        "invested": float(invested[valid].sum()),
+        "pnl_usdt": float(pnl_usdt[valid].sum()),
+    }
+
+async def evaluate_sell_conditions(
+    db: Session,
+    strategy: SellStrategy,
+    get_price: Callable[[], Awaitable[Optional[float]]],
+    get_balance: Callable[[TradingApiKey], Awaitable[Optional[Dict]]],
+    min_qty: Optional[float] = None,
+    min_notional: Optional[float] = None,
+) -> Dict:
+    """
+    Ciclo completo: carga, snapshot de precio y balances, pase vectorizado y logs. Devuelve también
+    los balances por API key para que la salida masiva no vuelva a pedirlos.
+    """
+    lots = load_open_lots(db, strategy)
+    if not lots:
+        return {"lots": 0, "exits": [], "balances": {}}
+
+    price = await get_price()
+    if not price:
+        logger.warning(f"⚠️ [{strategy.tag}] Sin precio de {strategy.symbol}: se omite la evaluación de ventas")
+        return {"lots": len(lots), "exits": [], "balances": {}}
+
+    api_keys = list({lot.api_key.id: lot.api_key for lot in lots}.values())
+    balances = await fetch_balances(api_keys, get_balance)
+    result = evaluate_lots(lots, price, balances, strategy, min_qty=min_qty, min_notional=min_notional)
+
+    for lot in result["invalid"]:
+        logger.error(f"❌ [{strategy.tag}] No se puede obtener precio/cantidad de entrada para {lot.label}")
+    if result["cooldown"]:
+        logger.info(f"⏳ [{strategy.tag}] {result['cooldown']} posición(es) en cooldown de {strategy.rules.min_hold}")
+    if result["missing_balance"]:
+        logger.error(f"❌ [{strategy.tag}] {result['missing_balance']} posición(es) sin balance disponible")
+    if result["dust"]:
+        logger.warning(f"⚠️ [{strategy.tag}] {result['dust']} posición(es) con balance {strategy.base_asset} insuficiente para vender")
+
+    invested = result["invested"]
+    pnl_pct = result["pnl_usdt"] / invested * 100 if invested > 0 else 0.0
+    summary = (
+        f"💰 {len(lots)} posición(es) {strategy.symbol} @ ${price:,.2f}: Invertido ${invested:.2f} | "
+        f"PnL ${result['pnl_usdt']:+.2f} ({pnl_pct:+.2f}%) | TP: {strategy.rules.profit_target*100}% | "
+        f"SL: {strategy.rules.stop_loss*100}% | Salidas: {len(result['exits'])}"
+    )
+    logger.info(f"[{strategy.tag}] {summary}")
+    if strategy.log:
+        strategy.log(summary, "INFO", price)
+
+    labels = {
+        "TAKE_PROFIT": ("🎯 TAKE PROFIT", "SUCCESS"),
+        "STOP_LOSS": ("🛑 STOP LOSS", "WARNING"),
+        "MAX_HOLD_TIME": ("⏰ MAX HOLD TIME", "WARNING"),
+    }
+    for decision in result["exits"]:
+        title, level = labels[decision.reason]
+        message = f"{title} activado para {decision.lot.label}: {decision.profit_pct*100:+.2f}%"
+        logger.info(f"[{strategy.tag}] {message}")
+        if strategy.log:
+            strategy.log(message, level, price)
+
+    return {"lots": len(lots), "exits": result["exits"], "balances": balances}
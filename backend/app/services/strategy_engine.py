@@ -0,0 +1,673 @@
+# backend/app/services/strategy_engine.py
+# Motor de ejecución único para todas las estrategias mainnet. Cada estrategia es un
+# StrategyDescriptor (símbolo, reason, reglas de salida, filtros) y sus API keys salen de strategy_subscriptions;
+# el motor comparte el pool HTTP del gobernador, la cache de credenciales (binance_account),
+# el price oracle y el manejo de sesiones (session_scope) entre todas ellas.
+
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.event_bus import event_bus, LogEntry, OrderFilled, PositionClosed, SignalDetected
+from app.core.metrics import reconcile_seconds, signal_to_order_seconds
+from app.core.shared_state import shared_state
+from app.core.tracing import tracer
+from app.db.crud_trading import create_trading_order, get_open_position_lots, update_trading_order_status
+from app.db.database import session_scope
+from app.db.models import TradingApiKey, TradingOrder
+from app.schemas.trading_schema import TradingOrderCreate
+from app.services import position_lots, trading_events
+from app.services.binance_account import binance_account
+from app.services.bulk_exit import execute_bulk_exit
+from app.services.price_oracle import price_oracle
+from app.services.scanner_state import scanner_state
+from app.services.sell_evaluator import SellStrategy, ExitRules, evaluate_sell_conditions
+from app.services.strategy_subscriptions import subscription_registry
+
+logger = logging.getLogger(__name__)
+
+class StrategyDescriptor:
+    """Todo lo que distingue a una estrategia mainnet de otra"""
+
+    def __init__(
+        self,
+        key: str,
+        tag: str,
+        label: str,
+        symbol: str,
+        base_asset: str,
+        buy_reason: str,
+        exit_rules: ExitRules,
+        min_qty: float,
+        step_size: float,
+        min_notional: Optional[float] = None,
+        scoped_by_reason: bool = False,
+        failed_reason: Optional[str] = None,
+        external_sell_reason: str = 'EXTERNAL_SELL',
+        dynamic_filters: bool = False,
+    ):
+        self.key = key                              # Clave del scanner_registry y de strategy_subscriptions, ej. "btc_4h"
+        self.tag = tag                              # Prefijo de logs, ej. "Bitcoin4h"
+        self.label = label                          # Texto para usuarios, ej. "BTC 4h"
+        self.symbol = symbol
+        self.base_asset = base_asset
+        self.buy_reason = buy_reason
+        self.exit_rules = exit_rules
+        self.min_qty = min_qty
+        self.step_size = step_size
+        self.min_notional = min_notional
+        self.scoped_by_reason = scoped_by_reason    # Posiciones propias = BUY con buy_reason (comparte símbolo con otra estrategia)
+        self.failed_reason = failed_reason          # Reason de BUY rechazada (por defecto el mensaje de Binance)
+        self.external_sell_reason = external_sell_reason
+        self.dynamic_filters = dynamic_filters      # Leer minQty/stepSize/minNotional de exchangeInfo en cada ciclo
+
+STRATEGY_DESCRIPTORS = [
+    StrategyDescriptor(
+        key='btc_4h', tag='Bitcoin4h', label='BTC 4h', symbol='BTCUSDT', base_asset='BTC',
+        buy_reason='U_PATTERN_4H',  # Diferenciar del sistema de 30m
+        exit_rules=ExitRules(profit_target=0.08, stop_loss=0.03, max_hold=timedelta(days=13)),  # TP 8% | SL 3% | 13 días
+        min_qty=0.00001, step_size=0.00001,
+        scoped_by_reason=True, failed_reason='U_PATTERN_4H_FAILED', external_sell_reason='U_PATTERN_4H_EXTERNAL_SELL',
+    ),
+    StrategyDescriptor(
+        key='eth_4h', tag='Eth4h', label='ETH 4h', symbol='ETHUSDT', base_asset='ETH',
+        buy_reason='U_PATTERN',
+        exit_rules=ExitRules(profit_target=0.08, stop_loss=0.03, max_hold=timedelta(days=13)),
+        min_qty=0.001, step_size=0.0001,
+    ),
+    StrategyDescriptor(
+        key='bnb_4h', tag='Bnb4h', label='BNB 4h', symbol='BNBUSDT', base_asset='BNB',
+        buy_reason='U_PATTERN',
+        exit_rules=ExitRules(profit_target=0.08, stop_loss=0.03, max_hold=timedelta(days=13)),
+        min_qty=0.01, step_size=0.001, min_notional=5.0, dynamic_filters=True,
+    ),
+    StrategyDescriptor(
+        key='paxg_4h', tag='Paxg4h', label='PAXG 4h', symbol='PAXGUSDT', base_asset='PAXG',
+        buy_reason='U_PATTERN',
+        exit_rules=ExitRules(profit_target=0.08, stop_loss=0.03, max_hold=timedelta(days=13)),
+        min_qty=0.001, step_size=0.0001,
+    ),
+    StrategyDescriptor(
+        key='btc_30m', tag='Mainnet30m', label='BTC 30m', symbol='BTCUSDT', base_asset='BTC',
+        buy_reason='U_PATTERN',
+        exit_rules=ExitRules(profit_target=0.04, stop_loss=0.015, max_hold=timedelta(hours=25)),  # TP 4% | SL 1.5% | 25 horas
+        min_qty=0.00001, step_size=0.00001,
+    ),
+]
+
+class StrategyEngine:
+    """
+    Ejecutor mainnet genérico: compra por señal, evaluación/ejecución de ventas por lotes y
+    reconciliación con Binance para la estrategia descrita por `descriptor`.
+    """
+
+    def __init__(self, descriptor: StrategyDescriptor):
+        self.descriptor = descriptor
+        self.environment = "mainnet"
+        self.crypto_symbol = f"{descriptor.base_asset}_{descriptor.key.split('_')[-1]}"
+        self.sell_strategy = SellStrategy(
+            tag=descriptor.tag,
+            symbol=descriptor.symbol,
+            base_asset=descriptor.base_asset,
+            strategy_id=descriptor.key,
+            rules=descriptor.exit_rules,
+            min_qty=descriptor.min_qty,
+            step_size=descriptor.step_size,
+            min_notional=descriptor.min_notional,
+            log=self._scanner_log
+        )
+        # BUY de estrategias acotadas por reason que comparten símbolo: no son lotes de esta estrategia
+        self._foreign_reasons = [
+            other.buy_reason for other in STRATEGY_DESCRIPTORS
+            if other.scoped_by_reason and other.symbol == descriptor.symbol and other.key != descriptor.key
+        ]
+
+    def _span(self, operation: str):
+        return tracer.start_span(f"{self.descriptor.key}.{operation}", **{"code.function": f"StrategyEngine.{operation}"})
+
+    def _own_orders(self, query, api_key_id: int):
+        """Filtro de órdenes de esta estrategia para una API key"""
+        query = query.filter(TradingOrder.api_key_id == api_key_id, TradingOrder.symbol == self.descriptor.symbol)
+        if self.descriptor.scoped_by_reason:
+            query = query.filter(TradingOrder.reason == self.descriptor.buy_reason)
+        return query
+
+    # --------------------------
+    # Compras
+    # --------------------------
+
+    def _get_open_position(self, db: Session, api_key_id: int) -> Optional[TradingOrder]:
+        """
+        Verifica si hay una posición abierta (orden de compra sin venta correspondiente)
+        """
+        try:
+            buy_order = self._own_orders(db.query(TradingOrder), api_key_id).filter(
+                TradingOrder.side == 'BUY',
+                TradingOrder.status == 'FILLED'
+            ).order_by(TradingOrder.created_at.desc()).first()
+
+            if buy_order:
+                # Verificar si ya tiene orden de venta correspondiente
+                sell_order = db.query(TradingOrder).filter(
+                    TradingOrder.api_key_id == api_key_id,
+                    TradingOrder.symbol == self.descriptor.symbol,
+                    TradingOrder.side == 'SELL',
+                    TradingOrder.status == 'FILLED',
+                    TradingOrder.created_at > buy_order.created_at
+                ).first()
+
+                # Si no hay orden de venta, la posición está abierta
+                if not sell_order:
+                    return buy_order
+
+            return None
+
+        except Exception as e:
+            logger.error(f"Error verificando posición abierta: {e}")
+            return None
+
+    async def execute_buy_order(self, signal: Dict, user_id: Optional[int] = None):
+        """
+        Ejecuta orden de compra basada en señal del scanner
+        """
+        d = self.descriptor
+        with self._span("execute_buy_order"):
+            try:
+                # Antes de operar, recargar lo que otro proceso cambió (ej. baja de una suscripción en la API)
+                await shared_state.sync()
+                # API keys suscritas a la estrategia (mapa en memoria, sin query)
+                subscriptions = {
+                    s.api_key_id: s for s in subscription_registry.get_subscribers(d.key)
+                    if user_id is None or s.user_id == user_id
+                }
+                if not subscriptions:
+                    logger.warning(f"No hay API keys de Mainnet habilitadas para {d.label}")
+                    return {'success': False, 'error': 'No hay API keys habilitadas'}
+
+                with session_scope() as db:
+                    api_keys = db.query(TradingApiKey).filter(TradingApiKey.id.in_(list(subscriptions))).all()
+
+                    results = []
+                    for api_key in api_keys:
+                        try:
+                            subscription = subscriptions[api_key.id]
+                            logger.info(f"[{d.tag}Executor] Intentando comprar con API key {api_key.id} | alloc_usdt={subscription.allocated_usdt}")
+                            result = await self._execute_buy_for_api_key(db, api_key, signal, subscription.allocated_usdt)
+                            if result:
+                                results.append(result)
+                        except Exception as e:
+                            logger.error(f"Error ejecutando compra para API key {api_key.id}: {e}")
+                            results.append({'success': False, 'error': str(e)})
+
+                    # Retornar el primer resultado
+                    return results[0] if results else {'success': False, 'error': 'No se ejecutaron compras'}
+
+            except Exception as e:
+                logger.error(f"Error en execute_buy_order {d.label}: {e}")
+                return {'success': False, 'error': str(e)}
+
+    async def handle_signal(self, event: SignalDetected):
+        """
+        Suscriptor executor_<estrategia> del event bus: coloca las órdenes de la señal en cuanto se
+        publica (sin esperar las alertas del scanner) y le devuelve el resultado con set_outcome.
+        """
+        result = None
+        try:
+            result = await self.execute_buy_order(event.signal)
+            signal_to_order_seconds.observe(time.time() - event.created_at, scanner=event.source or self.descriptor.key)
+        finally:
+            event.set_outcome(result)
+
+    async def _execute_buy_for_api_key(self, db: Session, api_key: TradingApiKey, signal: Dict, allocated_usdt: float):
+        """
+        Ejecuta compra para una API key específica - SOLO si no tiene posición abierta
+        """
+        d = self.descriptor
+        try:
+            # Verificar que tenga asignación de USDT
+            if allocated_usdt <= 0:
+                logger.warning(f"API key {api_key.id} no tiene USDT asignado para {d.label} Mainnet")
+                return {'success': False, 'error': 'No hay USDT asignado'}
+
+            # VERIFICAR SI YA TIENE UNA POSICIÓN ABIERTA
+            open_position = self._get_open_position(db, api_key.id)
+            if open_position:
+                logger.info(f"API key {api_key.id} ya tiene una posición abierta (ID: {open_position.id}) - Saltando nueva compra")
+                # Devolver mensaje explícito para que el scanner lo muestre
+                return {'success': False, 'msg': 'position_open'}
+
+            # Un solo /account: saldo USDT para la compra y BNB para comisiones
+            balance = await self._get_balance(api_key)
+            if not balance or balance.get('USDT', 0) < allocated_usdt:
+                logger.warning(f"Balance insuficiente para API key {api_key.id}: {balance}")
+                return {'success': False, 'error': 'Balance insuficiente'}
+
+            bnb_balance = balance.get('BNB', 0.0)
+            if bnb_balance > 0.1:  # Al menos 0.1 BNB para comisiones
+                logger.info(f"✅ [{d.tag}Executor] API key {api_key.id} tiene {bnb_balance:.3f} BNB - Comisiones optimizadas")
+            else:
+                logger.warning(f"⚠️ [{d.tag}Executor] API key {api_key.id} tiene poco BNB ({bnb_balance:.3f}) - Considera agregar más para comisiones más baratas")
+
+            # Monto a invertir en USDT (usaremos quoteOrderQty en MARKET)
+            entry_price = signal['entry_price']
+            quote_usdt = float(allocated_usdt)
+
+            # Crear orden en DB (PENDING)
+            new_order = create_trading_order(
+                db,
+                TradingOrderCreate(
+                    api_key_id=api_key.id,
+                    alerta_id=None,
+                    symbol=d.symbol,
+                    side='BUY',
+                    order_type='MARKET',
+                    quantity=0.0,  # se definirá por ejecución (quoteOrderQty)
+                    price=None,
+                    take_profit_price=None,
+                    stop_loss_price=None,
+                    reason=d.buy_reason
+                ),
+                user_id=api_key.user_id
+            )
+
+            # Ejecutar orden en Binance
+            logger.info(f"[{d.tag}Executor] Preparando orden BUY (quote): total={quote_usdt:.2f} USDT")
+            binance_result = await self._execute_binance_order(api_key, {
+                'symbol': d.symbol,
+                'side': 'BUY',
+                'type': 'MARKET',
+                'quoteOrderQty': quote_usdt
+            })
+
+            if binance_result and binance_result.get('success'):
+                exec_price, executed_qty, commission, commission_asset = self._parse_buy_fills(binance_result, entry_price)
+                order_id = str(binance_result.get('orderId')) if binance_result.get('orderId') else None
+
+                filled_order = update_trading_order_status(
+                    db,
+                    order_id=new_order.id,
+                    status=binance_result.get('status', 'FILLED'),
+                    binance_order_id=order_id,
+                    executed_price=exec_price,
+                    executed_quantity=executed_qty,
+                    commission=commission,
+                    commission_asset=commission_asset,
+                    reason=d.buy_reason
+                )
+                # Lote de la posición con los fills de Binance como filas hijas (lo que leen las ventas)
+                if filled_order and executed_qty > 0:
+                    try:
+                        position_lots.record_buy_lot(db, d.key, filled_order, binance_result)
+                        db.commit()
+                        scanner_state.position_opened(d.key, api_key.id)
+                    except Exception as lot_err:
+                        # Queda como BUY sin lote: sync_position_lots la adopta en el próximo ciclo del scanner
+                        db.rollback()
+                        logger.error(f"⚠️ Error registrando lote de BUY {new_order.id}: {lot_err}")
+                await self._send_buy_notification(api_key, {
+                    'quantity': executed_qty,
+                    'price': exec_price,
+                    'total_usdt': quote_usdt,
+                    'signal_data': {
+                        'signal_strength': signal.get('signal_strength', 0),
+                        'pattern_depth': signal.get('depth', 0),
+                        'atr': signal.get('atr', 0),
+                        'dynamic_factor': signal.get('dynamic_factor', 1.0)
+                    }
+                }, binance_result)
+                logger.info(f"✅ BUY FILLED db_id={new_order.id} binance_id={order_id} qty={executed_qty:.8f} @ {exec_price:.2f}")
+                # Publicar evento BUY_FILLED
+                try:
+                    trading_events.publish_order_filled_buy(
+                        order=db.query(TradingOrder).filter(TradingOrder.id == new_order.id).first(),
+                        symbol=d.symbol,
+                        quantity=executed_qty,
+                        price=exec_price,
+                        total_usdt=quote_usdt,
+                        source='executor',
+                        extra={'binance_order_id': order_id}
+                    )
+                except Exception as pub_err:
+                    logger.error(f"⚠️ Error publicando evento BUY_FILLED: {pub_err}")
+                event_bus.publish(OrderFilled(
+                    d.key, d.symbol, 'BUY', new_order.id, api_key.id, executed_qty, exec_price, quote_usdt
+                ))
+
+                return {
+                    'success': True,
+                    'order_id': new_order.id,
+                    'binance_order_id': order_id,
+                    'quantity': executed_qty,
+                    'price': exec_price,
+                    'total_usdt': quote_usdt
+                }
+
+            failed_reason = d.failed_reason or binance_result.get('msg', 'BINANCE_ORDER_FAILED')
+            update_trading_order_status(db, order_id=new_order.id, status=binance_result.get('status', 'REJECTED'), reason=failed_reason)
+            logger.error(f"❌ Error ejecutando orden en Binance para API key {api_key.id}: {binance_result}")
+            return {
+                'success': False,
+                'error': binance_result.get('msg', 'Error ejecutando orden en Binance')
+            }
+
+        except Exception as e:
+            logger.error(f"Error en _execute_buy_for_api_key: {e}")
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def _parse_buy_fills(self, binance_result: Dict, entry_price: float) -> Tuple[float, float, Optional[float], Optional[str]]:
+        """(precio promedio ponderado, cantidad, comisión, activo de comisión) de una BUY ejecutada"""
+        executed_qty = float(binance_result.get('executedQty', 0.0))
+        fills = binance_result.get('fills', [])
+        if len(fills) > 1:
+            total_qty = sum(float(f.get('qty', 0)) for f in fills)
+            total_value = sum(float(f.get('qty', 0)) * float(f.get('price', 0)) for f in fills)
+            total_commission = sum(float(f.get('commission', 0)) for f in fills)
+            commission_asset = next((f.get('commissionAsset') for f in fills if f.get('commissionAsset')), None)
+            exec_price = total_value / total_qty if total_qty > 0 else entry_price
+            logger.info(f"📊 Orden ejecutada en {len(fills)} partes: {executed_qty:.8f} {self.descriptor.base_asset} @ precio promedio ${exec_price:.2f}")
+            return exec_price, executed_qty, (total_commission if total_commission > 0 else None), commission_asset
+
+        exec_price = float(fills[0].get('price', entry_price)) if fills else entry_price
+        commission = float(fills[0].get('commission', 0.0)) if fills else None
+        commission_asset = fills[0].get('commissionAsset', None) if fills else None
+        return exec_price, executed_qty, commission, commission_asset
+
+    # --------------------------
+    # Binance
+    # --------------------------
+
+    async def _get_balance(self, api_key: TradingApiKey) -> Optional[Dict]:
+        """
+        Balance de la API key (USDT, activo base y BNB para comisiones)
+        """
+        with self._span("get_balance"):
+            return await binance_account.get_balances(api_key.id, ('USDT', self.descriptor.base_asset, 'BNB'))
+
+    async def _execute_binance_order(self, api_key: TradingApiKey, order_data: Dict) -> Optional[Dict]:
+        """
+        Ejecuta orden MARKET en Binance
+        """
+        with self._span("binance_order"):
+            return await binance_account.place_order(api_key.id, order_data)
+
+    async def _get_current_price(self) -> Optional[float]:
+        """
+        Obtiene precio actual desde el price oracle
+        """
+        return await price_oracle.get_price(self.descriptor.symbol)
+
+    # --------------------------
+    # Ventas
+    # --------------------------
+
+    async def check_and_execute_sell_orders(self):
+        """
+        Verifica y ejecuta órdenes de venta pendientes.
+        Evaluación por lotes (sell_evaluator): un precio y un balance por API key por ciclo.
+        """
+        d = self.descriptor
+        try:
+            with session_scope() as db:
+                # Paso 0: reconciliar con Binance antes de decidir ventas, para no operar sobre estado desfasado
+                with reconcile_seconds.time(strategy=d.key):
+                    await self._reconcile_with_binance(db)
+
+                # Filtros de Binance una vez por ciclo (no por posición)
+                filters = await binance_account.get_exchange_filters(d.symbol) if d.dynamic_filters else None
+
+                cycle = await evaluate_sell_conditions(
+                    db, self.sell_strategy, self._get_current_price, self._get_balance,
+                    min_qty=filters.get('minQty') if filters else None,
+                    min_notional=filters.get('minNotional') if filters else None
+                )
+
+                # Todas las salidas del ciclo en paralelo y guardadas en una sola transacción
+                await execute_bulk_exit(
+                    db, self, self.sell_strategy, cycle['exits'], filters=filters, balances=cycle['balances']
+                )
+
+                if cycle['lots'] > 0:
+                    logger.info(f"🔍 [{d.tag}] Monitoreando {cycle['lots']} posición(es) activa(s) para venta")
+                else:
+                    logger.info(f"🔍 [{d.tag}] No hay posiciones activas para monitorear")
+
+        except Exception as e:
+            logger.error(f"Error en check_and_execute_sell_orders [{d.tag}]: {e}")
+
+    def _sync_lots(self, db: Session) -> int:
+        """
+        Mantiene position_lots al día: adopta BUY sin lote (anteriores a los lotes, o cuyo
+        record_buy_lot falló) y cierra lotes cuyas BUY cerró otro proceso. Devuelve cuántos cambió.
+        """
+        d = self.descriptor
+        api_key_ids = subscription_registry.get_api_key_ids(d.key)
+        if not api_key_ids:
+            return 0
+        try:
+            adopted = position_lots.adopt_orphan_orders(
+                db, d.key, d.symbol, api_key_ids,
+                reason=d.buy_reason if d.scoped_by_reason else None,
+                exclude_reasons=self._foreign_reasons
+            )
+            closed = position_lots.close_stale_lots(db, d.key, api_key_ids)
+            if adopted or closed:
+                db.commit()
+                scanner_state.invalidate()
+            return adopted + closed
+        except Exception as lot_err:
+            db.rollback()
+            logger.error(f"[Reconcile] Error sincronizando lotes {d.key}: {lot_err}")
+            return 0
+
+    async def sync_position_lots(self) -> int:
+        """
+        Sincronización de lotes para el scanner, en cada ciclo y sin importar su estado: una BUY sin
+        lote no cuenta como posición abierta, así que esperar a MONITORING_SELL la dejaría sin ventas.
+        """
+        def _sync() -> int:
+            with session_scope() as db:
+                return self._sync_lots(db)
+
+        try:
+            # Queries de adopción/cierre en un hilo: el event loop sigue atendiendo a los demás scanners
+            return await asyncio.to_thread(_sync)
+        except Exception as e:
+            logger.error(f"Error en sync_position_lots [{self.descriptor.tag}]: {e}")
+            return 0
+
+    async def _reconcile_with_binance(self, db: Session):
+        """
+        Mantiene position_lots al día (_sync_lots) y sincroniza órdenes SELL ejecutadas en Binance
+        que no existen en la DB local (EXTERNAL_SELL).
+        """
+        d = self.descriptor
+        try:
+            api_key_ids = subscription_registry.get_api_key_ids(d.key)
+            if not api_key_ids:
+                return
+
+            self._sync_lots(db)
+
+            # Lotes abiertos de todas las keys en una query
+            open_lots: Dict[int, list] = {}
+            for lot in get_open_position_lots(db, d.key, api_key_ids):
+                open_lots.setdefault(lot.api_key_id, []).append(lot)
+            if not open_lots:
+                return
+
+            api_keys = db.query(TradingApiKey).filter(TradingApiKey.id.in_(list(open_lots))).all()
+
+            for api_key in api_keys:
+                try:
+                    trades = await binance_account.get_my_trades(api_key.id, d.symbol)
+                    if trades is None:
+                        continue
+
+                    for lot in open_lots[api_key.id]:
+                        # Buscar trade SELL posterior a la apertura del lote
+                        opened_ms = int(lot.opened_at.timestamp() * 1000) if lot.opened_at else 0
+                        matching_sell_trade = next((
+                            t for t in trades
+                            if t.get('isBuyer') is False and t.get('symbol') == d.symbol and int(t.get('time', 0)) > opened_ms
+                        ), None)
+                        if not matching_sell_trade:
+                            continue
+
+                        sell_qty = float(matching_sell_trade.get('qty', 0.0))
+                        sell_price = float(matching_sell_trade.get('price', 0.0))
+                        new_sell = create_trading_order(db, TradingOrderCreate(
+                            api_key_id=api_key.id,
+                            symbol=d.symbol,
+                            side='sell',
+                            order_type='market',
+                            quantity=sell_qty,
+                            price=sell_price
+                        ), api_key.user_id)
+                        new_sell.status = 'FILLED'
+                        new_sell.binance_order_id = str(matching_sell_trade.get('orderId', ''))
+                        new_sell.executed_price = sell_price
+                        new_sell.executed_quantity = sell_qty
+                        new_sell.reason = d.external_sell_reason
+                        # Cerrar lote y sus BUY locales - usar estado consistente con Binance
+                        position_lots.close_lot(lot, d.external_sell_reason, new_sell)
+                        for buy in lot.orders:
+                            buy.status = 'COMPLETED'
+                        db.commit()
+                        scanner_state.position_closed(d.key, api_key.id)
+
+                        buy_order_id = lot.orders[0].id if lot.orders else None
+                        logger.info(f"[Reconcile] SELL externo sincronizado: lot_id={lot.id} buy_id={buy_order_id} sell_id={new_sell.id} qty={sell_qty} @ {sell_price}")
+                        try:
+                            trading_events.publish_order_filled_sell(
+                                order=new_sell,
+                                symbol=d.symbol,
+                                quantity=sell_qty,
+                                price=sell_price,
+                                pnl_usdt=None,
+                                pnl_percentage=None,
+                                source='reconciliation',
+                                extra={'external': True, 'buy_order_id': buy_order_id, 'position_lot_id': lot.id}
+                            )
+                        except Exception as pub_err:
+                            logger.error(f"⚠️ Error publicando evento SELL_FILLED (reconcile): {pub_err}")
+                        event_bus.publish(PositionClosed(
+                            d.key, d.symbol, api_key.id, lot.id, d.external_sell_reason, sell_qty, sell_price
+                        ))
+                        self._scanner_log(
+                            f"🔄 Sincronizado SELL externo desde Binance: {sell_qty:.8f} {d.base_asset} @ ${sell_price:,.2f}",
+                            "INFO",
+                            sell_price
+                        )
+
+                except Exception as inner:
+                    db.rollback()
+                    logger.error(f"[Reconcile] Error con API key {api_key.id}: {inner}")
+
+        except Exception as e:
+            logger.error(f"[Reconcile] Error general: {e}")
+
+    # --------------------------
+    # Logs y notificaciones
+    # --------------------------
+
+    def _scanner_log(self, message: str, level: str, current_price: float):
+        """Log visible en el frontend del scanner de la estrategia (lo entrega el suscriptor scanner_logs)"""
+        event_bus.publish(LogEntry(self.descriptor.key, message, level, current_price))
+
+    async def _send_buy_notification(self, api_key: TradingApiKey, order_data: Dict, binance_result: Dict):
+        """
+        Envía notificación de compra por Telegram
+        """
+        d = self.descriptor
+        try:
+            message = f"""
+💰 **COMPRA {d.label} MAINNET EJECUTADA**
+
+📊 **Detalles de la operación:**
+• Cantidad: {order_data['quantity']:.6f} {d.base_asset}
+• Precio: ${order_data['price']:.2f}
+• Total: ${order_data['total_usdt']:.2f} USDT
+• Orden ID: {binance_result.get('orderId', 'N/A')}
+
+🎯 **Señal del scanner:**
+• Fuerza: {order_data['signal_data']['signal_strength']:.3f}
+• Profundidad: {order_data['signal_data']['pattern_depth']*100:.2f}%
+• ATR: {order_data['signal_data']['atr']:.2f}
+
+⚠️ **AMBIENTE MAINNET - DINERO REAL**
+            """
+
+            # await send_telegram_message(api_key.user_id, message)
+            logger.info(f"📱 Notificación Telegram Mainnet: {message}")
+
+        except Exception as e:
+            logger.error(f"Error enviando notificación Mainnet: {e}")
+
+    async def _send_sell_notification(self, api_key: TradingApiKey, buy_order: TradingOrder, sell_order_data: Dict, profit_pct: float, reason: str, pnl_usdt: float = None):
+        """
+        Envía notificación de venta por Telegram
+        """
+        d = self.descriptor
+        try:
+            emoji = "💰" if profit_pct > 0 else "📉"
+
+            # Usar PnL preciso si está disponible
+            pnl_display = f"${pnl_usdt:+.2f} ({profit_pct*100:+.2f}%)" if pnl_usdt is not None else f"{profit_pct*100:+.2f}%"
+
+            message = f"""
+{emoji} **VENTA {d.label} MAINNET EJECUTADA**
+
+📊 **Resultado de la operación:**
+• Ganancia/Pérdida: {pnl_display}
+• Precio de venta: ${sell_order_data['price']:.2f}
+• Cantidad: {sell_order_data['quantity']:.6f} {d.base_asset}
+• Total: ${sell_order_data['total_usdt']:.2f} USDT
+• Razón: {reason}
+
+🎯 **Resumen:**
+• Precio entrada: ${buy_order.executed_price or buy_order.price:.2f}
+• Precio salida: ${sell_order_data['price']:.2f}
+• Orden ID: {sell_order_data.get('order_id', 'N/A')}
+
+⚠️ **AMBIENTE MAINNET - DINERO REAL**
+            """
+
+            # await send_telegram_message(api_key.user_id, message)
+            logger.info(f"📱 Notificación Telegram Mainnet: {message}")
+
+        except Exception as e:
+            logger.error(f"Error enviando notificación de venta Mainnet: {e}")
+
+# Instancias globales: un motor por estrategia, compartido por scanners y rutas
+strategy_engines: Dict[str, StrategyEngine] = {d.key: StrategyEngine(d) for d in STRATEGY_DESCRIPTORS}
+
+def get_strategy_engine(key: str) -> StrategyEngine:
+    return strategy_engines[key]
+
+def subscribe_executors():
+    """Un suscriptor de SignalDetected por estrategia: una compra lenta de BTC no retrasa la de ETH"""
+    for key, engine in strategy_engines.items():
+        event_bus.subscribe(f"executor_{key}", [SignalDetected], engine.handle_signal, strategy_id=key)
+
+def sync_all_position_lots() -> int:
+    """
+    Adopción de BUY sin lote de todas las estrategias (bloqueante: al arrancar, en hilo aparte),
+    para que los scanners restaurados vean sus posiciones desde el primer ciclo.
+    """
+    changed = 0
+    for key, engine in strategy_engines.items():
+        try:
+            with session_scope() as db:
+                changed += engine._sync_lots(db)
+        except Exception as e:
+            logger.error(f"❌ Error sincronizando lotes {key}: {e}")
+    if changed:
+        logger.info(f"📦 Lotes sincronizados al arrancar: {changed}")
+    return changed
@@ -0,0 +1,258 @@
+# backend/app/services/strategy_subscriptions.py
+# Suscripciones API key ↔ estrategia (tabla strategy_subscriptions) y su mapa en memoria.
+# Readiness de scanners y executors leen el mapa; se recarga al cambiar una suscripción o
+# una API key, en este proceso al instante y en los demás con la versión "subscriptions" de
+# shared_state (SUBSCRIPTIONS_TTL_SECONDS queda como red de seguridad).
+# Las columnas *_enabled / *_allocated_usdt de TradingApiKey se mantienen como espejo para la UI.
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.shared_state import shared_state
+from app.db.database import session_scope
+from app.db.models import StrategySubscription, TradingApiKey
+
+logger = logging.getLogger(__name__)
+
+SUBSCRIPTIONS_TTL_SECONDS = float(os.getenv("SUBSCRIPTIONS_TTL_SECONDS", "60"))
+
+# strategy_id -> (columna enabled, columna allocated_usdt) heredadas de TradingApiKey
+LEGACY_COLUMNS = {
+    'btc_4h': ('btc_4h_mainnet_enabled', 'btc_4h_mainnet_allocated_usdt'),
+    'eth_4h': ('eth_4h_mainnet_enabled', 'eth_4h_mainnet_allocated_usdt'),
+    'bnb_4h': ('bnb_4h_mainnet_enabled', 'bnb_4h_mainnet_allocated_usdt'),
+    'paxg_4h': ('paxg_4h_mainnet_enabled', 'paxg_4h_mainnet_allocated_usdt'),
+    'btc_30m': ('btc_30m_mainnet_enabled', 'btc_30m_mainnet_allocated_usdt'),
+}
+
+# Valor de `crypto` en /trading/crypto-allocation y /trading/enable-crypto -> strategy_id
+CRYPTO_TO_STRATEGY = {
+    'btc_4h_mainnet': 'btc_4h',
+    'eth_4h_mainnet': 'eth_4h',
+    'bnb_4h_mainnet': 'bnb_4h',
+    'paxg_4h_mainnet': 'paxg_4h',
+    'btc_30m_mainnet': 'btc_30m',
+}
+
+class Subscription:
+    """Copia inmutable de una suscripción habilitada (se comparte entre hilos)"""
+    __slots__ = ("api_key_id", "user_id", "strategy_id", "allocated_usdt", "params")
+
+    def __init__(self, api_key_id: int, user_id: int, strategy_id: str, allocated_usdt: float, params: Dict):
+        self.api_key_id = api_key_id
+        self.user_id = user_id
+        self.strategy_id = strategy_id
+        self.allocated_usdt = allocated_usdt
+        self.params = params
+
+    def to_dict(self) -> Dict:
+        return {
+            "api_key_id": self.api_key_id,
+            "user_id": self.user_id,
+            "strategy_id": self.strategy_id,
+            "allocated_usdt": self.allocated_usdt,
+            "params": self.params,
+        }
+
+def _parse_params(raw: Optional[str]) -> Dict:
+    try:
+        return json.loads(raw) if raw else {}
+    except (TypeError, ValueError):
+        return {}
+
+class SubscriptionRegistry:
+    """
+    Mapa {strategy_id: {api_key_id: Subscription}} de suscripciones habilitadas en API keys
+    mainnet activas. Thread-safe: lo leen scanners en hilos y executors en el event loop.
+    """
+
+    def __init__(self, ttl_seconds: float = SUBSCRIPTIONS_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._by_strategy: Dict[str, Dict[int, Subscription]] = {}
+        # (strategy_id, label) -> readiness; se vacía en cada recarga del mapa
+        self._readiness: Dict[tuple, Dict] = {}
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+
+    # --------------------------
+    # Carga
+    # --------------------------
+
+    def refresh(self):
+        """Recarga el mapa completo con UNA query (usa el índice strategy_id/enabled)"""
+        with session_scope() as db:
+            rows = db.query(StrategySubscription, TradingApiKey.user_id).join(
+                TradingApiKey, TradingApiKey.id == StrategySubscription.api_key_id
+            ).filter(
+                StrategySubscription.enabled == True,
+                TradingApiKey.is_active == True,
+                TradingApiKey.is_testnet == False
+            ).all()
+
+        by_strategy: Dict[str, Dict[int, Subscription]] = {}
+        for sub, user_id in rows:
+            by_strategy.setdefault(sub.strategy_id, {})[sub.api_key_id] = Subscription(
+                sub.api_key_id, user_id, sub.strategy_id, float(sub.allocated_usdt or 0.0), _parse_params(sub.params)
+            )
+        with self._lock:
+            self._by_strategy = by_strategy
+            self._readiness = {}
+            self._loaded_at = time.time()
+        logger.info(f"🔄 Suscripciones recargadas: {', '.join(f'{k}={len(v)}' for k, v in sorted(by_strategy.items())) or 'ninguna'}")
+
+    def invalidate(self):
+        """Marca el mapa como vencido: la próxima lectura recarga"""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def _snapshot(self) -> Dict[str, Dict[int, Subscription]]:
+        # Con shared_state corriendo la recarga llega antes desde su hilo; esto cubre invalidate()
+        if time.time() - self._loaded_at > self.ttl_seconds:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Sin DB se sigue con el último mapa conocido
+                logger.error(f"❌ No se pudieron recargar suscripciones: {e}")
+        with self._lock:
+            return self._by_strategy
+
+    # --------------------------
+    # Lectura
+    # --------------------------
+
+    def get_subscribers(self, strategy_id: str) -> List[Subscription]:
+        return list(self._snapshot().get(strategy_id, {}).values())
+
+    def get_api_key_ids(self, strategy_id: str) -> List[int]:
+        return list(self._snapshot().get(strategy_id, {}).keys())
+
+    def get(self, strategy_id: str, api_key_id: int) -> Optional[Subscription]:
+        return self._snapshot().get(strategy_id, {}).get(api_key_id)
+
+    def readiness(self, strategy_id: str, label: str) -> Dict:
+        """Mismo formato que el readiness_cache de los scanners, sin tocar la DB"""
+        snapshot = self._snapshot()
+        with self._lock:
+            cached = self._readiness.get((strategy_id, label))
+        if cached is not None:
+            return dict(cached)
+
+        subscribers = list(snapshot.get(strategy_id, {}).values())
+        allocated_ok = any(s.allocated_usdt > 0 for s in subscribers)
+        reasons = []
+        if not subscribers:
+            reasons.append(f'sin claves mainnet habilitadas para {label}')
+        if not allocated_ok:
+            reasons.append(f'asignación {label} USDT=0')
+        readiness = {
+            'auto_ready': bool(subscribers) and allocated_ok,
+            'enabled_keys': len(subscribers),
+            'allocated_ok': allocated_ok,
+            'balance_ok': allocated_ok,  # proxy
+            'reasons': reasons
+        }
+        with self._lock:
+            if self._by_strategy is snapshot:
+                self._readiness[(strategy_id, label)] = readiness
+        return dict(readiness)
+
+    # --------------------------
+    # Escritura
+    # --------------------------
+
+    def set_subscription(
+        self,
+        db: Session,
+        api_key: TradingApiKey,
+        strategy_id: str,
+        enabled: bool,
+        allocated_usdt: Optional[float] = None,
+        params: Optional[Dict] = None,
+    ) -> StrategySubscription:
+        """Alta/actualización de una suscripción (y su espejo en columnas legacy). Hace commit y recarga"""
+        sub = self._upsert(db, api_key, strategy_id, enabled, allocated_usdt, params)
+        db.commit()
+        self.refresh()
+        return sub
+
+    def sync_from_api_key(self, db: Session, api_key: TradingApiKey):
+        """Copia las columnas legacy de la API key a sus suscripciones (alta/edición desde la API vieja)"""
+        if api_key.is_testnet:
+            # Las estrategias mainnet no operan con keys testnet; el mapa ya las excluye
+            self.invalidate()
+            return
+        for strategy_id, (enabled_column, allocated_column) in LEGACY_COLUMNS.items():
+            enabled = bool(getattr(api_key, enabled_column, False))
+            allocated = float(getattr(api_key, allocated_column, 0.0) or 0.0)
+            exists = db.query(StrategySubscription.id).filter(
+                StrategySubscription.api_key_id == api_key.id,
+                StrategySubscription.strategy_id == strategy_id
+            ).first()
+            if enabled or allocated > 0 or exists:
+                self._upsert(db, api_key, strategy_id, enabled, allocated, None)
+        db.commit()
+        self.refresh()
+
+    def _upsert(self, db: Session, api_key: TradingApiKey, strategy_id: str, enabled: bool,
+                allocated_usdt: Optional[float], params: Optional[Dict]) -> StrategySubscription:
+        sub = db.query(StrategySubscription).filter(
+            StrategySubscription.api_key_id == api_key.id,
+            StrategySubscription.strategy_id == strategy_id
+        ).first()
+        if sub is None:
+            sub = StrategySubscription(api_key_id=api_key.id, strategy_id=strategy_id, allocated_usdt=0.0)
+            db.add(sub)
+        sub.enabled = enabled
+        if allocated_usdt is not None:
+            sub.allocated_usdt = allocated_usdt
+        if params is not None:
+            sub.params = json.dumps(params)
+
+        legacy = LEGACY_COLUMNS.get(strategy_id)
+        if legacy:
+            setattr(api_key, legacy[0], enabled)
+            if allocated_usdt is not None:
+                setattr(api_key, legacy[1], allocated_usdt)
+        return sub
+
+    def bootstrap(self):
+        """
+        Al arrancar: crea las suscripciones que falten a partir de las columnas legacy
+        (idempotente, no pisa filas existentes) y carga el mapa.
+        """
+        with session_scope() as db:
+            existing = {(a, s) for a, s in db.query(StrategySubscription.api_key_id, StrategySubscription.strategy_id).all()}
+            created = 0
+            for api_key in db.query(TradingApiKey).filter(TradingApiKey.is_testnet == False).all():
+                for strategy_id, (enabled_column, allocated_column) in LEGACY_COLUMNS.items():
+                    enabled = bool(getattr(api_key, enabled_column, False))
+                    allocated = float(getattr(api_key, allocated_column, 0.0) or 0.0)
+                    if (api_key.id, strategy_id) in existing or not (enabled or allocated > 0):
+                        continue
+                    db.add(StrategySubscription(
+                        api_key_id=api_key.id, strategy_id=strategy_id, enabled=enabled, allocated_usdt=allocated
+                    ))
+                    created += 1
+            db.commit()
+        if created:
+            logger.info(f"✅ {created} suscripción(es) creadas desde columnas legacy de TradingApiKey")
+        self.refresh()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                "loaded_age_seconds": round(time.time() - self._loaded_at, 1) if self._loaded_at else None,
+                "ttl_seconds": self.ttl_seconds,
+                "strategies": {k: [s.to_dict() for s in v.values()] for k, v in self._by_strategy.items()},
+            }
+
+# Instancia global
+subscription_registry = SubscriptionRegistry()
+# Cambios de suscripciones/API keys hechos en otro proceso (y recarga por TTL fuera del event loop)
+shared_state.watch("subscriptions", subscription_registry.refresh, max_age=SUBSCRIPTIONS_TTL_SECONDS / 2)
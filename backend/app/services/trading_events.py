@@ -2,6 +2,7 @@ from typing import Optional, Dict, Any
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
 from app.db import models
+from app.core.tracing import traced, current_trace_id
 import json
 import logging
 
@@ -26,11 +27,11 @@ def _create_event(
     payload: Optional[Dict[str, Any]] = None,
 ) -> models.TradingEvent:
     """Crea un TradingEvent en estado PENDING"""
-    event = models.TradingEvent(
+    event = build_event(
         event_type=event_type,
-        order_id=order.id if order else None,
-        api_key_id=api_key_id or (order.api_key_id if order else None),
-        user_id=user_id or (order.user_id if order else None),
+        order=order,
+        user_id=user_id,
+        api_key_id=api_key_id,
         symbol=symbol,
         side=side,
         quantity=quantity,
@@ -39,7 +40,7 @@ def _create_event(
         pnl_usdt=pnl_usdt,
         pnl_percentage=pnl_percentage,
         source=source,
-        payload=json.dumps(payload or {})
+        payload=payload,
     )
     db.add(event)
     db.commit()
@@ -48,6 +49,41 @@ def _create_event(
     return event
 
 
+def build_event(
+    *,
+    event_type: str,
+    order: Optional[models.TradingOrder] = None,
+    user_id: Optional[int] = None,
+    api_key_id: Optional[int] = None,
+    symbol: str,
+    side: Optional[str] = None,
+    quantity: Optional[float] = None,
+    price: Optional[float] = None,
+    total_usdt: Optional[float] = None,
+    pnl_usdt: Optional[float] = None,
+    pnl_percentage: Optional[float] = None,
+    source: Optional[str] = None,
+    payload: Optional[Dict[str, Any]] = None,
+) -> models.TradingEvent:
+    """TradingEvent PENDING sin guardar: el llamador lo agrega a su propia transacción"""
+    return models.TradingEvent(
+        event_type=event_type,
+        order_id=order.id if order else None,
+        api_key_id=api_key_id or (order.api_key_id if order else None),
+        user_id=user_id or (order.user_id if order else None),
+        symbol=symbol,
+        side=side,
+        quantity=quantity,
+        price=price,
+        total_usdt=total_usdt,
+        pnl_usdt=pnl_usdt,
+        pnl_percentage=pnl_percentage,
+        source=source,
+        payload=json.dumps(payload or {})
+    )
+
+
+@traced("trading_events.publish_order_filled_buy")
 def publish_order_filled_buy(
     *,
     order: Optional[models.TradingOrder] = None,
@@ -74,7 +110,7 @@ def publish_order_filled_buy(
             price=price,
             total_usdt=total_usdt,
             source=source,
-            payload=extra,
+            payload={**(extra or {}), "trace_id": current_trace_id()},
         )
     finally:
         db.close()
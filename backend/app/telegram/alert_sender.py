@@ -9,6 +9,8 @@ from datetime import datetime, timedelta
 from typing import List, Dict
 from sqlalchemy.orm import Session
 
+from app.core.event_bus import event_bus, OrderFilled, PositionClosed
+from app.core.metrics import telegram_rate_limited_total, telegram_send_seconds
 from app.db.database import SessionLocal
 from app.db import crud_alertas
 from app.db.models import Alerta, TradingEvent, TelegramConnection
@@ -32,6 +34,9 @@ class AlertSender:
             return
             
         self.is_running = True
+        # Fills y cierres llegan por el event bus: se envían al instante en vez de esperar al polling.
+        # Cola chica: cada entrega procesa todos los trading_events PENDING, los descartes no pierden nada
+        event_bus.subscribe("telegram_trading_events", [OrderFilled, PositionClosed], self._on_trading_event, maxsize=20)
         logger.info("🚀 Alert sender iniciado - Monitoreando alertas pendientes")
         
         while self.is_running:
@@ -45,7 +50,12 @@ class AlertSender:
     def stop_monitoring(self):
         """Detiene el monitoreo"""
         self.is_running = False
+        event_bus.unsubscribe("telegram_trading_events")
         logger.info("🛑 Alert sender detenido")
+
+    async def _on_trading_event(self, event):
+        """Handler del event bus (tarea propia: un Telegram lento no frena a executors ni scanners)"""
+        await self.process_pending_trading_events()
     
     async def process_pending_alerts(self):
         """Procesa alertas pendientes de envío"""
@@ -127,7 +137,8 @@ class AlertSender:
                     failed_count = 0
                     
                     for chat_id in connected_users:
-                        sent_ok = self._send_message(chat_id, message_text)
+                        # requests es bloqueante: fuera del event loop
+                        sent_ok = await asyncio.to_thread(self._send_message, chat_id, message_text)
                         if sent_ok:
                             sent_count += 1
                         else:
@@ -263,9 +274,13 @@ class AlertSender:
                 'parse_mode': 'Markdown'
             }
 
+            sent_at = time.perf_counter()
             resp = requests.post(url, json=payload, timeout=10)
+            telegram_send_seconds.observe(time.perf_counter() - sent_at, outcome='ok' if resp.status_code == 200 else str(resp.status_code))
             if resp.status_code == 200:
                 return True
+            if resp.status_code == 429:
+                telegram_rate_limited_total.inc()
             logger.error(f"Telegram sendMessage error {resp.status_code}: {resp.text}")
             return False
         except Exception as e:
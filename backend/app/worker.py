@@ -0,0 +1,256 @@
+# backend/app/worker.py
+# Worker de trading: dueño de los scanners mainnet (y sus executors), el Health Monitor y el
+# Alert Sender. Varias instancias pueden correr a la vez; solo la que gana el advisory lock de
+# Postgres escanea y opera, las demás quedan en espera como réplicas calientes. Cada instancia
+# expone sus /metrics y /health/* en WORKER_HTTP_PORT (red interna).
+#
+#   python -m app.worker          (con SCANNERS_IN_API=false en la API)
+
+import asyncio
+import contextlib
+import logging
+import os
+import signal
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+from app.core.leader_election import AdvisoryLockLeader
+from app.db import models
+from app.db.database import engine
+from app.services.health_monitor_service import health_monitor
+from app.services.scanner_checkpoints import scanner_checkpoints
+from app.services.scanner_registry import get_mainnet_scanners
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Cada cuánto el líder lee los start/stop pedidos por la API (scanner_checkpoints.desired_running)
+SCANNER_DESIRED_STATE_POLL_SECONDS = float(os.getenv("SCANNER_DESIRED_STATE_POLL_SECONDS", "5"))
+# Puerto interno de /metrics y /health/* del worker (0 = deshabilitado)
+WORKER_HTTP_PORT = int(os.getenv("WORKER_HTTP_PORT", "9100"))
+
+leader = AdvisoryLockLeader("scanner-worker")
+# Se activa con SIGTERM/SIGINT: distingue el apagado ordenado de una pérdida de liderazgo
+_stop_event = asyncio.Event()
+_desired_state_task: Optional[asyncio.Task] = None
+
+# --------------------------
+# Servicios del líder
+# --------------------------
+
+async def _start_scanners(keys: Iterable[str]):
+    scanners = get_mainnet_scanners()
+    for key in keys:
+        entry = scanners[key]
+        scanner = entry["scanner"]
+        if scanner.is_running:
+            continue
+        try:
+            # Los scanners 4h exponen start_scanning; el de 30m, start_scanner
+            start = getattr(scanner, "start_scanning", None) or scanner.start_scanner
+            await start()
+            logger.info(f"✅ Scanner {entry['label']} iniciado por el worker")
+        except Exception as e:
+            logger.error(f"❌ Error iniciando scanner {entry['label']}: {e}")
+
+async def _stop_scanners(keys: Iterable[str]):
+    scanners = get_mainnet_scanners()
+    for key in keys:
+        entry = scanners[key]
+        scanner = entry["scanner"]
+        try:
+            stop = getattr(scanner, "stop_scanning", None) or scanner.stop_scanner
+            await stop()
+            logger.info(f"⏹️ Scanner {entry['label']} detenido por el worker")
+        except Exception as e:
+            logger.error(f"❌ Error deteniendo scanner {entry['label']}: {e}")
+
+async def _apply_desired_states():
+    """Inicia/detiene los scanners según lo pedido por la API (/start, /stop)"""
+    desired = await asyncio.to_thread(scanner_checkpoints.desired_states)
+    scanners = get_mainnet_scanners()
+    to_start = [k for k, running in desired.items() if k in scanners and running and not scanners[k]["scanner"].is_running]
+    to_stop = [k for k, running in desired.items() if k in scanners and not running and scanners[k]["scanner"].is_running]
+    await _start_scanners(to_start)
+    await _stop_scanners(to_stop)
+
+async def _desired_state_loop():
+    while True:
+        await asyncio.sleep(SCANNER_DESIRED_STATE_POLL_SECONDS)
+        try:
+            await _apply_desired_states()
+        except Exception as e:
+            logger.error(f"❌ Error aplicando start/stop pedidos por la API: {e}")
+
+async def on_elected():
+    """Esta instancia pasa a operar: scanners, health monitor y alertas"""
+    global _desired_state_task
+    from app.telegram.alert_sender import alert_sender
+    from app.services.strategy_engine import sync_all_position_lots
+
+    # BUY sin lote (anteriores a position_lots) -> lotes, antes del primer ciclo
+    try:
+        await asyncio.to_thread(sync_all_position_lots)
+    except Exception as e:
+        logger.error(f"❌ Error sincronizando lotes de posición: {e}")
+
+    # Retomar desde el último checkpoint (del líder anterior o de esta misma instancia): solo se
+    # relanzan los scanners que estaban corriendo; los pedidos de la API (start/stop) mandan sobre eso
+    were_running = []
+    try:
+        were_running = await asyncio.to_thread(scanner_checkpoints.restore_all)
+    except Exception as e:
+        logger.error(f"❌ Error restaurando checkpoints de scanners: {e}")
+    try:
+        desired = await asyncio.to_thread(scanner_checkpoints.desired_states)
+    except Exception as e:
+        logger.error(f"❌ Error leyendo start/stop pedidos por la API: {e}")
+        desired = {}
+    keys = [k for k in get_mainnet_scanners() if desired.get(k, k in were_running)]
+    await _start_scanners(keys)
+    scanner_checkpoints.start()
+    _desired_state_task = asyncio.create_task(_desired_state_loop())
+    if not await health_monitor.start_monitoring():
+        logger.error("❌ Error iniciando Health Monitor en el worker")
+    asyncio.create_task(alert_sender.start_monitoring())
+    logger.info("✅ Worker líder operando")
+
+async def on_demoted():
+    """Otra instancia tomó el lock (o se perdió la conexión): dejar de operar de inmediato"""
+    from app.telegram.alert_sender import alert_sender
+
+    if _desired_state_task is not None:
+        _desired_state_task.cancel()
+    await _stop_scanners(get_mainnet_scanners())
+    # Checkpoint final solo en apagado ordenado (aún con el lock): si se perdió el liderazgo, el
+    # nuevo líder ya pudo restaurar y escribir, y no hay que pisarle el estado
+    await scanner_checkpoints.stop(final_save=_stop_event.is_set())
+    alert_sender.stop_monitoring()
+    await health_monitor.stop_monitoring()
+    logger.info("🛑 Worker en espera (no es líder)")
+
+# --------------------------
+# Métricas y health (HTTP interno)
+# --------------------------
+
+def _build_http_app():
+    """
+    /metrics y /health/* de este proceso: en producción scanners, executors, Health Monitor y
+    Alert Sender corren aquí, así que sus series, el watchdog del loop y las probes del monitor
+    solo se ven en este puerto (la API expone los suyos en :8000). Mismas rutas y autenticación
+    que en la API (METRICS_TOKEN, JWT de admin).
+    """
+    from fastapi import FastAPI
+    from app.api.v1 import health_routes, metrics_routes
+
+    http_app = FastAPI(title="BotU Worker", docs_url=None, redoc_url=None, openapi_url=None)
+    http_app.include_router(metrics_routes.router, tags=["metrics"])
+    http_app.include_router(health_routes.router, tags=["health"])
+    return http_app
+
+def _build_http_server():
+    import uvicorn
+
+    class _Server(uvicorn.Server):
+        @contextlib.contextmanager
+        def capture_signals(self):
+            # SIGTERM/SIGINT los maneja run_worker (_stop_event), no uvicorn
+            yield
+
+    return _Server(uvicorn.Config(_build_http_app(), host="0.0.0.0", port=WORKER_HTTP_PORT, log_level="warning", lifespan="off"))
+
+async def _serve_http(server):
+    try:
+        await server.serve()
+    except (OSError, SystemExit) as e:
+        # uvicorn sale con SystemExit si no puede abrir el puerto: el worker sigue operando sin él
+        logger.error(f"❌ No se pudo abrir el puerto HTTP del worker ({WORKER_HTTP_PORT}): {e}")
+
+# --------------------------
+# Entrada
+# --------------------------
+
+async def run_worker():
+    logger.info("🚀 BOTU SCANNER WORKER STARTING UP...")
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(sig, _stop_event.set)
+        except NotImplementedError:
+            # Windows: Ctrl+C llega como KeyboardInterrupt
+            pass
+
+    from app.core.metrics import event_loop_lag_probe
+    from app.core.loop_watchdog import loop_watchdog
+    event_loop_lag_probe.start()
+    loop_watchdog.start()
+
+    http_server = _build_http_server() if WORKER_HTTP_PORT else None
+    http_task = None
+    if http_server is not None:
+        http_task = asyncio.create_task(_serve_http(http_server))
+        logger.info(f"📈 Métricas y health del worker en :{WORKER_HTTP_PORT} (/metrics, /health/*)")
+
+    # Precios y suscripciones se cargan también en réplicas: el relevo es inmediato
+    try:
+        from app.services.price_oracle import price_oracle
+        await price_oracle.start()
+    except Exception as e:
+        logger.error(f"❌ Error iniciando Price Oracle: {e}")
+    try:
+        from app.core.event_bus import event_bus, LogEntry
+        from app.services.scanner_registry import deliver_log_entry
+        event_bus.subscribe("scanner_logs", [LogEntry], deliver_log_entry)
+        # Señales -> executor_<estrategia>; todos los eventos -> API (/dashboard/stream) por NOTIFY
+        from app.services.strategy_engine import subscribe_executors
+        from app.services.event_stream import subscribe_relay
+        subscribe_executors()
+        subscribe_relay()
+        await event_bus.start()
+    except Exception as e:
+        logger.error(f"❌ Error iniciando Event Bus: {e}")
+    try:
+        from app.services.strategy_subscriptions import subscription_registry
+        await asyncio.to_thread(subscription_registry.bootstrap)
+    except Exception as e:
+        logger.error(f"❌ Error cargando suscripciones de estrategias: {e}")
+    # Bajas de suscripciones, lotes y demás cambios hechos por la API llegan por shared_state
+    from app.core.shared_state import shared_state
+    shared_state.start()
+
+    try:
+        await leader.campaign(on_elected, on_demoted, _stop_event)
+    finally:
+        logger.info("🛑 BOTU SCANNER WORKER SHUTTING DOWN...")
+        try:
+            from app.services.price_oracle import price_oracle
+            await price_oracle.stop()
+        except Exception as e:
+            logger.error(f"❌ Error deteniendo Price Oracle: {e}")
+        await shared_state.stop()
+        from app.core.event_bus import event_bus
+        await event_bus.stop()
+        await event_loop_lag_probe.stop()
+        await loop_watchdog.stop()
+        if http_task is not None:
+            http_server.should_exit = True
+            await http_task
+        from app.db.async_database import dispose_async_engine
+        await dispose_async_engine()
+
+def main():
+    # Crear tablas en la base de datos (igual que la API; idempotente)
+    models.Base.metadata.create_all(bind=engine)
+    try:
+        asyncio.run(run_worker())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# tools/benchmark_event_loop_lag.py
+# Mide el lag del event loop mientras se ejecutan consultas de lectura en paralelo:
+#   - "sync":  sesión síncrona llamada dentro de corutinas (como las rutas antes de AsyncSession)
+#   - "async": AsyncSession + asyncpg (rutas actuales de posiciones/historial/órdenes)
+#
+# Uso:  python tools/benchmark_event_loop_lag.py --user-id 1 --requests 200 --concurrency 20
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+# Añadimos el path de backend para poder importar app.*
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.database import SessionLocal
+from app.db.async_database import AsyncSessionLocal, dispose_async_engine
+from app.db import crud_async, crud_trading
+
+PROBE_INTERVAL = 0.01  # 10 ms
+
+async def probe_lag(samples: list, stop: asyncio.Event):
+    """Programa un sleep corto y registra cuánto se retrasa el loop en despertar"""
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        start = loop.time()
+        await asyncio.sleep(PROBE_INTERVAL)
+        samples.append((loop.time() - start - PROBE_INTERVAL) * 1000)
+
+async def sync_request(user_id: int):
+    db = SessionLocal()
+    try:
+        crud_trading.get_user_trading_orders_with_api_info(db, user_id, 50)
+        crud_trading.get_trading_statistics(db, user_id, days=1)
+    finally:
+        db.close()
+
+async def async_request(user_id: int):
+    async with AsyncSessionLocal() as db:
+        await crud_async.get_user_trading_orders_with_api_info(db, user_id, 50)
+        await crud_async.get_trading_statistics(db, user_id, days=1)
+
+async def run(mode: str, user_id: int, total: int, concurrency: int) -> dict:
+    request_fn = sync_request if mode == "sync" else async_request
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list = []
+    stop = asyncio.Event()
+
+    async def one():
+        async with semaphore:
+            await request_fn(user_id)
+
+    probe = asyncio.create_task(probe_lag(samples, stop))
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe
+
+    samples.sort()
+    return {
+        "mode": mode,
+        "requests": total,
+        "elapsed_s": round(elapsed, 3),
+        "req_per_s": round(total / elapsed, 1) if elapsed else None,
+        "lag_p50_ms": round(statistics.median(samples), 2) if samples else None,
+        "lag_p99_ms": round(samples[int(len(samples) * 0.99) - 1], 2) if samples else None,
+        "lag_max_ms": round(samples[-1], 2) if samples else None,
+        "probes": len(samples),
+    }
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark de lag del event loop: sesión sync vs AsyncSession")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    try:
+        for mode in ("sync", "async"):
+            result = await run(mode, args.user_id, args.requests, args.concurrency)
+            print(
+                f"📊 {result['mode']:>5}: {result['requests']} req en {result['elapsed_s']}s "
+                f"({result['req_per_s']} req/s) | lag p50={result['lag_p50_ms']}ms "
+                f"p99={result['lag_p99_ms']}ms max={result['lag_max_ms']}ms ({result['probes']} muestras)"
+            )
+    finally:
+        await dispose_async_engine()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -8,6 +8,8 @@ import time
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
+from app.core.binance_governor import binance_http, PRIORITY_ORDER, PRIORITY_MARKET_DATA, PRIORITY_DASHBOARD
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -43,7 +45,7 @@ def fetch_klines(symbol: str, interval: str = "1h", limit: int = 1000):
             'limit': limit
         }
         
-        response = requests.get(url, params=params)
+        response = binance_http.get(url, params=params, priority=PRIORITY_MARKET_DATA)
         response.raise_for_status()
         
         klines = response.json()
@@ -84,7 +86,7 @@ def get_symbol_info(symbol: str):
         url = f"{BINANCE_API_BASE}/exchangeInfo"
         params = {'symbol': symbol.upper()}
         
-        response = requests.get(url, params=params)
+        response = binance_http.get(url, params=params, priority=PRIORITY_MARKET_DATA)
         response.raise_for_status()
         
         exchange_info = response.json()
@@ -120,7 +122,7 @@ def get_ticker_price(symbol: str):
         url = f"{BINANCE_API_BASE}/ticker/price"
         params = {'symbol': symbol.upper()}
         
-        response = requests.get(url, params=params)
+        response = binance_http.get(url, params=params, priority=PRIORITY_MARKET_DATA)
         response.raise_for_status()
         
         ticker = response.json()
@@ -138,13 +140,37 @@ def fetch_current_price(symbol: str):
     """
     return get_ticker_price(symbol)
 
+def get_all_ticker_prices(testnet: bool = False) -> dict:
+    """
+    Obtiene el precio actual de TODOS los símbolos en una sola llamada
+    (GET /ticker/price sin parámetro symbol, peso 4)
+
+    Returns:
+        dict: {symbol: price}
+    """
+    try:
+        base = BINANCE_TESTNET_BASE if testnet else BINANCE_API_BASE
+        response = binance_http.get(f"{base}/ticker/price", timeout=10, priority=PRIORITY_MARKET_DATA)
+        response.raise_for_status()
+
+        prices = {}
+        for ticker in response.json():
+            try:
+                prices[ticker["symbol"]] = float(ticker["price"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return prices
+    except requests.RequestException as e:
+        logger.error(f"Error obteniendo precios en bloque: {e}")
+        raise
+
 def test_connection():
     """
     Prueba la conexión con Binance usando la API pública
     """
     try:
         url = f"{BINANCE_API_BASE}/time"
-        response = requests.get(url)
+        response = binance_http.get(url, priority=PRIORITY_DASHBOARD)
         response.raise_for_status()
         
         server_time = response.json()
@@ -173,8 +199,8 @@ class BinanceClient:
             hashlib.sha256
         ).hexdigest()
     
-    def _make_request(self, method: str, endpoint: str, params: dict = None, signed: bool = False):
-        """Realiza petición HTTP a la API de Binance"""
+    def _make_request(self, method: str, endpoint: str, params: dict = None, signed: bool = False, priority: int = PRIORITY_DASHBOARD):
+        """Realiza petición HTTP a la API de Binance (a través del gobernador de peso)"""
         url = f"{self.base_url}/{endpoint}"
         headers = {'X-MBX-APIKEY': self.api_key}
         
@@ -187,10 +213,10 @@ class BinanceClient:
             params['signature'] = self._generate_signature(query_string)
         
         try:
-            if method.upper() == 'GET':
-                response = requests.get(url, headers=headers, params=params)
+            if method.upper() in ('GET', 'DELETE'):
+                response = binance_http.request(method.upper(), url, priority=priority, headers=headers, params=params)
             elif method.upper() == 'POST':
-                response = requests.post(url, headers=headers, data=params)
+                response = binance_http.post(url, priority=priority, headers=headers, data=params)
             else:
                 raise ValueError(f"Método HTTP no soportado: {method}")
                 
@@ -220,7 +246,7 @@ class BinanceClient:
         try:
             # Probar primero conexión básica
             ping_url = f"{self.base_url}/ping"
-            response = requests.get(ping_url)
+            response = binance_http.get(ping_url, priority=PRIORITY_DASHBOARD)
             response.raise_for_status()
             
             # Probar autenticación
@@ -265,7 +291,7 @@ class BinanceClient:
             # Usar endpoint correcto según testnet/mainnet
             endpoint = 'order' if not self.testnet else 'order'
             
-            order_response = self._make_request('POST', endpoint, params, signed=True)
+            order_response = self._make_request('POST', endpoint, params, signed=True, priority=PRIORITY_ORDER)
             
             logger.info(f"✅ Orden ejecutada: {order_response.get('orderId')} - Status: {order_response.get('status')}")
             
@@ -323,7 +349,7 @@ class BinanceClient:
             
             logger.info(f"🚀 Ejecutando orden {kwargs['side']} {kwargs['type']} {kwargs['quantity']} {kwargs['symbol']} en {'TESTNET' if self.testnet else 'MAINNET'}")
             
-            order_response = self._make_request('POST', 'order', params, signed=True)
+            order_response = self._make_request('POST', 'order', params, signed=True, priority=PRIORITY_ORDER)
             
             logger.info(f"✅ Orden ejecutada: {order_response.get('orderId')} - Status: {order_response.get('status')}")
             
@@ -351,7 +377,7 @@ class BinanceClient:
                 'orderId': order_id
             }
             
-            response = self._make_request('DELETE', 'order', params, signed=True)
+            response = self._make_request('DELETE', 'order', params, signed=True, priority=PRIORITY_ORDER)
             
             return {
                 "success": True,
@@ -1,13 +1,13 @@
 # src/backtest_u.py
 
 import yfinance as yf
-import pandas as pd
 import numpy as np
 import time
 import os
 import sys
 import random
 import requests  # <== NECESARIO PARA SESIONES
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Importar para DB
 backend_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
@@ -37,9 +37,9 @@ USER_AGENTS = [
 
 RUPTURE_FACTOR = 1.02
 MIN_SLOPE_LEFT = -0.5
-TICKER_SLEEP = 5    # segundos base entre tickers
-BATCH_SLEEP = 15    # segundos base entre batches
+BATCH_SLEEP = 15    # segundos base entre batches de descarga
 BATCH_SIZE = 10     # tamaño de los batches de descarga
+MAX_WORKERS = int(os.getenv("BACKTEST_WORKERS", str(os.cpu_count() or 1)))  # procesos para el backtest
 
 # === FUNCIONES ===
 
@@ -67,6 +67,13 @@ def load_tickers_from_db(tipo_filter=None, sub_tipo_filter=None, activo_only=Tru
     finally:
         session.close()
 
+# Primera posición >= start con close > level (None si nunca se rompe)
+def first_close_above(close, start, level):
+    # El máximo acumulado es no decreciente: searchsorted da el primer índice que supera el nivel
+    future_max = np.maximum.accumulate(close[start:])
+    pos = int(np.searchsorted(future_max, level, side='right'))
+    return start + pos if pos < len(future_max) else None
+
 # BACKTEST SCANNER
 def backtest_scan_for_u(ticker, df):
     log(f"[{ticker}] Procesando datos para backtest...")
@@ -78,44 +85,60 @@ def backtest_scan_for_u(ticker, df):
         log(f"[{ticker}] ❌ Error procesando datos: {e}")
         return []
 
-    df_ticker['min_local'] = (df_ticker['Low'].shift(2) > df_ticker['Low'].shift(1)) & (df_ticker['Low'].shift(1) < df_ticker['Low'])
+    low = df_ticker['Low'].to_numpy()
+    high = df_ticker['High'].to_numpy()
+    close = df_ticker['Close'].to_numpy()
+    n = len(df_ticker)
+
+    # Mismo criterio que Low.shift(2) > Low.shift(1) < Low (marca la vela posterior al mínimo)
+    min_local = np.zeros(n, dtype=bool)
+    if n > 2:
+        min_local[2:] = (low[:-2] > low[1:-1]) & (low[1:-1] < low[2:])
+
+    # Solo mínimos con suficientes velas antes (palo izquierdo) y después
+    positions = np.flatnonzero(min_local)
+    positions = positions[(positions >= 5) & (positions < n - 1)]
 
     u_signals = []
 
-    # Recorremos cada mínimo local
-    for idx_min in df_ticker[df_ticker['min_local']].index:
-        idx_min_pos = df_ticker.index.get_loc(idx_min)
-
-        if idx_min_pos < 5 or idx_min_pos >= len(df_ticker) - 1:
-            continue  # no hay suficientes velas antes o después
-
-        # Palo izquierdo
-        left_window = df_ticker.iloc[idx_min_pos - 5:idx_min_pos]['Close']
-        slope_left = float(calc_slope(left_window))
-
-        # Nivel de ruptura
-        min_row = df_ticker.loc[idx_min]
-        nivel_ruptura = min_row['High'] * RUPTURE_FACTOR
-
-        # Ver si en las velas posteriores se rompe el nivel
-        df_future = df_ticker.iloc[idx_min_pos + 1:]
-
-        for idx_future, row_future in df_future.iterrows():
-            close_actual = row_future['Close']
-            if slope_left < MIN_SLOPE_LEFT and close_actual > nivel_ruptura:
-                # Se detecta U
-                signal = {
-                    "fecha": idx_future.date(),
-                    "nivel_ruptura": nivel_ruptura,
-                    "slope_left": slope_left,
-                    "precio_cierre": close_actual
-                }
-                u_signals.append(signal)
-                log(f"[{ticker}] U detectada en {signal['fecha']} - Nivel ruptura: {nivel_ruptura:.2f}, Slope: {slope_left:.2f}, Close: {close_actual:.2f}")
-                break  # solo consideramos la primera ruptura tras ese mínimo
+    for idx_min_pos in positions:
+        # Palo izquierdo: si no baja lo suficiente nunca habrá señal para este mínimo
+        slope_left = float(calc_slope(df_ticker['Close'].iloc[idx_min_pos - 5:idx_min_pos]))
+        if not slope_left < MIN_SLOPE_LEFT:
+            continue
+
+        # Nivel de ruptura y primera vela posterior que lo rompe
+        nivel_ruptura = high[idx_min_pos] * RUPTURE_FACTOR
+        idx_ruptura = first_close_above(close, idx_min_pos + 1, nivel_ruptura)
+        if idx_ruptura is None:
+            continue
+
+        close_actual = close[idx_ruptura]
+        signal = {
+            "fecha": df_ticker.index[idx_ruptura].date(),
+            "nivel_ruptura": nivel_ruptura,
+            "slope_left": slope_left,
+            "precio_cierre": close_actual
+        }
+        u_signals.append(signal)
+        log(f"[{ticker}] U detectada en {signal['fecha']} - Nivel ruptura: {nivel_ruptura:.2f}, Slope: {slope_left:.2f}, Close: {close_actual:.2f}")
 
     return u_signals
 
+# Backtest de varios tickers en paralelo (un proceso por core)
+def run_backtests(frames):
+    results = {}
+    with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {pool.submit(backtest_scan_for_u, ticker, df_ticker): ticker for ticker, df_ticker in frames.items()}
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                results[ticker] = future.result()
+            except Exception as e:
+                log(f"[{ticker}] ❌ Error en backtest: {e}")
+                results[ticker] = []
+    return results
+
 # MAIN BACKTEST
 if __name__ == "__main__":
     start_time = time.time()
@@ -126,8 +149,9 @@ if __name__ == "__main__":
     sub_tipo_filter = sys.argv[2] if len(sys.argv) > 2 else None
 
     tickers = load_tickers_from_db(tipo_filter, sub_tipo_filter)
+    frames = {}
 
-    # Procesamos en batches
+    # 1️⃣ Descargamos en batches (las pausas son solo por Yahoo Finance)
     for batch_start in range(0, len(tickers), BATCH_SIZE):
         batch_tickers = tickers[batch_start:batch_start + BATCH_SIZE]
         log(f"📦 Descargando batch de {len(batch_tickers)} tickers: {batch_tickers}...")
@@ -165,42 +189,40 @@ if __name__ == "__main__":
             continue
 
         # Normalizamos el DataFrame en formato "multi-index" → un DataFrame plano con 'Ticker' como columna
-        dfs = []
+        processed = 0
         for ticker in batch_tickers:
             try:
                 df_ticker = df_batch[ticker].copy()
                 df_ticker['Ticker'] = ticker
                 df_ticker['Date'] = df_ticker.index
-                dfs.append(df_ticker)
+                frames[ticker] = df_ticker
+                processed += 1
             except Exception as e:
                 log(f"[{ticker}] ⚠️ Error procesando DataFrame del batch: {e}")
 
-        if not dfs:
+        if not processed:
             log(f"❌ No se pudo procesar ningún ticker del batch {batch_tickers}.")
             continue
 
-        df_all = pd.concat(dfs)
-
-        # Procesamos cada ticker individual
-        for ticker in batch_tickers:
-            log(f"🔍 Backtesteando {ticker}...")
-            signals = backtest_scan_for_u(ticker, df_all)
-            if signals:
-                log(f"[{ticker}] Total señales de U detectadas: {len(signals)}")
-                for signal in signals:
-                    print(f"    📅 {signal['fecha']} - Nivel ruptura: {signal['nivel_ruptura']:.2f}, Slope: {signal['slope_left']:.2f}, Close: {signal['precio_cierre']:.2f}")
-            else:
-                log(f"[{ticker}] No se detectaron señales de U en el histórico.")
-
-            # Sleep entre tickers (con jitter aleatorio)
-            sleep_time = TICKER_SLEEP + random.uniform(0, 2)
-            log(f"⏳ Esperando {sleep_time:.2f} segundos antes del próximo ticker...")
-            time.sleep(sleep_time)
-
         # Sleep extra entre batches (con jitter aleatorio)
         sleep_time = BATCH_SLEEP + random.uniform(0, 5)
         log(f"⏳ Batch completo. Esperando {sleep_time:.2f} segundos para no sobrecargar Yahoo Finance...")
         time.sleep(sleep_time)
 
+    # 2️⃣ Backtest de todos los tickers en paralelo
+    log(f"🔍 Backtesteando {len(frames)} tickers con {MAX_WORKERS} procesos...")
+    results = run_backtests(frames)
+
+    for ticker in tickers:
+        if ticker not in results:
+            continue
+        signals = results[ticker]
+        if signals:
+            log(f"[{ticker}] Total señales de U detectadas: {len(signals)}")
+            for signal in signals:
+                print(f"    📅 {signal['fecha']} - Nivel ruptura: {signal['nivel_ruptura']:.2f}, Slope: {signal['slope_left']:.2f}, Close: {signal['precio_cierre']:.2f}")
+        else:
+            log(f"[{ticker}] No se detectaron señales de U en el histórico.")
+
     elapsed_time = time.time() - start_time
     log(f"✅ BACKTEST finalizado. Tiempo total: {elapsed_time:.2f} segundos.")
@@ -5,7 +5,6 @@ import sys
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
 import logging
 
 # Importar para DB
@@ -19,7 +18,8 @@ except ImportError as e:
     print(f"Error importing backend modules: {e}")
     raise
 
-from binance_client import get_spot_client, fetch_klines
+from binance_client import get_spot_client
+from binance_history import load_klines
 from binance_scanner_u import scan_for_u_binance
 
 # Configurar logging
@@ -45,7 +45,9 @@ def load_crypto_tickers_from_db():
 
 def get_historical_klines(symbol, years_back=5):
     """
-    Obtiene datos históricos de Binance para un símbolo específico
+    Obtiene datos históricos de Binance para un símbolo específico.
+    Descarga solo lo que falta en el almacén local (páginas por startTime en paralelo)
+    y devuelve las velas desde el almacén.
     
     Args:
         symbol: Símbolo del ticker (ej: "BTCUSDT")
@@ -61,40 +63,7 @@ def get_historical_klines(symbol, years_back=5):
         
         logger.info(f"[{symbol}] Obteniendo datos históricos desde {start_date.strftime('%Y-%m-%d')} hasta {end_date.strftime('%Y-%m-%d')}")
         
-        # Obtener datos en chunks de 1000 velas (límite de Binance)
-        all_klines = []
-        current_start = start_date
-        
-        while current_start < end_date:
-            try:
-                # Obtener 1000 velas (aproximadamente 1000 horas = ~41 días)
-                klines = fetch_klines(symbol, "1h", 1000)
-                
-                if not klines:
-                    break
-                
-                # Filtrar por fecha
-                filtered_klines = []
-                for kline in klines:
-                    kline_date = datetime.fromtimestamp(kline['timestamp'] / 1000)
-                    if start_date <= kline_date <= end_date:
-                        filtered_klines.append(kline)
-                
-                all_klines.extend(filtered_klines)
-                
-                # Actualizar fecha de inicio para el siguiente chunk
-                if klines:
-                    last_timestamp = klines[-1]['timestamp']
-                    current_start = datetime.fromtimestamp(last_timestamp / 1000)
-                else:
-                    break
-                
-                # Pequeña pausa para no sobrecargar la API
-                time.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"[{symbol}] Error obteniendo chunk de datos: {e}")
-                break
+        all_klines = load_klines(symbol, "1h", start_date, end_date)
         
         logger.info(f"[{symbol}] Obtenidas {len(all_klines)} velas históricas")
         return all_klines
@@ -0,0 +1,298 @@
+# src/binance_history.py
+# Descarga histórica de velas de Binance: rango → páginas (startTime/endTime), descarga concurrente
+# bajo un presupuesto de peso, dedupe + validación de continuidad, reanudación desde la última vela
+# guardada y escritura directa en el almacén local (SQLite).
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from binance_client import BINANCE_API_BASE
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# === PARAMETROS ===
+
+PAGE_LIMIT = 1000            # Máximo de velas por request de /klines
+KLINES_WEIGHT = 2            # Peso de /klines en Binance
+WEIGHT_BUDGET_PER_MINUTE = int(os.getenv("KLINES_WEIGHT_BUDGET", "1200"))  # Muy por debajo del límite de 6000/min
+MAX_WORKERS = int(os.getenv("KLINES_MAX_WORKERS", "4"))
+STORE_PATH = os.getenv("KLINE_STORE_PATH", os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'klines.db')))
+
+INTERVAL_MS = {
+    "1m": 60_000, "3m": 180_000, "5m": 300_000, "15m": 900_000, "30m": 1_800_000,
+    "1h": 3_600_000, "2h": 7_200_000, "4h": 14_400_000, "6h": 21_600_000,
+    "8h": 28_800_000, "12h": 43_200_000, "1d": 86_400_000, "3d": 259_200_000, "1w": 604_800_000,
+}
+
+KLINE_FIELDS = [
+    'timestamp', 'open', 'high', 'low', 'close', 'volume',
+    'close_time', 'quote_volume', 'trades', 'taker_buy_base', 'taker_buy_quote'
+]
+
+def to_ms(value):
+    """datetime o int (ms) → int en milisegundos"""
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+def parse_kline(kline):
+    """Vela cruda de Binance → dict con el mismo formato que binance_client.fetch_klines"""
+    return {
+        'timestamp': int(kline[0]),
+        'open': float(kline[1]),
+        'high': float(kline[2]),
+        'low': float(kline[3]),
+        'close': float(kline[4]),
+        'volume': float(kline[5]),
+        'close_time': int(kline[6]),
+        'quote_volume': float(kline[7]),
+        'trades': int(kline[8]),
+        'taker_buy_base': float(kline[9]),
+        'taker_buy_quote': float(kline[10])
+    }
+
+# === ALMACEN LOCAL ===
+
+class KlineStore:
+    """Velas por (symbol, interval, timestamp) en SQLite; INSERT OR REPLACE deduplica"""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS klines (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    open REAL, high REAL, low REAL, close REAL, volume REAL,
+                    close_time INTEGER, quote_volume REAL, trades INTEGER,
+                    taker_buy_base REAL, taker_buy_quote REAL,
+                    PRIMARY KEY (symbol, interval, timestamp)
+                )
+            """)
+            # Desde dónde está completo el almacén: para símbolos listados después del inicio pedido,
+            # la primera vela guardada es posterior a ese inicio aunque no falte nada
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    symbol TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    covered_from INTEGER NOT NULL,
+                    PRIMARY KEY (symbol, interval)
+                )
+            """)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def time_range(self, symbol, interval):
+        """(primera, última) vela guardada o (None, None)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(timestamp), MAX(timestamp) FROM klines WHERE symbol = ? AND interval = ?", (symbol, interval)
+            ).fetchone()
+        return row if row else (None, None)
+
+    def covered_from(self, symbol, interval):
+        """Inicio (ms) desde el que el almacén está completo, o None si nunca se registró"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT covered_from FROM coverage WHERE symbol = ? AND interval = ?", (symbol, interval)
+            ).fetchone()
+        return row[0] if row else None
+
+    def set_covered_from(self, symbol, interval, start_ms):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO coverage (symbol, interval, covered_from) VALUES (?, ?, ?)",
+                (symbol, interval, start_ms)
+            )
+
+    def save(self, symbol, interval, klines):
+        if not klines:
+            return 0
+        rows = [(symbol, interval) + tuple(k[f] for f in KLINE_FIELDS) for k in klines]
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO klines (symbol, interval, {', '.join(KLINE_FIELDS)}) "
+                f"VALUES ({', '.join(['?'] * (len(KLINE_FIELDS) + 2))})",
+                rows
+            )
+        return len(rows)
+
+    def load(self, symbol, interval, start_ms=None, end_ms=None):
+        query = f"SELECT {', '.join(KLINE_FIELDS)} FROM klines WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if start_ms is not None:
+            query += " AND timestamp >= ?"
+            params.append(start_ms)
+        if end_ms is not None:
+            query += " AND timestamp <= ?"
+            params.append(end_ms)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY timestamp", params).fetchall()
+        return [dict(zip(KLINE_FIELDS, row)) for row in rows]
+
+# === PRESUPUESTO DE PESO ===
+
+class WeightBudget:
+    """Ventana deslizante de 60 s: bloquea antes de superar el peso permitido por minuto"""
+
+    def __init__(self, per_minute=WEIGHT_BUDGET_PER_MINUTE):
+        self.per_minute = per_minute
+        self._spent = []  # (instante, peso)
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+
+    def acquire(self, weight):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._spent = [(t, w) for t, w in self._spent if now - t < 60]
+                used = sum(w for _, w in self._spent)
+                if now >= self._paused_until and used + weight <= self.per_minute:
+                    self._spent.append((now, weight))
+                    return
+                wait = max(self._paused_until - now, 60 - (now - self._spent[0][0]) if self._spent else 0.1)
+            time.sleep(max(wait, 0.05))
+
+    def observe(self, used_weight_header):
+        """Si Binance reporta más peso usado del previsto (otros procesos), frenar hasta el próximo minuto"""
+        if used_weight_header is None:
+            return
+        if int(used_weight_header) >= self.per_minute:
+            with self._lock:
+                self._paused_until = max(self._paused_until, time.monotonic() + 60 - datetime.now().second)
+
+    def backoff(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+# === DESCARGA ===
+
+def fetch_klines_page(symbol, interval, start_ms, end_ms, budget, retries=5):
+    """Una página de hasta PAGE_LIMIT velas entre start_ms y end_ms"""
+    params = {
+        'symbol': symbol.upper(),
+        'interval': interval,
+        'startTime': start_ms,
+        'endTime': end_ms,
+        'limit': PAGE_LIMIT
+    }
+    for attempt in range(retries):
+        budget.acquire(KLINES_WEIGHT)
+        response = requests.get(f"{BINANCE_API_BASE}/klines", params=params, timeout=30)
+        budget.observe(response.headers.get('X-MBX-USED-WEIGHT-1M'))
+
+        if response.status_code in (429, 418):
+            retry_after = int(response.headers.get('Retry-After', 60))
+            logger.warning(f"⚠️ [{symbol}] Binance {response.status_code}: pausa de {retry_after}s (intento {attempt + 1}/{retries})")
+            budget.backoff(retry_after)
+            continue
+
+        response.raise_for_status()
+        return [parse_kline(k) for k in response.json()]
+
+    raise RuntimeError(f"[{symbol}] Página {start_ms}-{end_ms} sin respuesta tras {retries} intentos")
+
+def split_pages(start_ms, end_ms, interval_ms):
+    """Rango → páginas contiguas de PAGE_LIMIT velas"""
+    span = PAGE_LIMIT * interval_ms
+    return [(page_start, min(page_start + span - 1, end_ms)) for page_start in range(start_ms, end_ms + 1, span)]
+
+def find_gaps(klines, interval_ms):
+    """Huecos entre velas consecutivas (Binance tiene algunos reales por mantenimiento)"""
+    return [
+        (prev['timestamp'], curr['timestamp'])
+        for prev, curr in zip(klines, klines[1:])
+        if curr['timestamp'] - prev['timestamp'] != interval_ms
+    ]
+
+def download_klines(symbol, interval, start, end=None, store=None, max_workers=MAX_WORKERS, budget=None):
+    """
+    Descarga [start, end] en el almacén local y devuelve un resumen.
+    Reanuda desde la última vela guardada; las páginas se descargan en paralelo pero se escriben
+    en orden, así "última vela guardada" siempre es un prefijo contiguo del rango.
+    """
+    if interval not in INTERVAL_MS:
+        raise ValueError(f"Intervalo no soportado para paginación: {interval}")
+
+    interval_ms = INTERVAL_MS[interval]
+    store = store or KlineStore()
+    budget = budget or WeightBudget()
+    symbol = symbol.upper()
+
+    now_ms = int(time.time() * 1000)
+    start_ms = to_ms(start)
+    end_ms = min(to_ms(end or datetime.now()), now_ms)
+
+    # Solo se reanuda si lo guardado ya cubre el inicio del rango pedido. Se compara contra el rango
+    # descargado (coverage), no contra la primera vela: un símbolo listado después de start_ms nunca
+    # tiene velas en el inicio. Almacenes sin coverage usan la primera vela guardada.
+    first_stored, last_stored = store.time_range(symbol, interval)
+    covered_from = store.covered_from(symbol, interval)
+    if covered_from is None:
+        covered_from = first_stored
+    if last_stored is None or covered_from > start_ms or last_stored < start_ms:
+        last_stored = None
+    else:
+        start_ms = last_stored + interval_ms
+        logger.info(f"[{symbol}] Reanudando desde {datetime.fromtimestamp(start_ms / 1000).strftime('%Y-%m-%d %H:%M')}")
+
+    if start_ms > end_ms:
+        logger.info(f"[{symbol}] {interval} ya está al día en el almacén local")
+        return {"symbol": symbol, "interval": interval, "pages": 0, "saved": 0, "gaps": []}
+
+    pages = split_pages(start_ms, end_ms, interval_ms)
+    logger.info(f"[{symbol}] Descargando {len(pages)} páginas de {interval} con {max_workers} workers")
+
+    done = {}
+    next_page = 0
+    saved = 0
+    last_kline = store.load(symbol, interval, start_ms=last_stored)[-1:] if last_stored is not None else []
+    gaps = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_klines_page, symbol, interval, s, e, budget): i for i, (s, e) in enumerate(pages)}
+        for future in as_completed(futures):
+            done[futures[future]] = future.result()
+
+            # Escribir en orden todas las páginas consecutivas ya disponibles
+            while next_page in done:
+                page_start, page_end = pages[next_page]
+                # Dedupe por timestamp y sin la vela en curso (se completará en la próxima reanudación)
+                unique = {
+                    k['timestamp']: k for k in done.pop(next_page)
+                    if page_start <= k['timestamp'] <= page_end and k['close_time'] < now_ms
+                }
+                klines = [unique[ts] for ts in sorted(unique)]
+                gaps.extend(find_gaps(last_kline + klines, interval_ms))
+                saved += store.save(symbol, interval, klines)
+                if klines:
+                    last_kline = klines[-1:]
+                if next_page == 0 and last_stored is None:
+                    # Descarga desde cero: el almacén queda completo desde start_ms (aunque la
+                    # primera página venga vacía porque el símbolo aún no existía)
+                    store.set_covered_from(symbol, interval, page_start)
+                next_page += 1
+
+    for gap_start, gap_end in gaps:
+        logger.warning(
+            f"⚠️ [{symbol}] Hueco en {interval}: {datetime.fromtimestamp(gap_start / 1000)} → {datetime.fromtimestamp(gap_end / 1000)}"
+        )
+    logger.info(f"✅ [{symbol}] {saved} velas {interval} guardadas ({len(gaps)} huecos)")
+    return {"symbol": symbol, "interval": interval, "pages": len(pages), "saved": saved, "gaps": gaps}
+
+def load_klines(symbol, interval, start, end=None, store=None, **kwargs):
+    """Completa el almacén para el rango y devuelve las velas desde el almacén local"""
+    store = store or KlineStore()
+    download_klines(symbol, interval, start, end, store=store, **kwargs)
+    return store.load(symbol.upper(), interval, to_ms(start), to_ms(end or datetime.now()))
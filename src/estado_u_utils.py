@@ -4,6 +4,7 @@ import os
 import sys
 import datetime
 from datetime import timedelta
+from typing import List, Optional
 from utils import log
 
 # Importar acceso a DB
@@ -64,6 +65,35 @@ def should_scan(ticker: str) -> bool:
     finally:
         session.close()
 
+# Estados que toca escanear hoy (una sola consulta, reemplaza should_scan ticker a ticker)
+def get_due_estados_u(hoy: Optional[datetime.date] = None):
+    session = SessionLocal()
+    try:
+        return crud_estados_u.get_due_estados_u(session, hoy or datetime.date.today())
+    finally:
+        session.close()
+
+# Construye el EstadoU nuevo tras un escaneo (sin tocar la DB)
+def build_estado_u(
+    ticker: str,
+    nuevo_estado: str,
+    nivel_ruptura: float,
+    slope_left: float,
+    precio_cierre: float
+) -> estados_u_schema.EstadoUCreate:
+    hoy = datetime.date.today()
+    frecuencia_dias = ESTADO_SCAN_FREQUENCY.get(nuevo_estado, DEFAULT_SCAN_FREQUENCY_DAYS)
+
+    return estados_u_schema.EstadoUCreate(
+        ticker=ticker,
+        estado_actual=nuevo_estado,
+        ultima_fecha_escaneo=hoy,
+        proxima_fecha_escaneo=hoy + timedelta(days=frecuencia_dias),
+        nivel_ruptura=nivel_ruptura,
+        slope_left=slope_left,
+        precio_cierre=precio_cierre
+    )
+
 # Actualiza el EstadoU tras un escaneo
 def update_estado_u(
     ticker: str,
@@ -74,22 +104,19 @@ def update_estado_u(
 ):
     session = SessionLocal()
     try:
-        hoy = datetime.date.today()
-        frecuencia_dias = ESTADO_SCAN_FREQUENCY.get(nuevo_estado, DEFAULT_SCAN_FREQUENCY_DAYS)
-        proxima_fecha_escaneo = hoy + timedelta(days=frecuencia_dias)
-
-        estado_update = estados_u_schema.EstadoUCreate(
-            ticker=ticker,
-            estado_actual=nuevo_estado,
-            ultima_fecha_escaneo=hoy,
-            proxima_fecha_escaneo=proxima_fecha_escaneo,
-            nivel_ruptura=nivel_ruptura,
-            slope_left=slope_left,
-            precio_cierre=precio_cierre
-        )
-
+        estado_update = build_estado_u(ticker, nuevo_estado, nivel_ruptura, slope_left, precio_cierre)
         crud_estados_u.upsert_estado_u(session, estado_update)
-        log(f"[{ticker}] EstadoU actualizado: estado={nuevo_estado}, próxima escaneo={proxima_fecha_escaneo}")
+        log(f"[{ticker}] EstadoU actualizado: estado={nuevo_estado}, próxima escaneo={estado_update.proxima_fecha_escaneo}")
+
+    finally:
+        session.close()
 
+# Guarda varios EstadoU en una sola sesión/transacción
+def bulk_update_estados_u(estados: List[estados_u_schema.EstadoUCreate]) -> int:
+    session = SessionLocal()
+    try:
+        total = crud_estados_u.bulk_upsert_estados_u(session, estados)
+        log(f"💾 {total} EstadoU actualizados en bloque")
+        return total
     finally:
         session.close()
@@ -1,12 +1,14 @@
 # src/main_smart.py
 
+import os
 import time
 import random
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 from scanner import scan_for_u, set_custom_session
-from utils import log
-from estado_u_utils import should_scan, update_estado_u, get_all_estados_u
+from utils import log, RateLimiter
+from estado_u_utils import get_due_estados_u, build_estado_u, bulk_update_estados_u
 
 # === CONFIGURACION PRO ANTI-BAN ===
 
@@ -18,84 +20,108 @@ USER_AGENTS = [
     'Mozilla/5.0 (iPad; CPU OS 17_5 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Mobile/15E148 Safari/604.1',
 ]
 
-TICKER_SLEEP = 5  # Sleep entre tickers para evitar 429
-
-# === MAIN PROGRAM ===
-
-start_time = time.time()
-log("🚀 Iniciando BOT SMART de detección de U...")
-
-# 1️⃣ Cargar todos los estados desde la DB
-estados = get_all_estados_u()
-log(f"Se cargaron {len(estados)} tickers desde la tabla estados_u.")
-
-# 2️⃣ Filtrar solo los que toca escanear hoy
-hoy = date.today()
-tickers_a_scanear = [estado.ticker for estado in estados if estado.proxima_fecha_escaneo <= hoy]
-
-log(f"Hoy toca escanear {len(tickers_a_scanear)} tickers ({len(estados)} en total en la DB).")
-
-alert_count = 0
-total_tickers = len(tickers_a_scanear)
-processed_tickers = 0
-
-for ticker in tickers_a_scanear:
-    try:
-        # Verificamos por seguridad si corresponde escanear (doble validación con should_scan)
-        if not should_scan(ticker):
-            log(f"[{ticker}] Saltado (should_scan=False).")
-            continue
-
-        processed_tickers += 1
-        log(f"({processed_tickers}/{total_tickers}) Escaneando {ticker}...")
-
-        # Crear User-Agent aleatorio y nueva sesión en cada ticker
-        user_agent = random.choice(USER_AGENTS)
-        session = requests.Session()
-        session.headers.update({'User-Agent': user_agent})
-        set_custom_session(session)
-
-        log(f"🌐 Usando User-Agent: {user_agent}")
-
-        # Escaneo con la session personalizada
-        result = scan_for_u(ticker, verbose=True)
-
-        # === DETERMINAR nuevo_estado ===
-        nuevo_estado = 'NO_U'
-        if result['alert']:
-            nuevo_estado = 'RUPTURA'
-            message = (
-                f"🚀 ¡Empieza la U en {ticker}!\n"
-                f"🔹 Nivel de ruptura (precio de confirmación): {result['precio_confirmacion']:.2f}\n"
-                f"🔹 ¡Revisar para posible compra!"
-            )
-            log(message)
-            # send_telegram_message(message)  # Descomenta cuando lo configures
-            alert_count += 1
-        else:
-            nuevo_estado = result.get('estado_sugerido', 'BASE')
-            log(f"[{ticker}] No se detectó U en este activo. Estado sugerido: {nuevo_estado}")
-
-        # ACTUALIZAR EstadoU en DB
-        update_estado_u(
-            ticker=ticker,
-            nuevo_estado=nuevo_estado,
-            nivel_ruptura=result['nivel_ruptura'] or 0.0,
-            slope_left=result.get('slope_left', 0.0),
-            precio_cierre=result.get('precio_confirmacion', 0.0)
+# Ritmo global de descargas (reemplaza el sleep fijo de 5-7 s entre tickers)
+REQUESTS_PER_SECOND = float(os.getenv("SMART_REQUESTS_PER_SECOND", "0.5"))
+RATE_BURST = int(os.getenv("SMART_RATE_BURST", "2"))
+
+BATCH_SIZE = int(os.getenv("SMART_BATCH_SIZE", "25"))   # Tickers por lote (una sesión HTTP y un upsert por lote)
+MAX_WORKERS = int(os.getenv("SMART_MAX_WORKERS", "4"))  # Detecciones en paralelo
+
+rate_limiter = RateLimiter(REQUESTS_PER_SECOND, RATE_BURST)
+
+# === FUNCIONES ===
+
+def new_http_session():
+    """Sesión con User-Agent aleatorio, compartida por todos los tickers del lote"""
+    user_agent = random.choice(USER_AGENTS)
+    session = requests.Session()
+    session.headers.update({'User-Agent': user_agent})
+    log(f"🌐 Usando User-Agent: {user_agent}")
+    return session
+
+def scan_ticker(ticker):
+    """Descarga + detección de un ticker (corre en el pool), respetando el rate limiter"""
+    rate_limiter.acquire()
+    return scan_for_u(ticker, verbose=False)
+
+def resolve_estado(ticker, result):
+    """Traduce el resultado del scanner al nuevo EstadoU. Devuelve (estado, hubo_alerta)"""
+    if result['alert']:
+        nuevo_estado = 'RUPTURA'
+        message = (
+            f"🚀 ¡Empieza la U en {ticker}!\n"
+            f"🔹 Nivel de ruptura (precio de confirmación): {result['precio_confirmacion']:.2f}\n"
+            f"🔹 ¡Revisar para posible compra!"
         )
+        log(message)
+        # send_telegram_message(message)  # Descomenta cuando lo configures
+    else:
+        nuevo_estado = result.get('estado_sugerido', 'BASE')
+        log(f"[{ticker}] No se detectó U en este activo. Estado sugerido: {nuevo_estado}")
+
+    estado = build_estado_u(
+        ticker=ticker,
+        nuevo_estado=nuevo_estado,
+        nivel_ruptura=result['nivel_ruptura'] or 0.0,
+        slope_left=result.get('slope_left', 0.0),
+        precio_cierre=result.get('precio_confirmacion', 0.0)
+    )
+    return estado, bool(result['alert'])
+
+def scan_batch(tickers, pool):
+    """Escanea un lote en el pool y guarda todos sus estados con un solo upsert"""
+    set_custom_session(new_http_session())
+
+    futures = {pool.submit(scan_ticker, ticker): ticker for ticker in tickers}
+    nuevos_estados = []
+    alertas = 0
+
+    for future in as_completed(futures):
+        ticker = futures[future]
+        try:
+            estado, hubo_alerta = resolve_estado(ticker, future.result())
+            nuevos_estados.append(estado)
+            alertas += int(hubo_alerta)
+        except Exception as e:
+            log(f"❌ Error escaneando {ticker}: {e}")
 
+    try:
+        bulk_update_estados_u(nuevos_estados)
     except Exception as e:
-        log(f"❌ Error escaneando {ticker}: {e}")
+        log(f"❌ Error guardando EstadoU del lote: {e}")
 
-    # Sleep entre tickers (con jitter aleatorio)
-    sleep_time = TICKER_SLEEP + random.uniform(0, 2)
-    log(f"⏳ Esperando {sleep_time:.2f} segundos antes del próximo ticker...")
-    time.sleep(sleep_time)
+    return len(nuevos_estados), alertas
 
-# === FINAL ===
+# === MAIN PROGRAM ===
 
-elapsed_time = time.time() - start_time
-log(f"✅ SMART escaneo finalizado. Total alertas enviadas: {alert_count}.")
-log(f"🕒 Tiempo total de ejecución: {elapsed_time:.2f} segundos.")
-log("🚀 BOT SMART de detección de U terminado.")
+def run():
+    start_time = time.time()
+    log("🚀 Iniciando BOT SMART de detección de U...")
+
+    # 1️⃣ Cargar de una vez solo los estados que toca escanear hoy
+    hoy = date.today()
+    tickers_a_scanear = [estado.ticker for estado in get_due_estados_u(hoy)]
+    total_tickers = len(tickers_a_scanear)
+    log(f"Hoy toca escanear {total_tickers} tickers (lotes de {BATCH_SIZE}, {MAX_WORKERS} workers, {REQUESTS_PER_SECOND} req/s).")
+
+    alert_count = 0
+    processed_tickers = 0
+
+    # 2️⃣ Procesar por lotes con un pool acotado
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for i in range(0, total_tickers, BATCH_SIZE):
+            batch = tickers_a_scanear[i:i + BATCH_SIZE]
+            log(f"({i + 1}-{i + len(batch)}/{total_tickers}) Escaneando lote: {', '.join(batch)}")
+            scanned, alertas = scan_batch(batch, pool)
+            processed_tickers += scanned
+            alert_count += alertas
+
+    # === FINAL ===
+
+    elapsed_time = time.time() - start_time
+    log(f"✅ SMART escaneo finalizado. {processed_tickers}/{total_tickers} tickers. Total alertas enviadas: {alert_count}.")
+    log(f"🕒 Tiempo total de ejecución: {elapsed_time:.2f} segundos.")
+    log("🚀 BOT SMART de detección de U terminado.")
+
+if __name__ == "__main__":
+    run()
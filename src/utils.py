@@ -1,4 +1,5 @@
 import numpy as np
+import threading
 import time
 
 def calc_slope(series):
@@ -9,3 +10,29 @@ def calc_slope(series):
 
 def log(msg):
     print(f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
+
+
+class RateLimiter:
+    """Token bucket thread-safe: `rate` peticiones por segundo con ráfagas de hasta `burst`"""
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError(f"RateLimiter: rate debe ser > 0 (recibido {rate})")
+        self.rate = float(rate)
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)